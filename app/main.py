@@ -1,12 +1,17 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.models import ListingRequest, ListingResponse
 from app.openai_utils import generate_amazon_listing
 import logging
 import os
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+import metrics
+import structured_logging
+import tracing
+
+# Queued, sampled logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE, ...)
+structured_logging.configure()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -25,11 +30,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request durations and in-flight requests for GET /metrics
+app.add_middleware(metrics.ASGIMetricsMiddleware, app_name="app")
+
+# Opt-in per-request timing breakdown (X-Trace: 1 or TRACE_REQUESTS=1)
+app.add_middleware(tracing.ASGITracingMiddleware, paths=("/generate-listing",))
+
+# Request id and sampling decision for the log records of each request
+app.add_middleware(structured_logging.ASGILoggingMiddleware)
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
     return {"status": "healthy", "message": "Amazon Listing Generator API is running"}
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: pipeline stage timings, tokens and requests."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.post("/generate-listing", response_model=ListingResponse)
 async def generate_listing(data: ListingRequest):
     """
@@ -42,10 +61,12 @@ async def generate_listing(data: ListingRequest):
         A formatted product listing with title, bullet points, and description
     """
     try:
-        logger.debug(f"Received request for product: {data.product_name}")
+        logger.debug("Received request for product: %s", data.product_name)
         
-        if not data.product_name or not data.category or not data.features:
-            raise HTTPException(status_code=400, detail="Missing required product information")
+        # The request body itself was validated by FastAPI before this runs
+        with tracing.span("validation"):
+            if not data.product_name or not data.category or not data.features:
+                raise HTTPException(status_code=400, detail="Missing required product information")
         
         result = generate_amazon_listing(
             data.product_name,
@@ -53,11 +74,11 @@ async def generate_listing(data: ListingRequest):
             data.features
         )
         
-        logger.debug(f"Successfully generated listing for: {data.product_name}")
+        logger.debug("Successfully generated listing for: %s", data.product_name)
         return result
     
     except Exception as e:
-        logger.error(f"Error generating listing: {e}")
+        logger.error("Error generating listing: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to generate listing: {str(e)}")
 
 # If running directly (not imported)
@@ -1,7 +1,10 @@
 import os
 import json
 import logging
-from openai import OpenAI
+import threading
+
+import metrics
+from llm_transport import transport
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -11,7 +14,20 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     logger.warning("OPENAI_API_KEY environment variable is not set")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Created on first use, so the app imports (and fails per request) without a key
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the shared OpenAI client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = transport.openai_client(api_key=OPENAI_API_KEY)
+        return _client
+
+MODEL = "gpt-4o"
+_IN_FLIGHT = metrics.LLM_CALLS_IN_FLIGHT.labels("app_listing")
 
 def generate_amazon_listing(product_name, category, features):
     """
@@ -29,11 +45,12 @@ def generate_amazon_listing(product_name, category, features):
     if not product_name or not category or not features:
         raise ValueError("Missing required product information")
     
-    # Format features as a bulleted list for the prompt
-    features_text = "\n".join([f"- {feature}" for feature in features])
+    with metrics.PROMPT_BUILD.time():
+        # Format features as a bulleted list for the prompt
+        features_text = "\n".join([f"- {feature}" for feature in features])
     
-    # Create the prompt for OpenAI
-    prompt = f"""
+        # Create the prompt for OpenAI
+        prompt = f"""
     Create an Amazon product listing in JSON format for the following product:
     
     Product Name: {product_name}
@@ -54,20 +71,25 @@ def generate_amazon_listing(product_name, category, features):
         # Call the OpenAI API
         # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert e-commerce copywriter specializing in Amazon product listings."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7,
-            max_tokens=1000
-        )
+        with _IN_FLIGHT.track_inprogress(), metrics.LLM_WAIT.time():
+            response = transport.call(
+                get_client().chat.completions.create,
+                key="listing",
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": "You are an expert e-commerce copywriter specializing in Amazon product listings."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.7,
+                max_tokens=1000
+            )
+        metrics.record_tokens(MODEL, response.usage)
         
         # Extract and parse the response
         content = response.choices[0].message.content
-        listing_data = json.loads(content)
+        with metrics.JSON_PARSE.time():
+            listing_data = json.loads(content)
         
         # Validate the response structure
         if not all(key in listing_data for key in ["title", "bullets", "description"]):
@@ -85,5 +107,5 @@ def generate_amazon_listing(product_name, category, features):
         }
         
     except Exception as e:
-        logger.error(f"Error in OpenAI API call: {str(e)}")
+        logger.error("Error in OpenAI API call: %s", e)
         raise Exception(f"Failed to generate listing: {str(e)}")
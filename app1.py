@@ -1,20 +1,28 @@
 import os
 import json
 import logging
-import random
-import re
-from collections import Counter
-from flask import Flask, render_template, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
-
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+import time
+from datetime import datetime
+from flask import Flask, Response, g, render_template, request, jsonify
+
+import competitor_pages
+import history
+import listing_templates
+import metrics
+import openai_utils
+import persistence
+import search
+import seo_analysis
+import seo_scoring
+import structured_logging
+import tracing
+from circuit_breaker import CircuitOpenError
+from models import BulletPoint, CompetitorURL, Listing, create_indexes, db
+from write_behind import WriteBehindQueue
 
-# Define the base class for SQLAlchemy models
-class Base(DeclarativeBase):
-    pass
+# Queued, sampled logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE, ...)
+structured_logging.configure()
+logger = logging.getLogger(__name__)
 
 # Initialize Flask app and SQLAlchemy
 app = Flask(__name__)
@@ -27,47 +35,92 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
 }
 
+# Bulk SEO scoring limits
+SEO_SCORE_MAX_LISTINGS = int(os.environ.get("SEO_SCORE_MAX_LISTINGS", 5000))
+SEO_SCORE_POOL_THRESHOLD = int(os.environ.get("SEO_SCORE_POOL_THRESHOLD", 256))
+SEO_SCORE_WORKERS = int(os.environ.get("SEO_SCORE_WORKERS", os.cpu_count() or 1))
+
 # Initialize SQLAlchemy
-db = SQLAlchemy(model_class=Base)
 db.init_app(app)
 
-# Define models
-class Listing(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    product_name = db.Column(db.String(255), nullable=False)
-    category = db.Column(db.String(100), nullable=False)
-    title = db.Column(db.String(500), nullable=False)
-    description = db.Column(db.Text, nullable=False)
-    keywords = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
-    
-    # Define relationships
-    bullet_points = db.relationship('BulletPoint', backref='listing', cascade='all, delete-orphan')
-    competitor_urls = db.relationship('CompetitorURL', backref='listing', cascade='all, delete-orphan')
-
-class BulletPoint(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    listing_id = db.Column(db.Integer, db.ForeignKey('listing.id'), nullable=False)
-    bullet_text = db.Column(db.String(500), nullable=False)
-    position = db.Column(db.Integer, nullable=False)
-    
-class CompetitorURL(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    listing_id = db.Column(db.Integer, db.ForeignKey('listing.id'), nullable=False)
-    url = db.Column(db.String(1024), nullable=False)
-    title = db.Column(db.String(500), nullable=True)
-    position = db.Column(db.Integer, nullable=False)
-
-# Create all tables
+# Create all tables (and indexes added after the tables were created)
 with app.app_context():
     db.create_all()
+    create_indexes(db.engine)
+    try:
+        search.ensure_search_index(db.engine)
+    except Exception as e:
+        logger.error("Full-text search unavailable: %s", e)
+
+def _store_listing_batch(records):
+    """Write-behind sink: persist a batch of listing records in one transaction."""
+    with app.app_context(), metrics.DB_INSERT.time():
+        ids = persistence.store_listings(records, db.session)
+        logger.debug("Stored %d listings in database, last ID: %s", len(ids), ids[-1] if ids else None)
+
+# Generated listings are stored off the request path by a background worker
+listing_writer = WriteBehindQueue(
+    _store_listing_batch,
+    max_size=int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", 1000)),
+    batch_size=int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", 100)),
+    flush_interval=float(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", 0.5)),
+    put_timeout=float(os.environ.get("WRITE_BEHIND_PUT_TIMEOUT", 1.0)),
+)
+metrics.WRITE_BEHIND_DEPTH.labels().set_function(listing_writer.depth)
+
+# Request metrics (see metrics and GET /metrics)
+_IN_FLIGHT = metrics.REQUESTS_IN_FLIGHT.labels("app1")
+_CIRCUIT_FALLBACKS = metrics.FALLBACKS.labels("circuit_open")
+_ERROR_FALLBACKS = metrics.FALLBACKS.labels("llm_error")
+
+# Routes with opt-in per-request timing breakdown (X-Trace: 1 or TRACE_REQUESTS=1)
+TRACED_ROUTES = frozenset({"/api/generate-listing"})
+
+@app.before_request
+def _start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.log_token = structured_logging.start_request(request.path,
+                                                   request.headers.get(tracing.REQUEST_ID_HEADER))
+    _IN_FLIGHT.inc()
+    g.in_flight = True
+    if request.path in TRACED_ROUTES and tracing.tracer.wanted(request.headers.get(tracing.TRACE_HEADER)):
+        g.trace, g.trace_token = tracing.tracer.start(request.path,
+                                                      request.headers.get(tracing.REQUEST_ID_HEADER))
+
+@app.after_request
+def _record_request_metrics(response):
+    # Skipped when the view raises; _end_request does the cleanup either way
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.REQUEST_SECONDS.labels("app1", route, response.status_code).observe(
+            time.perf_counter() - started)
+    g.response_status = response.status_code
+    trace = g.get("trace")
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers[tracing.REQUEST_ID_HEADER] = trace.request_id
+    return response
+
+@app.teardown_request
+def _end_request(error=None):
+    # Runs even when the view raised, so the gauge always comes back down
+    # and the next request on this thread starts without this one's context
+    if g.pop("in_flight", False):
+        _IN_FLIGHT.dec()
+    trace = g.pop("trace", None)
+    if trace is not None:
+        tracing.tracer.finish(trace, g.pop("trace_token"), g.pop("response_status", 500))
+    log_token = g.pop("log_token", None)
+    if log_token is not None:
+        structured_logging.end_request(log_token)
 
 @app.route('/')
 def index():
     """Render the main page with the listing generator form."""
     return render_template('index.html')
 
-def generate_amazon_listing(product_name, category, features, target_keywords=None):
+def generate_amazon_listing(product_name, category, features, target_keywords=None, competitor_urls=None):
     """
     Generate an Amazon product listing using advanced SEO, AEO (Amazon Everything Optimizer), 
     organic reach algorithms, and psychological selling techniques.
@@ -77,532 +130,139 @@ def generate_amazon_listing(product_name, category, features, target_keywords=No
         category (str): Product category
         features (list): List of key product features
         target_keywords (list, optional): List of target keywords for SEO optimization
+        competitor_urls (list, optional): The seller's competitor URLs (strings
+            or {"url", "title"} dicts), used instead of the template examples
         
     Returns:
         dict: Generated listing with title, bullets, description, keywords, competitor URLs, and SEO analysis
     """
-    # Validate inputs
-    if not product_name or not category or not features:
-        raise ValueError("Missing required product information")
-    
-    # Template patterns for different product categories
-    templates = {
-        "Electronics": {
-            "title": f"{product_name} - Premium [FEATURE1] with [FEATURE2] - Advanced [CATEGORY] Technology for [BENEFIT] - [YEAR]",
-            "description": f"Introducing the innovative {product_name}, the perfect solution for all your {category.lower()} needs. This cutting-edge device combines state-of-the-art technology with sleek design to deliver an unparalleled user experience.\n\nEngineered with precision and attention to detail, the {product_name} offers exceptional performance that stands out in today's competitive market. Whether you're a professional looking for reliable equipment or a casual user seeking convenience, this product exceeds expectations on all fronts.\n\nThe {product_name} features advanced functionality that puts it ahead of similar products. Its intuitive interface makes it accessible to users of all experience levels, while its robust construction ensures longevity and durability even with regular use.\n\nOur team of engineers has spent countless hours perfecting every aspect of the {product_name}. The result is a product that not only meets but exceeds industry standards, providing you with a truly remarkable experience every time you use it.\n\nInvest in quality and reliability with the {product_name} - the smart choice for discerning customers who demand excellence."
-        },
-        "Home & Kitchen": {
-            "title": f"{product_name} - Premium Quality [FEATURE1] for Modern Homes - Durable [CATEGORY] with [FEATURE2] - Perfect for [BENEFIT]",
-            "description": f"Transform your living space with the exceptional {product_name}, designed specifically for today's modern homes. This premium {category.lower()} item combines elegant design with practical functionality to enhance your daily life.\n\nCrafted from high-quality materials, the {product_name} is built to last and withstand the rigors of regular use. Its thoughtful design addresses common pain points while providing innovative solutions that make your home life more comfortable and convenient.\n\nThe {product_name} seamlessly integrates into any home décor style, adding both aesthetic appeal and practical value to your living space. Its versatile design makes it suitable for various uses, adapting to your changing needs.\n\nWe've paid meticulous attention to every detail of the {product_name}, ensuring that it not only looks beautiful but performs flawlessly. From the quality of materials to the precision of manufacturing, no aspect has been overlooked.\n\nBring home the {product_name} today and experience the perfect balance of style, functionality, and durability. Your satisfaction is guaranteed with this exceptional addition to your home."
-        },
-        "Beauty & Personal Care": {
-            "title": f"{product_name} - Professional [CATEGORY] [FEATURE1] - Gentle yet Effective [FEATURE2] for [BENEFIT] - Premium Quality",
-            "description": f"Discover the transformative power of the {product_name}, a revolutionary addition to your {category.lower()} routine. This premium product delivers professional-grade results from the comfort of your home, helping you look and feel your absolute best.\n\nFormulated with the finest ingredients, the {product_name} is gentle on your skin while effectively addressing your specific {category.lower()} needs. Its innovative approach sets a new standard in personal care, offering results you can see and feel immediately.\n\nThe {product_name} has been developed following extensive research and testing to ensure optimal performance and safety. Each component has been carefully selected to work in harmony, providing a comprehensive solution to your {category.lower()} requirements.\n\nPerfect for daily use, the {product_name} integrates seamlessly into your existing routine, enhancing your natural beauty without complicated procedures or extensive time commitments. Its user-friendly design makes professional-quality care accessible to everyone.\n\nChoose the {product_name} for your {category.lower()} needs and join thousands of satisfied customers who have made this exceptional product part of their daily self-care ritual."
-        },
-        "Sports & Outdoors": {
-            "title": f"{product_name} - Professional Grade [CATEGORY] Equipment - Durable [FEATURE1] with [FEATURE2] for [BENEFIT] - Performance Engineered",
-            "description": f"Elevate your performance with the game-changing {product_name}, engineered for athletes and outdoor enthusiasts who demand the very best. This professional-grade {category.lower()} equipment combines innovative design with durable construction to support your active lifestyle.\n\nBuilt to withstand the challenges of intense use and varying environmental conditions, the {product_name} delivers consistent performance when you need it most. Its resilient construction ensures longevity, making it a worthwhile investment for serious enthusiasts.\n\nThe {product_name} features cutting-edge technology that enhances your natural abilities, helping you achieve new personal bests and overcome previous limitations. Every aspect has been optimized to support peak performance, giving you a competitive edge.\n\nExtensive field testing by professional athletes has informed the development of the {product_name}, resulting in equipment that addresses real-world needs and challenges. The feedback of experts has been incorporated at every stage of the design process.\n\nTake your {category.lower()} experience to the next level with the {product_name} - where superior quality meets exceptional performance for those who refuse to compromise."
-        }
-    }
-    
-    # Default template for categories not in our list
-    default_template = {
-        "title": f"{product_name} - Premium Quality [FEATURE1] with [FEATURE2] - Professional [CATEGORY] for [BENEFIT]",
-        "description": f"Introducing the remarkable {product_name}, a standout product in the {category} market designed to exceed your expectations. This premium item combines innovative design with exceptional functionality to deliver a superior experience.\n\nMeticulously crafted with attention to detail, the {product_name} addresses common challenges while offering unique benefits that set it apart from competitors. Every aspect has been carefully considered to ensure optimal performance and user satisfaction.\n\nThe {product_name} represents our commitment to quality and innovation in the {category} industry. We've incorporated feedback from customers and experts alike to create a product that truly meets the needs of its users.\n\nWhether you're a professional seeking reliable equipment or an enthusiast looking for quality, the {product_name} delivers consistent results you can count on. Its versatile design adapts to various situations, providing flexible solutions for diverse requirements.\n\nChoose the {product_name} for a combination of quality, performance, and value that's unmatched in today's market. Join our satisfied customers who have made this exceptional product an essential part of their lives."
-    }
-    
-    # Select the appropriate template or use default
-    template = templates.get(category, default_template)
-    
-    # Process features for title and description
-    main_features = features[:2] if len(features) >= 2 else features + ["Quality"] * (2 - len(features))
-    benefit = "Maximum Performance" if not features else features[0].split(" ")[-1]
-    
-    # Replace placeholders in title
-    title = template["title"]
-    title = title.replace("[FEATURE1]", main_features[0])
-    title = title.replace("[FEATURE2]", main_features[1])
-    title = title.replace("[CATEGORY]", category)
-    title = title.replace("[BENEFIT]", benefit)
-    title = title.replace("[YEAR]", "2025")
-    
-    # Generate benefit-focused bullet points based on features
-    bullet_templates = [
-        "[FEATURE]: Enjoy [BENEFIT] with our advanced design that sets new standards in [CATEGORY].",
-        "PREMIUM [FEATURE]: Experience exceptional [BENEFIT] that makes everyday tasks easier and more efficient.",
-        "INNOVATIVE [FEATURE]: Discover the difference with our unique approach to [BENEFIT] that competitors can't match.",
-        "DURABLE [FEATURE]: Rely on long-lasting performance with quality construction designed for [BENEFIT].",
-        "USER-FRIENDLY [FEATURE]: Appreciate the intuitive design that makes [BENEFIT] accessible to everyone.",
-        "VERSATILE [FEATURE]: Adapt to changing needs with flexible functionality perfect for various [BENEFIT] scenarios.",
-        "PROFESSIONAL-GRADE [FEATURE]: Achieve results comparable to professional services with our [BENEFIT] solution.",
-        "ECO-FRIENDLY [FEATURE]: Make responsible choices with our sustainable approach to [BENEFIT]."
-    ]
-    
-    bullets = []
-    for i, feature in enumerate(features[:5]):
-        if i < len(bullet_templates):
-            bullet = bullet_templates[i].replace("[FEATURE]", feature.upper())
-            bullet = bullet.replace("[BENEFIT]", "enhanced performance" if not benefit else benefit)
-            bullet = bullet.replace("[CATEGORY]", category)
-            bullets.append(bullet)
-    
-    # Pad bullets to exactly 5 if needed
-    if len(bullets) < 5:
-        for i in range(5 - len(bullets)):
-            index = (len(bullets) + i) % len(bullet_templates)
-            generic_feature = f"Quality Feature {i+1}"
-            bullet = bullet_templates[index].replace("[FEATURE]", generic_feature.upper())
-            bullet = bullet.replace("[BENEFIT]", "enhanced performance" if not benefit else benefit)
-            bullet = bullet.replace("[CATEGORY]", category)
-            bullets.append(bullet)
-    
-    # Use user-provided keywords if available, or generate them
-    if target_keywords and isinstance(target_keywords, list) and len(target_keywords) > 0:
-        # Use user-provided keywords
-        logger.debug("Using user-provided keywords")
-        keywords = target_keywords
-    else:
-        # Generate keywords based on product features and category
-        logger.debug("Generating keywords automatically")
-        keywords_templates = {
-            "Electronics": ["tech", "gadget", "smart", "wireless", "digital", "device", "electronic", "innovative"],
-            "Home & Kitchen": ["home", "kitchen", "decor", "appliance", "cookware", "furniture", "household", "storage"],
-            "Beauty & Personal Care": ["beauty", "skincare", "haircare", "cosmetic", "organic", "natural", "wellness", "spa"],
-            "Sports & Outdoors": ["sports", "fitness", "outdoor", "training", "athletic", "performance", "equipment", "gear"]
-        }
-        
-        base_keywords = keywords_templates.get(category, ["quality", "premium", "professional", "durable"])
-        
-        # Extract potential keywords from features
-        feature_words = []
-        for feature in features:
-            words = feature.lower().split()
-            feature_words.extend([word for word in words if len(word) > 3 and word not in ["with", "that", "this", "from", "your", "will", "have", "more", "than"]])
-        
-        # Generate final keywords
-        product_words = product_name.lower().split()
-        keywords = list(set(base_keywords + feature_words + product_words))[:15]  # Limit to 15 keywords
-    
+    # Render the precompiled category templates (raises ValueError on missing input)
+    with metrics.TEMPLATE.time():
+        listing = listing_templates.generate_template_listing(product_name, category, features,
+                                                              target_keywords)
+    title = listing["title"]
+    bullets = listing["bullets"]
+    description = listing["description"]
+    keywords = listing["keywords"]
     keywords_str = ", ".join(keywords)
+    if competitor_urls and isinstance(competitor_urls, list):
+        competitor_urls = [{"url": c.get("url", ""), "title": c.get("title", "")} if isinstance(c, dict)
+                           else {"url": str(c), "title": ""} for c in competitor_urls]
+    else:
+        competitor_urls = listing["competitor_urls"]
     
-    # Generate competitor URLs based on product name and category
-    competitor_base_urls = [
-        "https://www.amazon.com/dp/B08N5LNQCX",
-        "https://www.amazon.com/dp/B07PXGQC1Q",
-        "https://www.amazon.com/dp/B096TWFVLG",
-        "https://www.amazon.com/dp/B08KGYVKRT",
-        "https://www.amazon.com/dp/B09B9XJ4KG"
-    ]
-    
-    # Generate competitor titles based on product and category
-    competitor_titles = [
-        f"Premium {product_name} with Advanced Features - Best Seller 2025",
-        f"Professional {category} {product_name} - Top Rated on Amazon",
-        f"{product_name} Elite Series - #1 Customer Choice for {category}",
-        f"Ultimate {product_name} {category} Solution - Fast Shipping",
-        f"Deluxe {product_name} Pro - High Performance {category} Product"
-    ]
-    
-    # Create competitor URLs with titles
-    competitor_urls = []
-    for i in range(min(5, len(competitor_base_urls))):
-        competitor_urls.append({
-            "url": competitor_base_urls[i],
-            "title": competitor_titles[i]
-        })
-    
-    # Perform SEO analysis
-    def analyze_keyword_density(text, keywords):
-        """Analyze keyword density in the given text"""
-        text = text.lower()
-        words = re.findall(r'\b\w+\b', text)
-        total_words = len(words)
-        
-        if total_words == 0:
-            return {}
-        
-        # Count occurrences of each keyword
-        density = {}
-        for keyword in keywords:
-            keyword = keyword.lower()
-            count = text.count(keyword)
-            if count > 0:
-                density[keyword] = {
-                    'count': count,
-                    'percentage': round((count / total_words) * 100, 2)
-                }
-        
-        return density
-    
-    def analyze_title_length(title):
-        """Analyze title length according to Amazon's guidelines"""
-        char_count = len(title)
-        char_limit = 200
-        
-        result = {
-            'character_count': char_count,
-            'character_limit': char_limit,
-            'within_limit': char_count <= char_limit
-        }
-        
-        if char_count > char_limit:
-            result['recommendation'] = f"Title exceeds Amazon's character limit by {char_count - char_limit} characters. Consider shortening it."
-        elif char_count < 100:
-            result['recommendation'] = "Title could be more descriptive. Consider adding more relevant keywords while staying under the 200 character limit."
-        else:
-            result['recommendation'] = "Title length is optimal for Amazon's guidelines."
-            
-        return result
-    
-    def analyze_keyword_placement(title, bullets, keywords):
-        """Analyze keyword placement in title and bullets"""
-        title_lower = title.lower()
-        result = {
-            'keywords_in_title': [],
-            'keywords_in_bullets': [],
-            'missing_keywords': []
-        }
-        
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            found_in_title = keyword_lower in title_lower
-            
-            # Check if keyword appears in any bullet points
-            found_in_bullets = any(keyword_lower in bullet.lower() for bullet in bullets)
-            
-            if found_in_title:
-                result['keywords_in_title'].append(keyword)
-            
-            if found_in_bullets:
-                result['keywords_in_bullets'].append(keyword)
-                
-            if not found_in_title and not found_in_bullets:
-                result['missing_keywords'].append(keyword)
-        
-        return result
-    
-    def calculate_seo_score(title_analysis, keyword_analysis, density_analysis):
-        """Calculate an overall SEO score based on various factors"""
-        score = 0
-        max_score = 100
-        
-        # Title within limit: 20 points
-        if title_analysis['within_limit']:
-            score += 20
-        
-        # Keywords in title: up to 25 points
-        keywords_in_title_ratio = len(keyword_analysis['keywords_in_title']) / len(keywords) if keywords else 0
-        score += round(keywords_in_title_ratio * 25)
-        
-        # Keywords in bullets: up to 20 points
-        keywords_in_bullets_ratio = len(keyword_analysis['keywords_in_bullets']) / len(keywords) if keywords else 0
-        score += round(keywords_in_bullets_ratio * 20)
-        
-        # Keyword density: up to 15 points
-        if density_analysis:
-            # Check if at least some keywords have a good density (0.5% to 2.5%)
-            good_density_count = sum(1 for k, v in density_analysis.items() 
-                                    if 0.5 <= v['percentage'] <= 2.5)
-            if good_density_count:
-                score += round((good_density_count / len(density_analysis)) * 15)
-        
-        # Keyword coverage: up to 20 points (no missing keywords)
-        missing_keywords_ratio = len(keyword_analysis['missing_keywords']) / len(keywords) if keywords else 1
-        score += round((1 - missing_keywords_ratio) * 20)
-        
-        return {
-            'score': score,
-            'max_score': max_score,
-            'percentage': round((score / max_score) * 100),
-            'rating': 'Excellent' if score >= 85 else 'Good' if score >= 70 else 'Fair' if score >= 50 else 'Needs Improvement'
-        }
-    
-    # Perform SEO analysis on the generated content
-    full_text = title + " " + " ".join(bullets) + " " + template["description"]
-    
-    title_analysis = analyze_title_length(title)
-    density_analysis = analyze_keyword_density(full_text, keywords)
-    keyword_placement = analyze_keyword_placement(title, bullets, keywords)
-    
-    # Calculate overall SEO score
-    seo_score = calculate_seo_score(title_analysis, keyword_placement, density_analysis)
-    
-    # Apply AEO (Amazon Everything Optimizer) strategies
-    def apply_aeo_strategies(title, bullets, description, keywords):
-        """
-        Apply Amazon Everything Optimizer (AEO) strategies to enhance ranking
-        in Amazon's A9 algorithm and increase organic reach.
-        """
-        aeo_analysis = {
-            'strategies_applied': [],
-            'recommendations': []
-        }
-        
-        # Strategy 1: Backend keywords optimization
-        backend_keywords = keywords.copy()
-        # Add singular/plural variations, common misspellings
-        for keyword in list(backend_keywords):  # Create a copy to iterate over
-            if keyword.endswith('s') and len(keyword) > 4:
-                backend_keywords.append(keyword[:-1])  # Add singular
-            elif len(keyword) > 3:
-                backend_keywords.append(keyword + 's')  # Add plural
-        
-        aeo_analysis['strategies_applied'].append('Backend Keywords Optimization')
-        
-        # Strategy 2: Search term optimization for A9 algorithm
-        if len(title) < 150:
-            aeo_analysis['recommendations'].append('Extend title to use more of the 200 character limit with relevant keywords')
-        
-        # Check for brand name inclusion
-        if product_name not in title[:50]:
-            aeo_analysis['recommendations'].append('Place product name in the first 50 characters of the title')
-        
-        aeo_analysis['strategies_applied'].append('A9 Search Term Optimization')
-        
-        # Strategy 3: Indexing optimization check
-        indexed_terms = set()
-        for word in re.findall(r'\b\w+\b', title.lower()):
-            if len(word) > 3:  # Skip small words
-                indexed_terms.add(word)
-                
-        for bullet in bullets:
-            for word in re.findall(r'\b\w+\b', bullet.lower()):
-                if len(word) > 3:
-                    indexed_terms.add(word)
-        
-        # Check if main keywords are in indexed terms
-        missing_indexed_keywords = [k for k in keywords if k.lower() not in indexed_terms]
-        if missing_indexed_keywords:
-            aeo_analysis['recommendations'].append(f"Add these keywords to title or bullets for better indexing: {', '.join(missing_indexed_keywords[:3])}")
-        
-        aeo_analysis['strategies_applied'].append('Indexing Optimization')
-        
-        # Strategy 4: Organic reach enhancement
-        aeo_analysis['strategies_applied'].append('Organic Reach Enhancement')
-        
-        return aeo_analysis
-    
-    # Apply psychological selling techniques
-    def apply_psychological_techniques(bullets, description):
-        """
-        Apply scientifically-backed psychological selling techniques 
-        to increase conversion rates.
-        """
-        techniques = {
-            'applied_techniques': [],
-            'impact_analysis': {}
-        }
-        
-        # Technique 1: Scarcity principle
-        scarcity_phrases = [
-            "Limited stock available",
-            "Exclusive offer",
-            "While supplies last",
-            "Limited edition"
-        ]
-        
-        # Technique 2: Social proof
-        social_proof_phrases = [
-            "Loved by thousands of customers",
-            "Highly rated by users",
-            "Customer favorite",
-            "Best-selling product"
-        ]
-        
-        # Technique 3: Authority principle
-        authority_phrases = [
-            "Expert-recommended",
-            "Professionally tested",
-            "Industry-leading",
-            "Certified quality"
-        ]
-        
-        # Technique 4: Reciprocity
-        reciprocity_phrases = [
-            "Free bonus included",
-            "Extra value added",
-            "Complimentary guide included",
-            "Special gift with purchase"
-        ]
-        
-        # Check for techniques in bullets and description
-        all_text = " ".join(bullets) + " " + description
-        
-        # Check for scarcity
-        scarcity_count = sum(1 for phrase in scarcity_phrases if phrase.lower() in all_text.lower())
-        if scarcity_count > 0:
-            techniques['applied_techniques'].append('Scarcity Principle')
-            techniques['impact_analysis']['scarcity'] = 'High' if scarcity_count > 1 else 'Medium'
-        else:
-            techniques['impact_analysis']['scarcity'] = 'Not Applied'
-        
-        # Check for social proof
-        social_proof_count = sum(1 for phrase in social_proof_phrases if phrase.lower() in all_text.lower())
-        if social_proof_count > 0:
-            techniques['applied_techniques'].append('Social Proof')
-            techniques['impact_analysis']['social_proof'] = 'High' if social_proof_count > 1 else 'Medium'
-        else:
-            techniques['impact_analysis']['social_proof'] = 'Not Applied'
-            
-        # Check for authority
-        authority_count = sum(1 for phrase in authority_phrases if phrase.lower() in all_text.lower())
-        if authority_count > 0:
-            techniques['applied_techniques'].append('Authority Principle')
-            techniques['impact_analysis']['authority'] = 'High' if authority_count > 1 else 'Medium'
-        else:
-            techniques['impact_analysis']['authority'] = 'Not Applied'
-            
-        # Check for reciprocity
-        reciprocity_count = sum(1 for phrase in reciprocity_phrases if phrase.lower() in all_text.lower())
-        if reciprocity_count > 0:
-            techniques['applied_techniques'].append('Reciprocity Principle')
-            techniques['impact_analysis']['reciprocity'] = 'High' if reciprocity_count > 1 else 'Medium'
-        else:
-            techniques['impact_analysis']['reciprocity'] = 'Not Applied'
-        
-        return techniques
-    
-    # Apply AEO strategies
-    aeo_analysis = apply_aeo_strategies(title, bullets, template["description"], keywords)
-    
-    # Apply psychological selling techniques
-    psych_techniques = apply_psychological_techniques(bullets, template["description"])
-    
-    # Prepare SEO analysis results
-    seo_analysis = {
-        'title_analysis': title_analysis,
-        'keyword_density': density_analysis,
-        'keyword_placement': keyword_placement,
-        'seo_score': seo_score,
-        'recommendations': []
-    }
-    
-    # Generate recommendations based on analysis
-    if not title_analysis['within_limit']:
-        seo_analysis['recommendations'].append(title_analysis['recommendation'])
-    
-    if keyword_placement['missing_keywords']:
-        missing_kw_str = ", ".join(keyword_placement['missing_keywords'][:3])
-        if len(keyword_placement['missing_keywords']) > 3:
-            missing_kw_str += f" and {len(keyword_placement['missing_keywords']) - 3} more"
-        seo_analysis['recommendations'].append(f"Consider including these keywords in your title or bullets: {missing_kw_str}")
-    
-    low_density_kw = [k for k, v in density_analysis.items() if v['percentage'] < 0.5]
-    if low_density_kw and len(low_density_kw) <= 3:
-        seo_analysis['recommendations'].append(f"Increase the usage of these keywords: {', '.join(low_density_kw)}")
+    # Perform SEO, AEO and psychological analysis on the generated content
+    with metrics.SEO_ANALYSIS.time():
+        analysis = seo_analysis.analyze_listing(product_name, title, bullets, description, keywords)
     
-    high_density_kw = [k for k, v in density_analysis.items() if v['percentage'] > 2.5]
-    if high_density_kw and len(high_density_kw) <= 3:
-        seo_analysis['recommendations'].append(f"Reduce the frequency of these keywords to avoid keyword stuffing: {', '.join(high_density_kw)}")
-    
-    # Store the generated listing in the database
-    try:
-        with app.app_context():
-            # Create new listing
-            new_listing = Listing(
-                product_name=product_name,
-                category=category,
-                title=title,
-                description=template["description"],
-                keywords=keywords_str
-            )
-            db.session.add(new_listing)
-            db.session.flush()  # Get the ID without committing
-            
-            # Add bullet points
-            for i, bullet_text in enumerate(bullets):
-                bullet = BulletPoint(
-                    listing_id=new_listing.id,
-                    bullet_text=bullet_text,
-                    position=i
-                )
-                db.session.add(bullet)
-            
-            # Add competitor URLs
-            for i, competitor in enumerate(competitor_urls):
-                comp_url = CompetitorURL(
-                    listing_id=new_listing.id,
-                    url=competitor["url"],
-                    title=competitor["title"],
-                    position=i
-                )
-                db.session.add(comp_url)
-                
-            db.session.commit()
-            logger.debug(f"Stored listing in database with ID: {new_listing.id}")
-    except Exception as e:
-        logger.error(f"Error storing listing in database: {str(e)}")
-        # Continue anyway - this is just for storage, not critical for response
+    # Queue the generated listing for storage - not critical for the response,
+    # so the database write happens on the write-behind worker
+    with tracing.span("persistence"):
+        listing_writer.put(persistence.listing_record(
+            product_name, category, title, description,
+            keywords_str, bullets, competitor_urls
+        ))
     
     return {
         "title": title,
         "bullets": bullets,
-        "description": template["description"],
+        "description": description,
         "keywords": keywords,
         "competitor_urls": competitor_urls,
-        "seo_analysis": seo_analysis,
-        "aeo_analysis": aeo_analysis,
-        "psychological_techniques": psych_techniques
+        "seo_analysis": analysis["seo_analysis"],
+        "aeo_analysis": analysis["aeo_analysis"],
+        "psychological_techniques": analysis["psychological_techniques"]
     }
 
 @app.route('/api/generate-listing', methods=['POST'])
 def generate_listing():
     """Generate Amazon product listing using OpenAI GPT model."""
     try:
-        # Get request data from the frontend
-        data = request.json
-        logger.debug(f"Received request data: {data}")
-        
-        # Validate input data
-        if not data or not all(key in data for key in ['product_name', 'category', 'features']):
-            return jsonify({"detail": "Missing required fields"}), 400
-        
-        # Check for optional parameters
-        target_keywords = data.get('keywords', None)
-        competitor_urls = data.get('competitor_urls', None)
+        with tracing.span("validation"):
+            # Get request data from the frontend
+            data = request.json
+            logger.debug("Received request data: %s", structured_logging.payload(data))
+            
+            # Validate input data
+            if not data or not all(key in data for key in ['product_name', 'category', 'features']):
+                return jsonify({"detail": "Missing required fields"}), 400
+            
+            # Check for optional parameters
+            target_keywords = data.get('keywords', None)
+            competitor_urls = data.get('competitor_urls', None)
+            try:
+                # Sections the model writes; the other analyses are computed locally
+                sections = openai_utils.listing_sections(data.get('sections'))
+            except ValueError as e:
+                return jsonify({"detail": str(e)}), 400
         
         # Determine which generator to use - default to OpenAI
         use_openai = True
         
         try:
-            # Import only if we need it
             if use_openai:
-                import openai_utils
-                
                 # Generate the listing using OpenAI
                 result = openai_utils.generate_amazon_listing(
                     data['product_name'],
                     data['category'],
                     data['features'],
-                    target_keywords=target_keywords
+                    target_keywords=target_keywords,
+                    sections=sections
                 )
+                with tracing.span("persistence"):
+                    listing_writer.put(persistence.listing_record(
+                        data['product_name'],
+                        data['category'],
+                        result.get('title', ''),
+                        result.get('description', ''),
+                        result.get('keywords'),
+                        result.get('bullets'),
+                        competitor_urls
+                    ))
             else:
                 # Fallback to template-based approach if OpenAI fails
                 result = generate_amazon_listing(
                     data['product_name'],
                     data['category'],
                     data['features'],
-                    target_keywords=target_keywords
+                    target_keywords=target_keywords,
+                    competitor_urls=competitor_urls
                 )
+        except CircuitOpenError:
+            # The LLM is failing: serve the template without waiting for it
+            logger.warning("LLM circuit open, serving template listing")
+            _CIRCUIT_FALLBACKS.inc()
+            tracing.annotate(fallback="circuit_open")
+            result = generate_amazon_listing(
+                data['product_name'],
+                data['category'],
+                data['features'],
+                target_keywords=target_keywords,
+                competitor_urls=competitor_urls
+            )
         except Exception as generation_error:
-            logger.error(f"Error with OpenAI generation: {str(generation_error)}. Falling back to template.")
+            logger.error("Error with OpenAI generation: %s. Falling back to template.", generation_error)
+            _ERROR_FALLBACKS.inc()
+            tracing.annotate(fallback="llm_error", error=str(generation_error))
             # Fallback to template-based approach
             result = generate_amazon_listing(
                 data['product_name'],
                 data['category'],
                 data['features'],
-                target_keywords=target_keywords
+                target_keywords=target_keywords,
+                competitor_urls=competitor_urls
             )
         
         # Replace generated competitor URLs with user-provided ones if available
         if competitor_urls and isinstance(competitor_urls, list) and len(competitor_urls) > 0:
             result['competitor_urls'] = competitor_urls
         
-        logger.debug(f"Successfully generated listing for: {data['product_name']}")
-        return jsonify(result)
+        logger.debug("Successfully generated listing for: %s", data['product_name'])
+        with metrics.SERIALIZATION.time():
+            return jsonify(result)
     
     except Exception as e:
-        logger.error(f"Error generating listing: {str(e)}")
+        logger.error("Error generating listing: %s", e)
         return jsonify({"detail": f"Failed to generate listing: {str(e)}"}), 500
 
 @app.route('/api/analyze-competitors', methods=['POST'])
@@ -611,7 +271,7 @@ def analyze_competitors():
     try:
         # Get request data
         data = request.json
-        logger.debug(f"Received competitor analysis request: {data}")
+        logger.debug("Received competitor analysis request: %s", structured_logging.payload(data))
         
         # Validate input data
         if not data or not all(key in data for key in ['product_name', 'category', 'competitor_urls']):
@@ -621,22 +281,28 @@ def analyze_competitors():
         competitor_urls = data.get('competitor_urls', [])
         if not competitor_urls or len(competitor_urls) == 0:
             return jsonify({"detail": "No competitor URLs provided"}), 400
+        if len(competitor_pages.competitor_urls(competitor_urls)) > competitor_pages.fetcher.max_urls:
+            return jsonify({"detail": f"At most {competitor_pages.fetcher.max_urls} competitor URLs per request"}), 400
         
-        # Import OpenAI utils
         try:
-            import openai_utils
-            
-            # Extract competitor titles if they exist
-            competitor_titles = []
+            # Read the competitor pages (title, bullets, description);
+            # entries whose page cannot be read fall back to their title
+            urls = competitor_pages.competitor_urls(competitor_urls)
+            pages = {page['url']: page for page in competitor_pages.fetcher.fetch_pages_sync(urls)
+                     if 'error' not in page} if urls else {}
+            competitors = []
             for comp in competitor_urls:
-                if isinstance(comp, dict) and 'title' in comp and comp['title']:
-                    competitor_titles.append(comp['title'])
+                url = comp.get('url') if isinstance(comp, dict) else comp
+                if isinstance(url, str) and url.strip() in pages:
+                    competitors.append(pages[url.strip()])
+                elif isinstance(comp, dict) and 'title' in comp and comp['title']:
+                    competitors.append(comp['title'])
                 elif isinstance(comp, str):
-                    competitor_titles.append(comp)
+                    competitors.append(comp)
             
             # Analyze the competitors
             analysis = openai_utils.analyze_competitive_listings(
-                competitor_titles,
+                competitors,
                 data['product_name'],
                 data['category']
             )
@@ -647,13 +313,134 @@ def analyze_competitors():
                 return jsonify({"detail": "Could not analyze competitors"}), 500
                 
         except Exception as e:
-            logger.error(f"Error analyzing competitors: {str(e)}")
+            logger.error("Error analyzing competitors: %s", e)
             return jsonify({"detail": f"Failed to analyze competitors: {str(e)}"}), 500
     
     except Exception as e:
-        logger.error(f"Error in competitor analysis endpoint: {str(e)}")
+        logger.error("Error in competitor analysis endpoint: %s", e)
         return jsonify({"detail": f"Error in competitor analysis: {str(e)}"}), 500
 
+@app.route('/api/seo/score', methods=['POST'])
+def score_listings():
+    """Score existing listings with the local SEO analyzers (no LLM call)."""
+    try:
+        data = request.json
+        listings = data.get('listings') if isinstance(data, dict) else data
+        if not isinstance(listings, list) or len(listings) == 0:
+            return jsonify({"detail": "Expected a non-empty list of listings"}), 400
+        if len(listings) > SEO_SCORE_MAX_LISTINGS:
+            return jsonify({"detail": f"At most {SEO_SCORE_MAX_LISTINGS} listings per request"}), 400
+
+        # Small requests are cheaper to score in-process than to ship to the pool
+        workers = 1 if len(listings) < SEO_SCORE_POOL_THRESHOLD else SEO_SCORE_WORKERS
+        results = list(seo_scoring.score_listings(listings, workers=workers))
+        return jsonify({"results": results})
+
+    except Exception as e:
+        logger.error("Error scoring listings: %s", e)
+        return jsonify({"detail": f"Failed to score listings: {str(e)}"}), 500
+
+@app.route('/api/listings', methods=['GET'])
+def list_listings():
+    """
+    Page through stored listings, newest first.
+
+    Query parameters: category, product_name (prefix), created_from and
+    created_to (ISO dates), cursor (next_cursor of the previous page) and
+    limit.
+    """
+    try:
+        args = request.args
+        try:
+            created_from = datetime.fromisoformat(args['created_from']) if args.get('created_from') else None
+            created_to = datetime.fromisoformat(args['created_to']) if args.get('created_to') else None
+            limit = int(args.get('limit', history.DEFAULT_PAGE_SIZE))
+            listings, next_cursor = history.query_listings(
+                db.session,
+                category=args.get('category'),
+                product_prefix=args.get('product_name'),
+                created_from=created_from,
+                created_to=created_to,
+                cursor=args.get('cursor'),
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({"detail": str(e)}), 400
+
+        return jsonify({
+            "listings": [history.serialize_listing(listing) for listing in listings],
+            "next_cursor": next_cursor
+        })
+
+    except Exception as e:
+        logger.error("Error listing stored listings: %s", e)
+        return jsonify({"detail": f"Failed to list listings: {str(e)}"}), 500
+
+@app.route('/api/listings/search', methods=['GET'])
+def search_stored_listings():
+    """
+    Full-text search of stored listings, best match first.
+
+    Query parameters: q (words that must all appear in the title, keywords,
+    bullets or description), category, limit and offset.
+    """
+    try:
+        args = request.args
+        try:
+            results = search.search_listings(
+                db.session,
+                args.get('q', ''),
+                category=args.get('category'),
+                limit=int(args.get('limit', search.DEFAULT_RESULTS)),
+                offset=int(args.get('offset', 0))
+            )
+        except ValueError as e:
+            return jsonify({"detail": str(e)}), 400
+
+        return jsonify({
+            "results": [dict(history.serialize_listing(listing), score=round(score, 6))
+                        for listing, score in results]
+        })
+
+    except Exception as e:
+        logger.error("Error searching listings: %s", e)
+        return jsonify({"detail": f"Failed to search listings: {str(e)}"}), 500
+
+@app.route('/api/write-behind/stats', methods=['GET'])
+def write_behind_stats():
+    """Report listing storage queue depth and throughput counters."""
+    return jsonify(listing_writer.stats())
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Report listing cache counters and prompt token / prompt-cache figures."""
+    try:
+        stats = openai_utils.listing_cache.stats()
+        stats["semantic"] = openai_utils.semantic_cache.stats()
+        stats["prompts"] = openai_utils.prompt_registry.stats()
+        return jsonify(stats)
+    except Exception as e:
+        logger.error("Error reading cache stats: %s", e)
+        return jsonify({"detail": f"Failed to read cache stats: {str(e)}"}), 500
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_stats():
+    """
+    Report LLM backend health and latency, circuit breaker state, transport
+    retry counters and how many generate calls were coalesced.
+    """
+    return jsonify({
+        "router": openai_utils.router.stats(),
+        "circuit": openai_utils.llm_breaker.stats(),
+        "transport": openai_utils.transport.stats(),
+        "coalescing": openai_utils.listing_flight.stats()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics: pipeline stage timings, tokens, caches, fallbacks, requests."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,134 @@
+"""
+Concurrent throughput of /api/generate-listing: async client vs blocking call.
+
+Starts the stub LLM server, then serves two FastAPI apps with uvicorn:
+
+* ``async``    - main.app, which awaits the shared AsyncOpenAI client
+* ``blocking`` - the previous behaviour, a synchronous client call inside
+                 an ``async def`` route that stalls the event loop
+
+Each app receives N concurrent generate requests while a probe measures the
+latency of a static file on the same worker.
+
+Usage:
+    python benchmarks/bench_async_generate.py --concurrency 20 --latency 0.5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+PAYLOAD = {
+    "title": "Ultra Quiet Air Purifier",
+    "category": "Home & Kitchen",
+    "features": ["HEPA filtration", "25dB operation", "500 sq ft coverage"],
+    "keywords": "air purifier, hepa",
+    "competitor_urls": []
+}
+
+
+def _blocking_app():
+    """Replica of the old route: sync OpenAI call inside an async handler."""
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+    from fastapi.staticfiles import StaticFiles
+    import openai_utils
+
+    app = FastAPI()
+
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+
+    @app.post("/api/generate-listing")
+    async def generate_listing():
+        response = openai_utils.client.chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": "listing"}],
+            temperature=0.7,
+            max_tokens=800
+        )
+        return JSONResponse(content={"listing": response.choices[0].message.content})
+
+    return app
+
+
+def _serve(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+async def _drive(base_url, concurrency):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as http:
+        async def generate():
+            started = time.perf_counter()
+            response = await http.post("/api/generate-listing", json=PAYLOAD)
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        async def probe():
+            # Give the generate requests a head start, then time a static file
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            await http.get("/static/css/styles.css")
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(probe(), *(generate() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed": elapsed,
+        "throughput": concurrency / elapsed,
+        "p50": statistics.median(results[1:]),
+        "probe": results[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM seconds per call")
+    parser.add_argument("--port", type=int, default=8911)
+    args = parser.parse_args()
+
+    # Per-request INFO logs from the app and httpx would dominate the output
+    logging.disable(logging.INFO)
+
+    with StubLLMServer(latency=args.latency) as stub:
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ["LLM_BACKENDS"] = "openai:gpt-4o"
+
+        import main as fastapi_main
+
+        print(f"{'mode':<10}{'requests':>10}{'elapsed s':>12}{'req/s':>10}{'p50 s':>10}{'static s':>10}")
+        for mode, app in (("blocking", _blocking_app()), ("async", fastapi_main.app)):
+            server, thread = _serve(app, args.port)
+            try:
+                result = asyncio.run(_drive(f"http://127.0.0.1:{args.port}", args.concurrency))
+            finally:
+                server.should_exit = True
+                thread.join()
+            print(f"{mode:<10}{args.concurrency:>10}{result['elapsed']:>12.2f}"
+                  f"{result['throughput']:>10.1f}{result['p50']:>10.2f}{result['probe']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
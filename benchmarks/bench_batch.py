@@ -0,0 +1,76 @@
+"""
+Throughput of POST /api/generate-listings/batch against the stub LLM server.
+
+Compares a batch request with the same items sent one at a time, and shows
+how close the batch gets to the configured LLM_REQUESTS_PER_MINUTE.
+
+Usage:
+    python benchmarks/bench_batch.py --items 200 --latency 0.5 --rpm 1200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+ITEM = {
+    "title": "Ultra Quiet Air Purifier",
+    "category": "Home & Kitchen",
+    "features": ["HEPA filtration", "25dB operation"],
+    "keywords": "air purifier"
+}
+
+
+async def _run(app, items, sequential_items):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as http:
+        started = time.perf_counter()
+        for _ in range(sequential_items):
+            (await http.post("/api/generate-listing", json=ITEM)).raise_for_status()
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await http.post("/api/generate-listings/batch", json=[ITEM] * items)
+        response.raise_for_status()
+        batch = time.perf_counter() - started
+        return sequential, batch, response.json()["failed"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--sequential-items", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM seconds per call")
+    parser.add_argument("--rpm", type=float, default=1200, help="LLM_REQUESTS_PER_MINUTE")
+    parser.add_argument("--concurrency", type=int, default=16, help="BATCH_CONCURRENCY")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    with StubLLMServer(latency=args.latency) as stub:
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ["LLM_BACKENDS"] = "openai:gpt-4o"
+        os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.rpm)
+        os.environ["BATCH_CONCURRENCY"] = str(args.concurrency)
+
+        import main as fastapi_main
+
+        sequential, batch, failed = asyncio.run(_run(fastapi_main.app, args.items, args.sequential_items))
+
+    ceiling = min(args.rpm / 60.0, args.concurrency / args.latency)
+    print(f"one-at-a-time : {args.sequential_items / sequential:8.1f} req/s")
+    print(f"batch         : {args.items / batch:8.1f} req/s ({failed} failed)")
+    print(f"ceiling       : {ceiling:8.1f} req/s (min of rate limit and concurrency/latency)")
+
+
+if __name__ == "__main__":
+    main()
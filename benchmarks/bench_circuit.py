@@ -0,0 +1,100 @@
+"""
+Response times of app1's /api/generate-listing through an LLM outage, with
+and without the circuit breaker.
+
+The stub LLM server answers normally, then stalls every request for 60 s
+(an outage; the transport deadline is --deadline seconds), then recovers.
+Requests are sent one after another through the Flask test client in three
+phases:
+
+- "healthy": --healthy requests, answered by the LLM;
+- "outage": --outage requests; without the breaker each waits for the
+  deadline before the template fallback, with it only the first
+  CIRCUIT_FAILURE_THRESHOLD do;
+- "recovered": the stub is fixed, the benchmark waits --reset-timeout and
+  sends --healthy requests; the first is the half-open probe that closes the
+  breaker.
+
+"no breaker" uses a failure threshold no outage reaches.
+
+Usage:
+    python benchmarks/bench_circuit.py --outage 20 --deadline 2 --reset-timeout 3
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import STUB_LISTING, StubLLMServer  # noqa: E402
+
+FEATURES = ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft"]
+
+
+def _phase(client, count):
+    samples = []
+    templates = 0
+    for i in range(count):
+        payload = {"product_name": f"Air Purifier {time.perf_counter_ns()}", "category": "Home & Kitchen",
+                   "features": FEATURES}
+        started = time.perf_counter()
+        response = client.post("/api/generate-listing", json=payload)
+        samples.append((time.perf_counter() - started) * 1000)
+        templates += response.get_json()["title"] != STUB_LISTING["title"]
+    return samples, templates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--healthy", type=int, default=10)
+    parser.add_argument("--outage", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency in seconds")
+    parser.add_argument("--deadline", type=float, default=2.0, help="LLM deadline in seconds")
+    parser.add_argument("--threshold", type=int, default=5, help="breaker failure threshold")
+    parser.add_argument("--reset-timeout", type=float, default=3.0, help="breaker open time in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ["LLM_BACKENDS"] = "openai:gpt-4o"
+        os.environ["LLM_DEADLINE"] = str(args.deadline)
+        os.environ["LISTING_CACHE_SIZE"] = "0"
+        os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+        os.environ["CIRCUIT_RESET_TIMEOUT"] = str(args.reset_timeout)
+        import app1
+        import openai_utils
+        logging.disable(logging.CRITICAL)
+
+        print(f"{'setup':<12}{'phase':<11}{'requests':>9}{'p50':>10}{'max':>10}{'templates':>11}")
+        for label, threshold in (("no breaker", 10 ** 9), ("breaker", args.threshold)):
+            with StubLLMServer(latency=args.latency) as stub:
+                # Point the shared clients at this run's stub
+                os.environ["OPENAI_BASE_URL"] = stub.base_url
+                openai_utils.router = openai_utils.Router.from_env()
+                openai_utils.llm_breaker = openai_utils.CircuitBreaker.from_env("llm")
+                openai_utils.llm_breaker.failure_threshold = threshold
+                client = app1.app.test_client()
+
+                phases = [("healthy", args.healthy, None), ("outage", args.outage, 1.0),
+                          ("recovered", args.healthy, 0.0)]
+                for phase, count, slow_rate in phases:
+                    if slow_rate is not None:
+                        stub.set_faults(slow_rate=slow_rate, slow_latency=60.0)
+                    if phase == "recovered":
+                        time.sleep(args.reset_timeout)
+                    samples, templates = _phase(client, count)
+                    print(f"{label:<12}{phase:<11}{count:>9}{statistics.median(samples):>7.0f} ms"
+                          f"{max(samples):>7.0f} ms{templates:>11}")
+                stats = openai_utils.llm_breaker.stats()
+                print(f"{'':<12}breaker: opened {stats['opened']}x, closed {stats['closed']}x, "
+                      f"short-circuited {stats['short_circuited']}, state {stats['state']}")
+        app1.listing_writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Competitor page ingestion: sequential fetch-and-parse vs competitor_pages.
+
+Serves the saved pages in benchmarks/fixtures/pages through the local
+fixture server (--latency seconds per response, like a remote site) and
+ingests --pages distinct competitor URLs:
+
+- "sequential": requests.get then parse, one URL after the other, the
+  straightforward way to do it;
+- "cold": CompetitorFetcher with an empty cache (concurrent fetches,
+  parsing in the process pool);
+- "warm": the same URLs again within the TTL, served from the cache;
+- "revalidate": the same URLs after the TTL, revalidated with ETags (304s).
+
+Every run must return the same pages.
+
+Usage:
+    python benchmarks/bench_competitor_pages.py --pages 24 --latency 0.3 --concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_fixture_server import PageFixtureServer  # noqa: E402
+
+import competitor_pages  # noqa: E402
+
+
+def _sequential(urls):
+    import requests
+
+    pages = []
+    with requests.Session() as session:
+        for url in urls:
+            response = session.get(url, timeout=10)
+            response.raise_for_status()
+            pages.append(competitor_pages.extract_page(response.text, url))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.3, help="fixture server seconds per response")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="extraction processes")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    # The fixture server listens on loopback, which the fetcher refuses
+    competitor_pages.is_public_address = lambda address: True
+
+    with PageFixtureServer(latency=args.latency) as server:
+        urls = server.urls(args.pages)
+        fetcher = competitor_pages.CompetitorFetcher(concurrency=args.concurrency, workers=args.workers,
+                                                     max_urls=args.pages)
+
+        async def pipeline():
+            pages = await fetcher.fetch_pages(urls)
+            await fetcher.aclose()
+            return pages
+
+        def revalidate():
+            fetcher.cache.ttl = 0
+            return asyncio.run(pipeline())
+
+        runs = (("sequential", lambda: _sequential(urls)), ("cold", lambda: asyncio.run(pipeline())),
+                ("warm", lambda: asyncio.run(pipeline())), ("revalidate", revalidate))
+        print(f"{'run':<12}{'pages':>7}{'elapsed':>11}{'requests':>10}{'304s':>7}{'errors':>8}")
+        expected = None
+        for label, run in runs:
+            requests_before, not_modified_before = server.requests, server.not_modified
+            started = time.perf_counter()
+            pages = run()
+            elapsed = time.perf_counter() - started
+            expected = expected or pages
+            if pages != expected:
+                raise AssertionError(f"{label} returned different pages")
+            errors = sum(1 for page in pages if "error" in page)
+            print(f"{label:<12}{len(pages):>7}{elapsed * 1000:>8.0f} ms{server.requests - requests_before:>10}"
+                  f"{server.not_modified - not_modified_before:>7}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
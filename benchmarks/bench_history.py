@@ -0,0 +1,144 @@
+"""
+Listing history query latency: keyset pagination vs OFFSET on a seeded table.
+
+Seeds --rows listings (1,000,000 by default, spread over --categories
+categories and one year of created_at) with Core bulk inserts, optionally
+with --bullets bullet points each, then times:
+
+- the first page and a page --depth rows deep, with history.query_listings
+  (keyset) and with the equivalent ORDER BY id DESC LIMIT/OFFSET query
+- category, product_name prefix and date range filtered first pages
+
+SQLite is always measured (a temporary file, kept with --keep); pass
+--postgres-url (or set BENCH_POSTGRES_URL) to also measure a local Postgres.
+The benchmark creates and drops the listing tables in that database.
+
+Usage:
+    python benchmarks/bench_history.py --rows 1000000 --depth 900000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session, selectinload  # noqa: E402
+
+import history  # noqa: E402
+from models import Base, BulletPoint, Listing, create_indexes  # noqa: E402
+
+SEED_BATCH = 10000
+START = datetime(2025, 1, 1)
+
+
+def _seed(engine, rows, categories, bullets, seed=7):
+    rng = random.Random(seed)
+    names = ["Air Purifier", "Yoga Mat", "Coffee Grinder", "Desk Lamp", "Water Bottle", "Backpack"]
+    step = timedelta(days=365) / rows
+    with engine.begin() as conn:
+        for start in range(0, rows, SEED_BATCH):
+            count = min(SEED_BATCH, rows - start)
+            conn.execute(insert(Listing), [{
+                "id": i + 1,
+                "product_name": f"{rng.choice(names)} {i}",
+                "category": f"Category {rng.randrange(categories)}",
+                "title": f"Listing {i} - Premium Quality",
+                "description": "Transform your living space with this product.",
+                "keywords": "premium, quality",
+                # Ids follow created_at, as with the server default
+                "created_at": START + step * i
+            } for i in range(start, start + count)])
+            if bullets:
+                conn.execute(insert(BulletPoint), [{
+                    "listing_id": i + 1,
+                    "bullet_text": f"BULLET {n}: Enjoy enhanced performance.",
+                    "position": n
+                } for i in range(start, start + count) for n in range(bullets)])
+
+
+def _offset_page(session, offset, limit):
+    stmt = select(Listing).options(selectinload(Listing.bullet_points),
+                                   selectinload(Listing.competitor_urls))
+    return session.scalars(stmt.order_by(Listing.id.desc()).offset(offset).limit(limit)).all()
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _measure(url, args):
+    engine = create_engine(url)
+    try:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        create_indexes(engine)
+        started = time.perf_counter()
+        _seed(engine, args.rows, args.categories, args.bullets)
+        print(f"  seeded {args.rows} listings in {time.perf_counter() - started:.1f}s")
+
+        depth = min(args.depth, max(args.rows - args.limit, 0))
+        deep_cursor = history.encode_cursor(args.rows - depth + 1)
+        mid = START + timedelta(days=180)
+
+        with Session(engine) as session:
+            cases = [
+                ("keyset first page", lambda: history.query_listings(session, limit=args.limit)),
+                (f"keyset page at {depth}",
+                 lambda: history.query_listings(session, cursor=deep_cursor, limit=args.limit)),
+                ("offset first page", lambda: _offset_page(session, 0, args.limit)),
+                (f"offset page at {depth}", lambda: _offset_page(session, depth, args.limit)),
+                ("category filter", lambda: history.query_listings(
+                    session, category="Category 3", limit=args.limit)),
+                ("category, deep cursor", lambda: history.query_listings(
+                    session, category="Category 3", cursor=deep_cursor, limit=args.limit)),
+                ("product_name prefix", lambda: history.query_listings(
+                    session, product_prefix="Yoga Mat 12", limit=args.limit)),
+                ("date range (1 day)", lambda: history.query_listings(
+                    session, created_from=mid, created_to=mid + timedelta(days=1), limit=args.limit)),
+            ]
+            for name, fn in cases:
+                # Warm the page cache and the statement cache first
+                fn()
+                session.expunge_all()
+                print(f"  {name:<28}{_time(lambda: (fn(), session.expunge_all()), args.repeat):>10.2f} ms")
+        if not args.keep:
+            Base.metadata.drop_all(engine)
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--depth", type=int, default=900000, help="rows skipped for the deep page")
+    parser.add_argument("--limit", type=int, default=history.DEFAULT_PAGE_SIZE)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--bullets", type=int, default=0, help="bullet points seeded per listing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded tables")
+    parser.add_argument("--postgres-url", default=os.environ.get("BENCH_POSTGRES_URL"))
+    args = parser.parse_args()
+
+    targets = [("sqlite", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'history.db')}")]
+    if args.postgres_url:
+        targets.append(("postgres", args.postgres_url))
+
+    print(f"{'query':<30}{'median':>10}")
+    for name, url in targets:
+        print(f"{name}:")
+        _measure(url, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+End-to-end latency and token usage: hybrid pipeline vs all-LLM listings.
+
+Requests go through app1's POST /api/generate-listing (Flask test client, a
+temporary SQLite database) with openai_utils pointed at the stub LLM server.
+"hybrid" is the default pipeline (the model writes the copy, seo_analysis /
+aeo_analysis / psychological_techniques are computed locally); "all-LLM"
+sends "sections" with every section, as every request did before. Caching is
+disabled so each request reaches the stub. The stub takes --latency plus
+--token-delay per output token, so latency follows the output size.
+
+Also checks that the local analysis reports the exact title length of the
+returned title, which the model-written analysis only estimates.
+
+Usage:
+    python benchmarks/bench_hybrid.py --requests 20 --latency 0.3 --token-delay 0.0005
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+FEATURES = ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft",
+            "Smart app control", "Washable pre-filter"]
+KEYWORDS = ["air purifier", "hepa filter", "quiet"]
+MODES = (("hybrid", None), ("all-LLM", "all"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub LLM latency in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.0005,
+                        help="stub seconds per output token")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubLLMServer(latency=args.latency, token_delay=args.token_delay) as stub:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ["LLM_BACKENDS"] = "openai:gpt-4o"
+        os.environ["LISTING_CACHE_SIZE"] = "0"
+        os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+        import app1
+        import openai_utils
+        import prompts
+        logging.disable(logging.INFO)
+
+        client = app1.app.test_client()
+
+        print(f"{'pipeline':<10}{'p50 latency':>13}{'mean latency':>14}{'prompt tokens':>15}"
+              f"{'completion tokens':>19}")
+        for label, sections in MODES:
+            if sections == "all":
+                sections = list(prompts.LISTING_SECTIONS)
+            name = prompts.listing_prompt(openai_utils.listing_sections(sections)).name
+            before = dict(prompts.registry.stats().get(name, {}))
+            calls_before = stub.completions
+            samples = []
+            for i in range(args.requests):
+                payload = {"product_name": f"Air Purifier {i}", "category": "Home & Kitchen",
+                           "features": FEATURES, "keywords": KEYWORDS}
+                if sections is not None:
+                    payload["sections"] = sections
+                started = time.perf_counter()
+                response = client.post("/api/generate-listing", json=payload)
+                samples.append((time.perf_counter() - started) * 1000)
+                listing = response.get_json()
+                assert response.status_code == 200, listing
+            assert stub.completions - calls_before == args.requests, "requests fell back to templates"
+            after = prompts.registry.stats()[name]
+            prompt_tokens = after["prompt_tokens"] - before.get("prompt_tokens", 0)
+            completion_tokens = after["completion_tokens"] - before.get("completion_tokens", 0)
+            print(f"{label:<10}{statistics.median(samples):>10.1f} ms{statistics.mean(samples):>11.1f} ms"
+                  f"{prompt_tokens / args.requests:>15.0f}{completion_tokens / args.requests:>19.0f}")
+            title_analysis = listing["seo_analysis"]["title_analysis"]
+            print(f"{'':<10}title length {len(listing['title'])}, "
+                  f"reported {title_analysis['character_count']}")
+        app1.listing_writer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Cost of logging per call and per request, synchronous stream vs queued and sampled.
+
+First times single log calls of a request-sized payload: a disabled DEBUG
+call written as an f-string (formatted anyway) and lazily through
+structured_logging.payload(), an enabled call through a synchronous
+StreamHandler (what logging.basicConfig installs) and through the queue
+handler, and a call of a request that was sampled out; then sync and
+queued calls again with every write stalled for --stall seconds, as when
+stderr is a pipe to a slow log collector. Then --requests
+template listings go through app1's /api/generate-listing (circuit forced
+open, so no LLM is involved) with DEBUG logging to a synchronous stream,
+DEBUG through the queue, DEBUG with every request sampled out, the default
+INFO level, and logging disabled; the setups take turns for --rounds
+rounds and the best round of each counts. All output goes to a temporary
+file.
+
+Queued timings are given twice: on the calling thread only, and including
+the time the listener needs to write the queue out. On a single core the
+listener competes with the requests, so the second figure is the one that
+counts there; with spare cores the first is what a request waits for.
+
+Usage:
+    python benchmarks/bench_logging.py --calls 200000 --requests 1000 --rounds 3
+"""
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import structured_logging  # noqa: E402
+
+PAYLOAD = {"product_name": "AeroPure Air Purifier", "category": "Home & Kitchen",
+           "features": ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft",
+                        "Smart air quality sensor", "Energy efficient motor"],
+           "keywords": ["air purifier", "hepa filter", "quiet", "bedroom", "allergies"],
+           "competitor_urls": [f"https://www.amazon.com/dp/B0{n:08d}" for n in range(10)]}
+
+
+def _per_call(fn, calls, records=None):
+    """Return (seconds per call, seconds per call once ``records`` is written out)."""
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    elapsed = time.perf_counter() - started
+    if records is not None:
+        records.join()
+    return elapsed / calls, (time.perf_counter() - started) / calls
+
+
+class _StalledStream:
+    """File wrapper whose writes take ``stall`` seconds longer."""
+
+    def __init__(self, stream, stall):
+        self.stream = stream
+        self.stall = stall
+
+    def write(self, text):
+        time.sleep(self.stall)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _bench_logger(name, handler, level):
+    bench_logger = logging.getLogger(f"bench.{name}")
+    bench_logger.handlers = [handler]
+    bench_logger.propagate = False
+    bench_logger.setLevel(level)
+    return bench_logger
+
+
+def _calls(calls, stall, log_path):
+    data = PAYLOAD
+    with open(log_path, "a", encoding="utf-8") as stream:
+        sync_handler = logging.StreamHandler(stream)
+        sync_handler.setFormatter(logging.Formatter(structured_logging.TEXT_FORMAT.replace(
+            " [%(request_id)s]", "")))
+        records = queue.Queue(maxsize=structured_logging.DEFAULT_QUEUE_SIZE)
+        queue_handler = structured_logging.QueueHandler(records)
+        queue_handler.addFilter(structured_logging.SamplingFilter())
+        file_handler = logging.StreamHandler(stream)
+        file_handler.setFormatter(structured_logging.JSONFormatter())
+        listener = logging.handlers.QueueListener(records, file_handler)
+        listener.start()
+        stalled = _StalledStream(stream, stall)
+        stalled_sync_handler = logging.StreamHandler(stalled)
+        stalled_sync_handler.setFormatter(sync_handler.formatter)
+        stalled_records = queue.Queue(maxsize=structured_logging.DEFAULT_QUEUE_SIZE)
+        stalled_queue_handler = structured_logging.QueueHandler(stalled_records)
+        stalled_file_handler = logging.StreamHandler(stalled)
+        stalled_file_handler.setFormatter(structured_logging.JSONFormatter())
+        stalled_listener = logging.handlers.QueueListener(stalled_records, stalled_file_handler)
+        stalled_listener.start()
+
+        disabled = _bench_logger("disabled", sync_handler, logging.INFO)
+        sync = _bench_logger("sync", sync_handler, logging.DEBUG)
+        queued = _bench_logger("queued", queue_handler, logging.DEBUG)
+        stalled_sync = _bench_logger("stalled_sync", stalled_sync_handler, logging.DEBUG)
+        stalled_queued = _bench_logger("stalled_queued", stalled_queue_handler, logging.DEBUG)
+        sampler = structured_logging.Sampler(default_rate=0.0)
+
+        def sampled_out():
+            queued.debug("Received request data: %s", structured_logging.payload(data))
+
+        cases = [
+            ("disabled, f-string", lambda: disabled.debug(f"Received request data: {data}"), None),
+            ("disabled, lazy payload()", lambda: disabled.debug("Received request data: %s",
+                                                                 structured_logging.payload(data)), None),
+            ("sync stream, f-string", lambda: sync.debug(f"Received request data: {data}"), None),
+            ("queued, lazy payload()", lambda: queued.debug("Received request data: %s",
+                                                             structured_logging.payload(data)), records),
+        ]
+        try:
+            rows = [(name, _per_call(fn, calls, drain)) for name, fn, drain in cases]
+            saved = structured_logging.sampler
+            structured_logging.sampler = sampler
+            token = structured_logging.start_request("/api/generate-listing")
+            try:
+                rows.append(("queued, request sampled out", _per_call(sampled_out, calls, records)))
+            finally:
+                structured_logging.end_request(token)
+                structured_logging.sampler = saved
+            # Fewer calls: every stalled write blocks its thread for ``stall``
+            stalled_calls = max(1, min(calls, int(0.5 / stall)) if stall > 0 else calls)
+            rows.append((f"sync stream, {stall * 1e6:.0f} us stall", _per_call(
+                lambda: stalled_sync.info("Received request data: %s", structured_logging.payload(data)),
+                stalled_calls)))
+            rows.append((f"queued, {stall * 1e6:.0f} us stall", _per_call(
+                lambda: stalled_queued.info("Received request data: %s", structured_logging.payload(data)),
+                stalled_calls, stalled_records)))
+        finally:
+            listener.stop()
+            stalled_listener.stop()
+    return rows
+
+
+def _flask_requests(requests, rounds, log_path):
+    # Logging is already configured to write to log_path
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["LISTING_CACHE_SIZE"] = "0"
+        os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        import app1
+        import openai_utils
+        from circuit_breaker import CircuitOpenError
+
+        def circuit_open(*args, **kwargs):
+            raise CircuitOpenError("llm")
+        openai_utils.generate_amazon_listing = circuit_open
+
+        client = app1.app.test_client()
+        root = logging.getLogger()
+        queued_handlers = root.handlers[:]
+        records = queued_handlers[0].queue
+        default_rate = structured_logging.sampler.default_rate
+
+        def run():
+            return _per_call(lambda: client.post("/api/generate-listing", json=PAYLOAD), requests, records)
+
+        with open(log_path, "a", encoding="utf-8") as stream:
+            sync_handler = logging.StreamHandler(stream)
+            sync_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+            setups = [
+                ("DEBUG, sync stream", [sync_handler], "DEBUG", 1.0),
+                ("DEBUG, queued", queued_handlers, "DEBUG", 1.0),
+                ("DEBUG, queued, sampled out", queued_handlers, "DEBUG", 0.0),
+                ("INFO, queued (default)", queued_handlers, "INFO", 1.0),
+                ("logging disabled", queued_handlers, None, 1.0),
+            ]
+            run()  # warm up
+            best = {}
+            try:
+                for _ in range(rounds):
+                    for name, handlers, level, rate in setups:
+                        root.handlers = handlers
+                        structured_logging.sampler.default_rate = rate
+                        if level is None:
+                            logging.disable(logging.CRITICAL)
+                        else:
+                            logging.disable(logging.NOTSET)
+                            root.setLevel(level)
+                        timing = run()
+                        if name not in best or timing[1] < best[name][1]:
+                            best[name] = timing
+            finally:
+                logging.disable(logging.NOTSET)
+                root.handlers = queued_handlers
+                structured_logging.sampler.default_rate = default_rate
+        app1.listing_writer.close()
+        structured_logging.shutdown()
+        return [(name, best[name]) for name, *_ in setups]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200_000, help="calls per log call variant")
+    parser.add_argument("--stall", type=float, default=0.0002, help="seconds added to each stalled write")
+    parser.add_argument("--requests", type=int, default=1000, help="app1 template requests per round")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds per app1 setup; the best counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "bench.log")
+        # As app1 would at import, so every case runs with the same logging settings
+        structured_logging.configure(log_file=log_path)
+        print(f"{'log call':<32}{'us/call':>10}{'written':>10}")
+        for name, (seconds, written) in _calls(args.calls, args.stall, log_path):
+            print(f"{name:<32}{seconds * 1e6:>10.2f}{written * 1e6:>10.2f}")
+
+        rows = _flask_requests(args.requests, args.rounds, log_path)
+        baseline = rows[-1][1][1]
+        print(f"\n{'app1 template request':<32}{'us/request':>12}{'written':>10}{'logging':>10}")
+        for name, (seconds, written) in rows:
+            print(f"{name:<32}{seconds * 1e6:>12.0f}{written * 1e6:>10.0f}{(written - baseline) * 1e6:>+10.1f}")
+        print(f"\n{os.path.getsize(log_path) / 1024:.0f} KiB of logs written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Cost of the metrics hooks, per call and per request.
+
+Times each kind of hook the request path uses (counter increment, gauge
+in/out, histogram observe, stage timer context, token counting) with the
+label values bound once, as the apps do, and with a labels() lookup per
+call. Then renders /metrics after --series label combinations to show what
+a scrape costs. Finally, --requests template listings go through app1's
+/api/generate-listing (circuit forced open, so no LLM is involved) with
+the hooks as shipped and with every hook swapped for a no-op, to show the
+end-to-end difference.
+
+Usage:
+    python benchmarks/bench_metrics.py --calls 1000000 --requests 2000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+
+
+def _per_call(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls
+
+
+def _baseline(calls):
+    def noop():
+        pass
+    return _per_call(noop, calls)
+
+
+def _hooks(calls):
+    registry = metrics.Registry()
+    counter = metrics.Counter("bench_counter", "counter", ["cache", "result"], registry=registry)
+    gauge = metrics.Gauge("bench_gauge", "gauge", ["call"], registry=registry)
+    histogram = metrics.Histogram("bench_seconds", "histogram", ["stage"], registry=registry)
+    tokens = metrics.Counter("bench_tokens", "tokens", ["model", "kind"], registry=registry)
+    hit = counter.labels("exact", "hit")
+    in_flight = gauge.labels("listing")
+    stage = histogram.labels("json_parse")
+    usage = SimpleNamespace(prompt_tokens=300, completion_tokens=700,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=256))
+    metrics_tokens = metrics.LLM_TOKENS
+
+    def record_tokens():
+        metrics.LLM_TOKENS = tokens
+        metrics.record_tokens("gpt-4o", usage)
+
+    def timer():
+        with stage.time():
+            pass
+
+    def track():
+        with in_flight.track_inprogress():
+            pass
+
+    cases = [
+        ("counter.inc (bound)", hit.inc),
+        ("counter.labels().inc", lambda: counter.labels("exact", "hit").inc()),
+        ("gauge in/out (bound)", track),
+        ("histogram.observe (bound)", lambda: stage.observe(0.0042)),
+        ("histogram.labels().observe", lambda: histogram.labels("json_parse").observe(0.0042)),
+        ("stage timer context", timer),
+        ("record_tokens", record_tokens),
+    ]
+    try:
+        return [(name, _per_call(fn, calls)) for name, fn in cases]
+    finally:
+        metrics.LLM_TOKENS = metrics_tokens
+
+
+def _scrape(series):
+    registry = metrics.Registry()
+    histogram = metrics.Histogram("bench_request_seconds", "histogram", ["route", "status"],
+                                  registry=registry)
+    counter = metrics.Counter("bench_requests_total", "counter", ["route", "status"], registry=registry)
+    for n in range(series):
+        histogram.labels(f"/route/{n}", 200).observe(0.01)
+        counter.labels(f"/route/{n}", 200).inc()
+    started = time.perf_counter()
+    text = registry.render()
+    return time.perf_counter() - started, len(text)
+
+
+class _NoOp:
+    """Stand-in for every bound metric value: all hooks do nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def observe(self, seconds):
+        pass
+
+    def time(self):
+        return self
+
+    def track_inprogress(self):
+        return self
+
+    def labels(self, *values):
+        return self
+
+
+def _flask_requests(requests):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["LISTING_CACHE_SIZE"] = "0"
+        os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        import app1
+        import openai_utils
+        from circuit_breaker import CircuitOpenError
+        logging.disable(logging.CRITICAL)
+
+        def circuit_open(*args, **kwargs):
+            raise CircuitOpenError("llm")
+        openai_utils.generate_amazon_listing = circuit_open
+
+        client = app1.app.test_client()
+        payload = {"product_name": "Air Purifier", "category": "Home & Kitchen",
+                   "features": ["True HEPA H13 filter", "Covers 500 sq ft"]}
+
+        def run():
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.post("/api/generate-listing", json=payload)
+            return (time.perf_counter() - started) / requests
+
+        run()  # warm up
+        with_hooks = run()
+        names = ("TEMPLATE", "SEO_ANALYSIS", "SERIALIZATION", "DB_INSERT", "REQUEST_SECONDS")
+        saved = {name: getattr(metrics, name) for name in names}
+        saved_app1 = {name: getattr(app1, name) for name in ("_IN_FLIGHT", "_CIRCUIT_FALLBACKS")}
+        noop = _NoOp()
+        for name in names:
+            setattr(metrics, name, noop)
+        for name in saved_app1:
+            setattr(app1, name, noop)
+        try:
+            without_hooks = run()
+        finally:
+            for name, value in saved.items():
+                setattr(metrics, name, value)
+            for name, value in saved_app1.items():
+                setattr(app1, name, value)
+        app1.listing_writer.close()
+        return with_hooks, without_hooks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=1_000_000, help="calls per hook")
+    parser.add_argument("--series", type=int, default=500, help="label combinations rendered per scrape")
+    parser.add_argument("--requests", type=int, default=2000, help="app1 template requests per run")
+    args = parser.parse_args()
+
+    baseline = _baseline(args.calls)
+    print(f"{'hook':<30}{'ns/call':>10}")
+    for name, seconds in _hooks(args.calls):
+        print(f"{name:<30}{(seconds - baseline) * 1e9:>10.0f}")
+    print(f"(loop and call overhead of {baseline * 1e9:.0f} ns subtracted)")
+
+    seconds, size = _scrape(args.series)
+    print(f"\nscrape of {args.series * 2} series: {seconds * 1000:.1f} ms, {size / 1024:.0f} KiB")
+
+    with_hooks, without_hooks = _flask_requests(args.requests)
+    print(f"\napp1 template request: {with_hooks * 1e6:.0f} us with metrics, "
+          f"{without_hooks * 1e6:.0f} us without ({(with_hooks - without_hooks) * 1e6:+.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Prompt construction cost and prompt-cache hit ratio of the prompt registry.
+
+1. Microbenchmark of building the listing prompt per request: rendering the
+   user message only, and rendering plus the token estimate that is logged
+   for every request.
+2. Prompt-cache hit ratio against the stub LLM server, which emulates
+   provider prefix caching. Requests for --requests different products are
+   sent with the registry prompts (byte-identical system prompt first) and
+   with a layout that starts with per-request text (product and category in
+   the system prompt), for cache minimums of 1024 tokens (OpenAI) and
+   --low-min tokens (providers/servers with a lower or no minimum).
+
+Usage:
+    python benchmarks/bench_prompts.py --requests 50
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI  # noqa: E402
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+import prompts  # noqa: E402
+
+FEATURES = ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft",
+            "Smart app control", "Washable pre-filter"]
+KEYWORDS = ["air purifier", "hepa filter", "quiet"]
+
+
+def _dynamic_first(product_name, category, features, target_keywords):
+    # Per-request text ahead of the static instructions: no shared prefix
+    rendered = prompts.LISTING_PROMPT.render(product_name=product_name, category=category,
+                                             features=features, target_keywords=target_keywords)
+    system = f"Product: {product_name} ({category})\n\n" + rendered.messages[0]["content"]
+    return [{"role": "system", "content": system}, rendered.messages[1]]
+
+
+def _registry(product_name, category, features, target_keywords):
+    return prompts.registry.render("listing", product_name=product_name, category=category,
+                                   features=features, target_keywords=target_keywords).messages
+
+
+def _build_time(number):
+    template = prompts.LISTING_PROMPT
+    fields = dict(product_name="Air Purifier", category="Home & Kitchen", features=FEATURES,
+                  target_keywords=KEYWORDS)
+
+    def format_only():
+        values = template.fields(**fields)
+        return [{"role": "system", "content": template.system},
+                {"role": "user", "content": template.user_template.format(**values)}]
+
+    print(f"{'build':<36}{'us/prompt':>10}")
+    for name, fn in (("user message only", format_only),
+                     ("registry.render (with token estimate)", lambda: template.render(**fields))):
+        seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        print(f"{name:<36}{seconds * 1e6:>10.1f}")
+    rendered = template.render(**fields)
+    print(f"estimated prompt tokens: {rendered.prompt_tokens} ({rendered.static_tokens} static)")
+
+
+def _hit_ratio(requests, min_tokens):
+    results = {}
+    for name, build in (("registry", _registry), ("dynamic first", _dynamic_first)):
+        with StubLLMServer(latency=0.0, cache_min_tokens=min_tokens) as stub:
+            client = OpenAI(base_url=stub.base_url, api_key="stub")
+            prompt_tokens = cached_tokens = hits = 0
+            for i in range(requests):
+                response = client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=build(f"Product {i}", "Home & Kitchen", FEATURES, KEYWORDS)
+                )
+                usage = response.usage
+                prompt_tokens += usage.prompt_tokens
+                cached = usage.prompt_tokens_details.cached_tokens or 0
+                cached_tokens += cached
+                hits += bool(cached)
+            client.close()
+        results[name] = (hits / requests, cached_tokens / prompt_tokens)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--number", type=int, default=20000, help="renders per timing run")
+    parser.add_argument("--low-min", type=int, default=256, help="low prompt-cache minimum in tokens")
+    args = parser.parse_args()
+
+    _build_time(args.number)
+    print(f"\n{'cache minimum':<15}{'layout':<15}{'request hits':>14}{'cached tokens':>15}")
+    for min_tokens in (1024, args.low_min):
+        for name, (hit_ratio, token_ratio) in _hit_ratio(args.requests, min_tokens).items():
+            print(f"{min_tokens:<15}{name:<15}{hit_ratio:>13.0%}{token_ratio:>15.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Latency and failures of llm_router.Router with two stub providers.
+
+Two stub LLM servers stand in for OpenAI (chat completions API) and
+Anthropic (Messages API). --requests listing completions are sent with
+--concurrency threads through a router over OpenAI only and over both
+providers, in three scenarios:
+
+- "healthy": both answer, OpenAI after --openai-latency and Anthropic after
+  the lower --anthropic-latency, so the router should prefer Anthropic;
+- "openai errors": every OpenAI request fails with 429/500/503;
+- "openai stalls": every OpenAI request hangs for 60 s, longer than the
+  --deadline, so the router must give up on it in time to fail over.
+
+Usage:
+    python benchmarks/bench_router.py --requests 60 --deadline 5
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+import prompts  # noqa: E402
+from llm_router import Backend, Router  # noqa: E402
+from llm_transport import LLMTransport  # noqa: E402
+
+FEATURES = ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft"]
+SCENARIOS = (
+    ("healthy", {}),
+    ("openai errors", {"error_rate": 1.0}),
+    ("openai stalls", {"slow_rate": 1.0, "slow_latency": 60.0}),
+)
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))]
+
+
+def _run(args, router):
+    messages = prompts.listing_prompt(prompts.COPY_SECTIONS).render(
+        product_name="Air Purifier", category="Home & Kitchen", features=FEATURES).messages
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            completion = router.complete(messages, max_tokens=1400, json_mode=True, deadline=args.deadline)
+        except Exception:
+            return None
+        return time.perf_counter() - started, completion.backend
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        return list(pool.map(one, range(args.requests)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--openai-latency", type=float, default=0.6)
+    parser.add_argument("--anthropic-latency", type=float, default=0.3)
+    parser.add_argument("--deadline", type=float, default=5.0, help="request deadline in seconds")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'scenario':<15}{'backends':<10}{'p50':>9}{'p99':>9}{'failed':>8}{'failovers':>11}"
+          f"{'  served by anthropic':>21}")
+    for scenario, faults in SCENARIOS:
+        for label in ("openai", "both"):
+            with StubLLMServer(latency=args.openai_latency, seed=3, **faults) as openai_stub, \
+                    StubLLMServer(latency=args.anthropic_latency) as anthropic_stub:
+                transport = LLMTransport(max_connections=args.concurrency * 4)
+                backends = [Backend("openai", "gpt-4o", transport,
+                                    base_url=openai_stub.base_url, api_key="stub")]
+                if label == "both":
+                    backends.append(Backend("anthropic", "claude-3-5-sonnet-latest", transport,
+                                            base_url=anthropic_stub.root_url, api_key="stub"))
+                router = Router(backends)
+                results = _run(args, router)
+            samples = [r[0] for r in results if r is not None]
+            anthropic = sum(1 for r in results if r is not None and r[1].startswith("anthropic"))
+            p50 = f"{statistics.median(samples) * 1000:>6.0f} ms" if samples else f"{'-':>9}"
+            p99 = f"{_percentile(samples, 99) * 1000:>6.0f} ms" if samples else f"{'-':>9}"
+            print(f"{scenario:<15}{label:<10}{p50}{p99}{results.count(None):>8}"
+                  f"{router.stats()['failovers']:>11}{anthropic / len(results):>21.0%}")
+
+
+if __name__ == "__main__":
+    main()
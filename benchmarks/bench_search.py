@@ -0,0 +1,195 @@
+"""
+Full-text listing search latency on a seeded corpus.
+
+Seeds --rows listings of random catalog copy with Zipf-distributed words
+(200,000 by default, each with --bullets bullet points) with Core bulk
+inserts, builds the search index with search.ensure_search_index (the
+backfill path) and then reports:
+
+- median and p95 latency of search.search_listings for common,
+  mid-frequency, rare and multi-word queries, with and without a category
+  filter, against a LIKE '%term%' scan over the same columns
+- listings/s of persistence.store_listings with incremental indexing on and
+  off
+
+SQLite is always measured (a temporary file); pass --postgres-url (or set
+BENCH_POSTGRES_URL) to also measure a local Postgres. The benchmark creates
+and drops the listing and search tables in that database.
+
+Usage:
+    python benchmarks/bench_search.py --rows 200000 --bullets 5
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, or_, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import persistence  # noqa: E402
+import search  # noqa: E402
+from bench_seo_analysis import VOCABULARY  # noqa: E402
+from models import Base, BulletPoint, Listing, create_indexes  # noqa: E402
+
+SEED_BATCH = 5000
+# "ceramic" and "waterproof" are not in the corpus vocabulary; seeded into 1 in 500 titles
+RARE_TERMS = ("ceramic", "waterproof")
+_SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "pa", "de", "gu")
+
+
+def _vocabulary(size, seed=3):
+    # Catalog words first, then made-up words, with Zipf frequencies like real copy
+    rng = random.Random(seed)
+    words = list(dict.fromkeys(VOCABULARY))
+    while len(words) < size:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in words:
+            words.append(word)
+    return words, list(itertools.accumulate(1.0 / rank for rank in range(1, len(words) + 1)))
+
+
+WORDS, CUM_WEIGHTS = _vocabulary(20000)
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=n))
+
+
+def _seed(engine, rows, bullets, categories, seed=7):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        for start in range(0, rows, SEED_BATCH):
+            count = min(SEED_BATCH, rows - start)
+            listing_rows = []
+            for i in range(start, start + count):
+                title = _sentence(rng, 12).title()
+                if i % 500 == 0:
+                    title += " " + rng.choice(RARE_TERMS)
+                listing_rows.append({
+                    "id": i + 1,
+                    "product_name": f"Product {i}",
+                    "category": f"Category {rng.randrange(categories)}",
+                    "title": title,
+                    "description": _sentence(rng, 120),
+                    "keywords": ", ".join(_sentence(rng, 2) for _ in range(5))
+                })
+            conn.execute(insert(Listing), listing_rows)
+            if bullets:
+                conn.execute(insert(BulletPoint), [{
+                    "listing_id": i + 1, "bullet_text": _sentence(rng, 25), "position": n
+                } for i in range(start, start + count) for n in range(bullets)])
+
+
+def _like_scan(session, query, limit):
+    # What searching without an index looks like: every term in any column
+    stmt = select(Listing.id)
+    for term in query.split():
+        pattern = f"%{term}%"
+        stmt = stmt.where(or_(Listing.title.like(pattern), Listing.description.like(pattern),
+                              Listing.keywords.like(pattern)))
+    return session.execute(stmt.order_by(Listing.id.desc()).limit(limit)).all()
+
+
+def _latency(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def _store_rate(engine, count, indexed):
+    rng = random.Random(11)
+    records = [persistence.listing_record(
+        f"New product {i}", "Category 0", _sentence(rng, 12).title(), _sentence(rng, 120),
+        [_sentence(rng, 2) for _ in range(5)], [_sentence(rng, 25) for _ in range(5)]
+    ) for i in range(count)]
+    if not indexed:
+        search._indexed_binds.discard(engine)
+    try:
+        with Session(engine) as session:
+            started = time.perf_counter()
+            for i in range(0, count, 100):
+                persistence.store_listings(records[i:i + 100], session)
+            return count / (time.perf_counter() - started)
+    finally:
+        search._indexed_binds.add(engine)
+
+
+def _drop(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS listing_fts"))
+        conn.execute(text("DROP TABLE IF EXISTS listing_search"))
+    Base.metadata.drop_all(engine)
+
+
+def _measure(url, args):
+    engine = create_engine(url)
+    try:
+        _drop(engine)
+        Base.metadata.create_all(engine)
+        create_indexes(engine)
+        started = time.perf_counter()
+        _seed(engine, args.rows, args.bullets, args.categories)
+        print(f"  seeded {args.rows} listings in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        search.ensure_search_index(engine)
+        print(f"  built search index in {time.perf_counter() - started:.1f}s")
+
+        common = WORDS[0]
+        queries = [
+            ("term in every listing", common, None),
+            ("mid-frequency term", WORDS[200], None),
+            ("rare term", RARE_TERMS[0], None),
+            ("two terms", f"{WORDS[5]} {WORDS[50]}", None),
+            ("every listing + category", common, "Category 3"),
+            ("rare + category", RARE_TERMS[1], "Category 3"),
+        ]
+        print(f"  {'query':<26}{'search p50':>12}{'p95':>9}{'LIKE p50':>12}")
+        with Session(engine) as session:
+            for name, query, category in queries:
+                search.search_listings(session, query, category=category, limit=args.limit)
+                p50, p95 = _latency(lambda: (search.search_listings(
+                    session, query, category=category, limit=args.limit), session.expunge_all()), args.repeat)
+                like_p50, _ = _latency(lambda: _like_scan(session, query, args.limit), max(1, args.repeat // 5))
+                print(f"  {name:<26}{p50:>10.2f}ms{p95:>7.2f}ms{like_p50:>10.2f}ms")
+
+        for indexed in (False, True):
+            rate = _store_rate(engine, args.store, indexed)
+            print(f"  store_listings, index {'on' if indexed else 'off':<4}{rate:>10.0f} listings/s")
+        _drop(engine)
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--bullets", type=int, default=5, help="bullet points seeded per listing")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=search.DEFAULT_RESULTS)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--store", type=int, default=2000, help="listings stored for the insert rate")
+    parser.add_argument("--postgres-url", default=os.environ.get("BENCH_POSTGRES_URL"))
+    args = parser.parse_args()
+
+    targets = [("sqlite", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search.db')}")]
+    if args.postgres_url:
+        targets.append(("postgres", args.postgres_url))
+
+    for name, url in targets:
+        print(f"{name}:")
+        _measure(url, args)
+
+
+if __name__ == "__main__":
+    main()
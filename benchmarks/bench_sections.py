@@ -0,0 +1,86 @@
+"""
+Output tokens and latency of generating only some listing sections.
+
+openai_utils.generate_amazon_listing is run against the stub LLM server for
+each section set, with caching off. The stub answers with the sections named
+in the prompt's schema and takes --token-delay seconds per output token
+(after --latency), so the saved output tokens show up as saved time. Also
+reports the max_tokens sent (token_budget.max_tokens_for) next to the
+completion tokens the stub reported, and the time spent computing the
+missing analysis sections locally.
+
+Usage:
+    python benchmarks/bench_sections.py --requests 20 --latency 0.3 --token-delay 0.0005
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import STUB_LISTING, StubLLMServer  # noqa: E402
+
+import prompts  # noqa: E402
+import token_budget  # noqa: E402
+
+FEATURES = ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft",
+            "Smart app control", "Washable pre-filter"]
+KEYWORDS = ["air purifier", "hepa filter", "quiet"]
+
+SECTION_SETS = (
+    ("all sections", prompts.LISTING_SECTIONS),
+    ("copy only", prompts.COPY_SECTIONS),
+    ("copy + seo_analysis", prompts.COPY_SECTIONS + ("seo_analysis",)),
+    ("title + bullets", ("title", "bullets")),
+)
+
+
+def _local_analysis_time(number):
+    import openai_utils
+
+    def complete():
+        return openai_utils._complete_listing(dict(STUB_LISTING), prompts.COPY_SECTIONS,
+                                              "Air Purifier", KEYWORDS)
+
+    return min(timeit.repeat(complete, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub LLM latency in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.0005,
+                        help="stub seconds per output token")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with StubLLMServer(latency=args.latency, token_delay=args.token_delay) as stub:
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ["LLM_BACKENDS"] = "openai:gpt-4o"
+        import openai_utils
+
+        print(f"{'sections':<22}{'max_tokens':>11}{'completion tokens':>19}{'mean latency':>14}")
+        for label, sections in SECTION_SETS:
+            name = prompts.listing_prompt(sections).name
+            before = prompts.registry.stats().get(name, {}).get("completion_tokens", 0)
+            started = time.perf_counter()
+            for i in range(args.requests):
+                listing = openai_utils.generate_amazon_listing(f"Air Purifier {i}", "Home & Kitchen",
+                                                               FEATURES, KEYWORDS, use_cache=False,
+                                                               sections=sections)
+            elapsed = time.perf_counter() - started
+            completion = prompts.registry.stats()[name]["completion_tokens"] - before
+            max_tokens = token_budget.max_tokens_for(prompts.normalize_sections(sections), len(KEYWORDS))
+            assert set(prompts.ANALYSIS_SECTIONS) <= set(listing)
+            print(f"{label:<22}{max_tokens:>11}{completion / args.requests:>19.0f}"
+                  f"{elapsed / args.requests * 1000:>11.1f} ms")
+
+    print(f"\nlocal analysis of a copy-only listing: {_local_analysis_time(2000) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
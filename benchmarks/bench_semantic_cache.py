@@ -0,0 +1,161 @@
+"""
+Hit rate, false hits and lookup latency of semantic_cache.SemanticCache.
+
+1. Threshold sweep: the cache is filled with --base synthetic requests, then
+   queried with paraphrases of them (features reordered, "25dB" written as
+   "25 dB", synonyms, case) which should hit, and with the same features
+   under a different product name which should not.
+2. Lookup latency for growing index sizes, with the NumPy index (when
+   installed) and the pure-Python inverted index, all entries in one
+   partition (the worst case).
+3. End to end: openai_utils.generate_amazon_listing against the stub LLM
+   server for a workload where --repeat-share of requests are paraphrases of
+   earlier ones, with the semantic cache off and on.
+
+Usage:
+    python benchmarks/bench_semantic_cache.py --base 500 --latency 0.5
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+import semantic_cache  # noqa: E402
+
+PRODUCTS = ("Air Purifier", "Humidifier", "Dehumidifier", "Space Heater", "Tower Fan",
+            "Robot Vacuum", "Desk Lamp", "Coffee Grinder", "Yoga Mat", "Water Bottle")
+BRANDS = ("", "Smart ", "Compact ", "Premium ", "Portable ")
+FEATURES = ("Ultra-quiet {n}dB", "HEPA H{n} filter", "Covers {n} sq ft", "Smart app control",
+            "Auto mode with air quality sensor", "Timer up to {n} hours", "Washable pre-filter",
+            "Night light", "{n}W low power motor", "{n}-speed settings")
+SYNONYMS = (("Ultra-quiet", "whisper quiet"), ("Covers", "coverage of"), ("Smart app control", "app controlled"),
+            ("Washable", "reusable washable"), ("Night light", "built-in night light"),
+            ("settings", "modes"), ("low power", "energy efficient"))
+
+
+def _request(rng, numbers=True):
+    features = [f.format(n=rng.randint(2, 600) if numbers else "")
+                for f in rng.sample(FEATURES, rng.randint(3, 5))]
+    product = rng.choice(BRANDS) + rng.choice(PRODUCTS)
+    return product, features, [product.lower().strip()]
+
+
+def _paraphrase(rng, request):
+    product, features, keywords = request
+    features = list(features)
+    rng.shuffle(features)
+    for _ in range(rng.randint(1, 3)):
+        i = rng.randrange(len(features))
+        op = rng.randrange(3)
+        if op == 0:
+            old, new = rng.choice(SYNONYMS)
+            features[i] = features[i].replace(old, new)
+        elif op == 1:
+            features[i] = features[i].replace("dB", " dB").replace("W ", " W ")
+        else:
+            features[i] = features[i].lower()
+    return product, features, list(reversed(keywords))
+
+
+def _different_product(rng, request):
+    product, features, keywords = request
+    other = rng.choice([p for p in PRODUCTS if p not in product])
+    return other, features, [other.lower()]
+
+
+def _sweep(args):
+    rng = random.Random(5)
+    requests = [_request(rng) for _ in range(args.base)]
+    cache = semantic_cache.SemanticCache(threshold=0.0, exact_threshold=1.1, max_entries=len(requests))
+    for product, features, keywords in requests:
+        cache.add("home", product, features, keywords, {"title": product})
+
+    def best(queries):
+        # threshold=0 so lookup always reports the best similarity
+        return [cache.lookup("home", *q)[1] or 0.0 for q in queries]
+
+    positives = best([_paraphrase(rng, r) for r in requests])
+    negatives = best([_different_product(rng, r) for r in requests])
+    print(f"{'threshold':>10}{'paraphrase hits':>17}{'false hits':>12}")
+    for threshold in (0.75, 0.8, 0.85, 0.9, 0.95):
+        hits = sum(s >= threshold for s in positives) / len(positives)
+        false_hits = sum(s >= threshold for s in negatives) / len(negatives)
+        print(f"{threshold:>10.2f}{hits:>16.1%}{false_hits:>12.1%}")
+
+
+def _latency(args):
+    rng = random.Random(9)
+    backends = [False] + ([True] if semantic_cache.np is not None else [])
+    print(f"\n{'entries':>8}" + "".join(f"{('numpy' if b else 'python') + ' p50':>14}" for b in backends))
+    for size in (100, 1000, 10000):
+        row = f"{size:>8}"
+        for use_numpy in backends:
+            cache = semantic_cache.SemanticCache(max_entries=size, use_numpy=use_numpy)
+            for _ in range(size):
+                # No numbers: every entry lands in the same partition
+                cache.add("home", *_request(rng, numbers=False), {})
+            samples = []
+            for _ in range(200):
+                request = _request(rng, numbers=False)
+                started = time.perf_counter()
+                cache.lookup("home", *request)
+                samples.append((time.perf_counter() - started) * 1000)
+            row += f"{statistics.median(samples):>11.3f} ms"
+        print(row)
+
+
+def _end_to_end(args):
+    with StubLLMServer(latency=args.latency) as stub:
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ["LLM_BACKENDS"] = "openai:gpt-4o"
+        import openai_utils
+
+        rng = random.Random(13)
+        seen = []
+        workload = []
+        for _ in range(args.requests):
+            if seen and rng.random() < args.repeat_share:
+                workload.append(_paraphrase(rng, rng.choice(seen)))
+            else:
+                seen.append(_request(rng))
+                workload.append(seen[-1])
+
+        print(f"\n{'semantic cache':<16}{'mean latency':>14}{'LLM calls':>11}")
+        for enabled in (False, True):
+            openai_utils.listing_cache.clear()
+            openai_utils.semantic_cache.clear()
+            openai_utils.semantic_cache.max_entries = semantic_cache.DEFAULT_MAX_ENTRIES if enabled else 0
+            calls_before = stub.completions
+            started = time.perf_counter()
+            for product, features, keywords in workload:
+                openai_utils.generate_amazon_listing(product, "Home & Kitchen", features, keywords)
+            elapsed = time.perf_counter() - started
+            print(f"{'on' if enabled else 'off':<16}{elapsed / len(workload) * 1000:>11.1f} ms"
+                  f"{stub.completions - calls_before:>11}")
+        print(openai_utils.semantic_cache.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base", type=int, default=500, help="cached requests in the threshold sweep")
+    parser.add_argument("--requests", type=int, default=100, help="requests in the end-to-end run")
+    parser.add_argument("--repeat-share", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    _sweep(args)
+    _latency(args)
+    _end_to_end(args)
+
+
+if __name__ == "__main__":
+    main()
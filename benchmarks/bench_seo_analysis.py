@@ -0,0 +1,214 @@
+"""
+seo_analysis vs the per-keyword loops previously nested in app1.py.
+
+The legacy functions below are verbatim copies of the closures that lived in
+app1.generate_amazon_listing; they rescan and re-lowercase the text once per
+keyword. Both sides do the same work: title, density and placement analysis,
+the SEO score, the recommendations, the AEO strategies and the psychological
+techniques. They analyze the same synthetic listings with an increasing
+number of keywords; app1 sends 15 or fewer, where seo_analysis scans the
+text per keyword (below SCAN_THRESHOLD) instead of building its n-gram index.
+
+Usage:
+    python benchmarks/bench_seo_analysis.py --keywords 5 15 50 100 500 --repeat 20
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import seo_analysis  # noqa: E402
+
+VOCABULARY = (
+    "air purifier hepa filter quiet home smart sensor energy efficient room large "
+    "allergy dust pollen smoke pet dander bedroom office fan speed timer night mode "
+    "filtration coverage compact design portable premium durable wireless control"
+).split()
+
+
+def _legacy_keyword_density(text, keywords):
+    text = text.lower()
+    words = re.findall(r'\b\w+\b', text)
+    total_words = len(words)
+    if total_words == 0:
+        return {}
+    density = {}
+    for keyword in keywords:
+        keyword = keyword.lower()
+        count = text.count(keyword)
+        if count > 0:
+            density[keyword] = {'count': count, 'percentage': round((count / total_words) * 100, 2)}
+    return density
+
+
+def _legacy_keyword_placement(title, bullets, keywords):
+    title_lower = title.lower()
+    result = {'keywords_in_title': [], 'keywords_in_bullets': [], 'missing_keywords': []}
+    for keyword in keywords:
+        keyword_lower = keyword.lower()
+        found_in_title = keyword_lower in title_lower
+        found_in_bullets = any(keyword_lower in bullet.lower() for bullet in bullets)
+        if found_in_title:
+            result['keywords_in_title'].append(keyword)
+        if found_in_bullets:
+            result['keywords_in_bullets'].append(keyword)
+        if not found_in_title and not found_in_bullets:
+            result['missing_keywords'].append(keyword)
+    return result
+
+
+def _legacy_title_length(title):
+    char_count = len(title)
+    char_limit = 200
+    result = {'character_count': char_count, 'character_limit': char_limit,
+              'within_limit': char_count <= char_limit}
+    if char_count > char_limit:
+        result['recommendation'] = f"Title exceeds Amazon's character limit by {char_count - char_limit} characters. Consider shortening it."
+    elif char_count < 100:
+        result['recommendation'] = "Title could be more descriptive. Consider adding more relevant keywords while staying under the 200 character limit."
+    else:
+        result['recommendation'] = "Title length is optimal for Amazon's guidelines."
+    return result
+
+
+def _legacy_seo_score(title_analysis, keyword_analysis, density_analysis, keywords):
+    score = 0
+    max_score = 100
+    if title_analysis['within_limit']:
+        score += 20
+    keywords_in_title_ratio = len(keyword_analysis['keywords_in_title']) / len(keywords) if keywords else 0
+    score += round(keywords_in_title_ratio * 25)
+    keywords_in_bullets_ratio = len(keyword_analysis['keywords_in_bullets']) / len(keywords) if keywords else 0
+    score += round(keywords_in_bullets_ratio * 20)
+    if density_analysis:
+        good_density_count = sum(1 for k, v in density_analysis.items()
+                                 if 0.5 <= v['percentage'] <= 2.5)
+        if good_density_count:
+            score += round((good_density_count / len(density_analysis)) * 15)
+    missing_keywords_ratio = len(keyword_analysis['missing_keywords']) / len(keywords) if keywords else 1
+    score += round((1 - missing_keywords_ratio) * 20)
+    return {'score': score, 'max_score': max_score, 'percentage': round((score / max_score) * 100),
+            'rating': 'Excellent' if score >= 85 else 'Good' if score >= 70 else 'Fair' if score >= 50 else 'Needs Improvement'}
+
+
+def _legacy_aeo(product_name, title, bullets, description, keywords):
+    aeo_analysis = {'strategies_applied': [], 'recommendations': []}
+    backend_keywords = keywords.copy()
+    for keyword in list(backend_keywords):
+        if keyword.endswith('s') and len(keyword) > 4:
+            backend_keywords.append(keyword[:-1])
+        elif len(keyword) > 3:
+            backend_keywords.append(keyword + 's')
+    aeo_analysis['strategies_applied'].append('Backend Keywords Optimization')
+    if len(title) < 150:
+        aeo_analysis['recommendations'].append('Extend title to use more of the 200 character limit with relevant keywords')
+    if product_name not in title[:50]:
+        aeo_analysis['recommendations'].append('Place product name in the first 50 characters of the title')
+    aeo_analysis['strategies_applied'].append('A9 Search Term Optimization')
+    indexed_terms = set()
+    for word in re.findall(r'\b\w+\b', title.lower()):
+        if len(word) > 3:
+            indexed_terms.add(word)
+    for bullet in bullets:
+        for word in re.findall(r'\b\w+\b', bullet.lower()):
+            if len(word) > 3:
+                indexed_terms.add(word)
+    missing_indexed_keywords = [k for k in keywords if k.lower() not in indexed_terms]
+    if missing_indexed_keywords:
+        aeo_analysis['recommendations'].append(f"Add these keywords to title or bullets for better indexing: {', '.join(missing_indexed_keywords[:3])}")
+    aeo_analysis['strategies_applied'].append('Indexing Optimization')
+    aeo_analysis['strategies_applied'].append('Organic Reach Enhancement')
+    return aeo_analysis
+
+
+def _legacy_psychological(bullets, description):
+    techniques = {'applied_techniques': [], 'impact_analysis': {}}
+    all_text = " ".join(bullets) + " " + description
+    for name, key, phrases in (
+        ('Scarcity Principle', 'scarcity', seo_analysis.SCARCITY_PHRASES),
+        ('Social Proof', 'social_proof', seo_analysis.SOCIAL_PROOF_PHRASES),
+        ('Authority Principle', 'authority', seo_analysis.AUTHORITY_PHRASES),
+        ('Reciprocity Principle', 'reciprocity', seo_analysis.RECIPROCITY_PHRASES),
+    ):
+        # Lowercased once per phrase, as the legacy code did
+        count = sum(1 for phrase in phrases if phrase.lower() in all_text.lower())
+        if count > 0:
+            techniques['applied_techniques'].append(name)
+            techniques['impact_analysis'][key] = 'High' if count > 1 else 'Medium'
+        else:
+            techniques['impact_analysis'][key] = 'Not Applied'
+    return techniques
+
+
+def _legacy(title, bullets, description, keywords):
+    full_text = title + " " + " ".join(bullets) + " " + description
+    title_analysis = _legacy_title_length(title)
+    density_analysis = _legacy_keyword_density(full_text, keywords)
+    keyword_placement = _legacy_keyword_placement(title, bullets, keywords)
+    seo_score = _legacy_seo_score(title_analysis, keyword_placement, density_analysis, keywords)
+    aeo_analysis = _legacy_aeo("Air Purifier", title, bullets, description, keywords)
+    psych_techniques = _legacy_psychological(bullets, description)
+    seo = {'title_analysis': title_analysis, 'keyword_density': density_analysis,
+           'keyword_placement': keyword_placement, 'seo_score': seo_score, 'recommendations': []}
+    if not title_analysis['within_limit']:
+        seo['recommendations'].append(title_analysis['recommendation'])
+    if keyword_placement['missing_keywords']:
+        missing_kw_str = ", ".join(keyword_placement['missing_keywords'][:3])
+        if len(keyword_placement['missing_keywords']) > 3:
+            missing_kw_str += f" and {len(keyword_placement['missing_keywords']) - 3} more"
+        seo['recommendations'].append(f"Consider including these keywords in your title or bullets: {missing_kw_str}")
+    low_density_kw = [k for k, v in density_analysis.items() if v['percentage'] < 0.5]
+    if low_density_kw and len(low_density_kw) <= 3:
+        seo['recommendations'].append(f"Increase the usage of these keywords: {', '.join(low_density_kw)}")
+    high_density_kw = [k for k, v in density_analysis.items() if v['percentage'] > 2.5]
+    if high_density_kw and len(high_density_kw) <= 3:
+        seo['recommendations'].append(f"Reduce the frequency of these keywords to avoid keyword stuffing: {', '.join(high_density_kw)}")
+    return {'seo_analysis': seo, 'aeo_analysis': aeo_analysis, 'psychological_techniques': psych_techniques}
+
+
+def _vectorized(title, bullets, description, keywords):
+    seo_analysis.analyze_listing("Air Purifier", title, bullets, description, keywords)
+
+
+def _listing(rng, keyword_count):
+    def sentence(n):
+        return " ".join(rng.choice(VOCABULARY) for _ in range(n))
+
+    title = sentence(20).title()
+    bullets = [sentence(30) for _ in range(5)]
+    description = "\n\n".join(sentence(80) for _ in range(5))
+    keywords = []
+    for i in range(keyword_count):
+        words = rng.randint(1, 3)
+        keywords.append(" ".join(rng.choice(VOCABULARY) for _ in range(words)) + ("" if i < 40 else f" {i}"))
+    return title, bullets, description, keywords
+
+
+def _time(fn, args, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keywords", type=int, nargs="+", default=[5, 15, 50, 100, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'keywords':>9}{'legacy ms':>12}{'seo_analysis ms':>17}{'speedup':>9}")
+    for count in args.keywords:
+        listing = _listing(rng, count)
+        legacy = _time(_legacy, listing, args.repeat)
+        vectorized = _time(_vectorized, listing, args.repeat)
+        print(f"{count:>9}{legacy * 1000:>12.3f}{vectorized * 1000:>17.3f}{legacy / vectorized:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Listings per second of seo_scoring.score_listings for different worker counts.
+
+Scores a synthetic catalog (same shape as exported listings) with 1, 2, 4,
+... worker processes up to the CPU count.
+
+Usage:
+    python benchmarks/bench_seo_scoring.py --listings 20000 --keywords 25
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import seo_scoring  # noqa: E402
+from bench_seo_analysis import VOCABULARY  # noqa: E402
+
+
+def _catalog(count, keyword_count, seed=7):
+    rng = random.Random(seed)
+
+    def sentence(n):
+        return " ".join(rng.choice(VOCABULARY) for _ in range(n))
+
+    for i in range(count):
+        yield {
+            "id": i,
+            "title": sentence(20).title(),
+            "bullets": [sentence(30) for _ in range(5)],
+            "description": "\n\n".join(sentence(80) for _ in range(5)),
+            "keywords": [sentence(rng.randint(1, 2)) for _ in range(keyword_count)]
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=20000)
+    parser.add_argument("--keywords", type=int, default=25)
+    args = parser.parse_args()
+
+    catalog = list(_catalog(args.listings, args.keywords))
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, cpus} | {2 ** i for i in range(1, 8) if 2 ** i < cpus})
+
+    print(f"{'workers':>8}{'listings/s':>12}{'speedup':>9}")
+    baseline = None
+    for workers in worker_counts:
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            started = time.perf_counter()
+            for _ in seo_scoring.score_listings(catalog, workers=workers, executor=executor):
+                pass
+            rate = len(catalog) / (time.perf_counter() - started)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>12.0f}{rate / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Upstream LLM calls for bursts of identical generate requests, with and without coalescing.
+
+Each round sends --burst identical /api/generate-listing requests at once
+(a double-clicked Generate, or teammates generating the same product) to
+the Flask app1 (one thread per request, openai_utils.listing_flight) and
+to the FastAPI main app (one task per request, main.listing_text_flight).
+Rounds use different products and the listing caches are off, so every
+round needs one LLM call. "off" swaps the single-flight objects for a
+pass-through that calls the LLM once per request, the previous behaviour.
+
+Usage:
+    python benchmarks/bench_single_flight.py --burst 8 --rounds 5 --latency 0.5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+FEATURES = ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft"]
+
+
+class _PassThrough:
+    """Stand-in for SingleFlight that never coalesces."""
+
+    def do(self, key, fn, *args, **kwargs):
+        return fn(*args, **kwargs), False
+
+    def stats(self):
+        return {"coalesced": 0}
+
+
+class _AsyncPassThrough:
+    """Stand-in for AsyncSingleFlight that never coalesces."""
+
+    async def do(self, key, fn, *args, **kwargs):
+        return await fn(*args, **kwargs), False
+
+    def stats(self):
+        return {"coalesced": 0}
+
+
+def _flask_rounds(app1, args):
+    samples = []
+    for round_number in range(args.rounds):
+        payload = {"product_name": f"Air Purifier {round_number}", "category": "Home & Kitchen",
+                   "features": FEATURES}
+        barrier = threading.Barrier(args.burst)
+
+        def one():
+            client = app1.app.test_client()
+            barrier.wait()
+            started = time.perf_counter()
+            response = client.post("/api/generate-listing", json=payload)
+            response.get_json()
+            samples.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=one) for _ in range(args.burst)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return samples
+
+
+async def _fastapi_rounds(app, args):
+    import httpx
+
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as http:
+        for round_number in range(args.rounds):
+            payload = {"title": f"Air Purifier {round_number}", "category": "Home & Kitchen",
+                       "features": FEATURES, "keywords": "air purifier, hepa", "competitor_urls": []}
+
+            async def one():
+                started = time.perf_counter()
+                response = await http.post("/api/generate-listing", json=payload)
+                response.raise_for_status()
+                samples.append(time.perf_counter() - started)
+
+            await asyncio.gather(*(one() for _ in range(args.burst)))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=8, help="identical requests sent at once")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM seconds per call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, StubLLMServer(latency=args.latency) as stub:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ["LLM_BACKENDS"] = "openai:gpt-4o"
+        os.environ["LISTING_CACHE_SIZE"] = "0"
+        os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+        import app1
+        import main as fastapi_main
+        import openai_utils
+        logging.disable(logging.CRITICAL)
+
+        rows = []
+
+        def counters(flight):
+            return flight.stats()["coalesced"], stub.completions
+
+        def add_row(app_name, label, flight, before, samples):
+            coalesced, calls = counters(flight)
+            rows.append((app_name, label, len(samples), calls - before[1], coalesced - before[0],
+                         statistics.median(samples)))
+
+        single_flight = openai_utils.listing_flight
+        for label, flight in (("off", _PassThrough()), ("on", single_flight)):
+            openai_utils.listing_flight = flight
+            before = counters(flight)
+            add_row("flask app1", label, flight, before, _flask_rounds(app1, args))
+
+        async def fastapi_runs():
+            # One event loop for both runs: the shared async client is bound to it
+            single_flight = fastapi_main.listing_text_flight
+            for label, flight in (("off", _AsyncPassThrough()), ("on", single_flight)):
+                fastapi_main.listing_text_flight = flight
+                before = counters(flight)
+                add_row("fastapi main", label, flight, before, await _fastapi_rounds(fastapi_main.app, args))
+
+        # main.py prints every request it receives
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(fastapi_runs())
+
+        print(f"{'app':<14}{'coalescing':<12}{'requests':>9}{'LLM calls':>11}{'coalesced':>11}{'p50':>10}")
+        for app_name, label, requests, calls, coalesced, p50 in rows:
+            print(f"{app_name:<14}{label:<12}{requests:>9}{calls:>11}{coalesced:>11}{p50 * 1000:>7.0f} ms")
+        app1.listing_writer.close()
+
+
+if __name__ == "__main__":
+    main()
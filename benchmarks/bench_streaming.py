@@ -0,0 +1,122 @@
+"""
+Time-to-first-field of /api/generate-listing/stream vs a full JSON response.
+
+Serves main.app with uvicorn against the stub LLM server and, for each run,
+records when the first SSE field event arrives, when the "done" event
+arrives, and how long the same non-streamed completion takes for the same
+stub settings. Caching is disabled so every run hits the stub.
+
+Usage:
+    python benchmarks/bench_streaming.py --runs 5 --latency 0.4 --token-delay 0.005
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+PAYLOAD = {
+    "title": "Ultra Quiet Air Purifier",
+    "category": "Home & Kitchen",
+    "features": ["HEPA filtration", "25dB operation", "500 sq ft coverage"],
+    "keywords": "air purifier, hepa"
+}
+
+
+def _serve(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+async def _stream_once(base_url):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as http:
+        started = time.perf_counter()
+        first_field = None
+        async with http.stream("POST", "/api/generate-listing/stream", json=PAYLOAD) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("event: "):
+                    continue
+                event = line[len("event: "):]
+                if event == "error":
+                    raise RuntimeError("stream reported an error")
+                if event != "done" and first_field is None:
+                    first_field = time.perf_counter() - started
+                if event == "done":
+                    return first_field, time.perf_counter() - started
+    raise RuntimeError("stream ended without a done event")
+
+
+async def _full_runs(runs):
+    # A private client: the shared one belongs to the uvicorn event loop
+    from openai import AsyncOpenAI
+    import openai_utils
+
+    client = AsyncOpenAI()
+    messages = openai_utils._build_listing_messages(
+        PAYLOAD["title"], PAYLOAD["category"], PAYLOAD["features"]
+    )
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = await client.chat.completions.create(
+            model=openai_utils.MODEL,
+            messages=messages,
+            response_format={"type": "json_object"}
+        )
+        json.loads(response.choices[0].message.content)
+        timings.append(time.perf_counter() - started)
+    await client.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.4, help="stub time to first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="stub seconds per chunk")
+    parser.add_argument("--port", type=int, default=8912)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    os.environ["LISTING_CACHE_SIZE"] = "0"
+    os.environ["SEMANTIC_CACHE_SIZE"] = "0"
+
+    with StubLLMServer(latency=args.latency, token_delay=args.token_delay) as stub:
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+        import main as fastapi_main
+
+        server, thread = _serve(fastapi_main.app, args.port)
+        try:
+            streamed = [asyncio.run(_stream_once(f"http://127.0.0.1:{args.port}"))
+                        for _ in range(args.runs)]
+            full = asyncio.run(_full_runs(args.runs))
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    print(f"full JSON response      : {statistics.median(full) * 1000:8.1f} ms (median of {args.runs})")
+    print(f"stream first field      : {statistics.median(s[0] for s in streamed) * 1000:8.1f} ms")
+    print(f"stream complete listing : {statistics.median(s[1] for s in streamed) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
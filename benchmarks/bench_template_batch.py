@@ -0,0 +1,79 @@
+"""
+Listings per second of template_batch for different worker counts and DB modes.
+
+Generates template listings (with their SEO analyses) for a synthetic
+catalog of --products products with 1, 2, 4, ... worker processes up to
+the CPU count. Then it stores them in a temporary SQLite database, once
+with one transaction per listing (what app1 did per call before the
+write-behind queue) and once in --db-batch-size batches.
+
+Usage:
+    python benchmarks/bench_template_batch.py --products 20000 --db-batch-size 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import template_batch  # noqa: E402
+from bench_templates import CATEGORIES, FEATURES  # noqa: E402
+
+
+def _catalog(count, seed=7):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "id": i,
+            "product_name": f"Air Purifier Model {i}",
+            "category": rng.choice(CATEGORIES),
+            "features": rng.sample(FEATURES, rng.randint(2, 6)),
+            "keywords": "air purifier, hepa, quiet" if i % 4 == 0 else ""
+        }
+
+
+def _run(catalog, workers, store=None):
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        started = time.perf_counter()
+        for result in template_batch.generate_listings(catalog, workers=workers, executor=executor):
+            if store is not None:
+                store.add(result)
+        if store is not None:
+            store.close()
+        return len(catalog) / (time.perf_counter() - started)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--db-batch-size", type=int, default=template_batch.DEFAULT_DB_BATCH_SIZE)
+    args = parser.parse_args()
+
+    catalog = list(_catalog(args.products))
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, cpus} | {2 ** i for i in range(1, 8) if 2 ** i < cpus})
+
+    print(f"{'workers':>8}{'database':>12}{'listings/s':>12}{'speedup':>9}")
+    baseline = None
+    for workers in worker_counts:
+        rate = _run(catalog, workers)
+        baseline = baseline or rate
+        print(f"{workers:>8}{'-':>12}{rate:>12.0f}{rate / baseline:>8.1f}x")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, batch_size in (("per listing", 1), (f"batch {args.db_batch_size}", args.db_batch_size)):
+            url = f"sqlite:///{os.path.join(tmp, f'batch-{batch_size}.db')}"
+            rate = _run(catalog, cpus, template_batch.ListingStore(url, batch_size))
+            print(f"{cpus:>8}{label:>12}{rate:>12.0f}{rate / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
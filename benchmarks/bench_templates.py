@@ -0,0 +1,216 @@
+"""
+Template fallback listings per second: listing_templates vs the old code.
+
+_legacy_template_listing below is a verbatim copy of the template part of
+the old app1.generate_amazon_listing, which rebuilt every category's
+f-string templates, the bullet patterns and the keyword and competitor
+lists on each call and filled placeholders with chained str.replace.
+Both versions render the same mix of products (known and unknown
+categories, one to seven features, with and without target keywords);
+the outputs are checked to match. Generated keywords are compared as
+sets, since the old code ordered them by set iteration; past 15 keywords
+the old code kept an arbitrary 15, so only their number is compared. --analysis adds the
+seo_analysis.analyze_listing call app1 makes on every fallback listing.
+
+Usage:
+    python benchmarks/bench_templates.py --listings 20000 --analysis
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import listing_templates  # noqa: E402
+import seo_analysis  # noqa: E402
+
+CATEGORIES = ["Electronics", "Home & Kitchen", "Beauty & Personal Care", "Sports & Outdoors", "Pet Supplies"]
+FEATURES = [
+    "Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft", "Smart air quality sensor",
+    "Energy efficient motor", "Sleep mode with timer", "Washable pre-filter", "Compact portable design",
+]
+
+
+def _legacy_template_listing(product_name, category, features, target_keywords=None):
+    # Validate inputs
+    if not product_name or not category or not features:
+        raise ValueError("Missing required product information")
+    
+    # Template patterns for different product categories
+    templates = {
+        "Electronics": {
+            "title": f"{product_name} - Premium [FEATURE1] with [FEATURE2] - Advanced [CATEGORY] Technology for [BENEFIT] - [YEAR]",
+            "description": f"Introducing the innovative {product_name}, the perfect solution for all your {category.lower()} needs. This cutting-edge device combines state-of-the-art technology with sleek design to deliver an unparalleled user experience.\n\nEngineered with precision and attention to detail, the {product_name} offers exceptional performance that stands out in today's competitive market. Whether you're a professional looking for reliable equipment or a casual user seeking convenience, this product exceeds expectations on all fronts.\n\nThe {product_name} features advanced functionality that puts it ahead of similar products. Its intuitive interface makes it accessible to users of all experience levels, while its robust construction ensures longevity and durability even with regular use.\n\nOur team of engineers has spent countless hours perfecting every aspect of the {product_name}. The result is a product that not only meets but exceeds industry standards, providing you with a truly remarkable experience every time you use it.\n\nInvest in quality and reliability with the {product_name} - the smart choice for discerning customers who demand excellence."
+        },
+        "Home & Kitchen": {
+            "title": f"{product_name} - Premium Quality [FEATURE1] for Modern Homes - Durable [CATEGORY] with [FEATURE2] - Perfect for [BENEFIT]",
+            "description": f"Transform your living space with the exceptional {product_name}, designed specifically for today's modern homes. This premium {category.lower()} item combines elegant design with practical functionality to enhance your daily life.\n\nCrafted from high-quality materials, the {product_name} is built to last and withstand the rigors of regular use. Its thoughtful design addresses common pain points while providing innovative solutions that make your home life more comfortable and convenient.\n\nThe {product_name} seamlessly integrates into any home décor style, adding both aesthetic appeal and practical value to your living space. Its versatile design makes it suitable for various uses, adapting to your changing needs.\n\nWe've paid meticulous attention to every detail of the {product_name}, ensuring that it not only looks beautiful but performs flawlessly. From the quality of materials to the precision of manufacturing, no aspect has been overlooked.\n\nBring home the {product_name} today and experience the perfect balance of style, functionality, and durability. Your satisfaction is guaranteed with this exceptional addition to your home."
+        },
+        "Beauty & Personal Care": {
+            "title": f"{product_name} - Professional [CATEGORY] [FEATURE1] - Gentle yet Effective [FEATURE2] for [BENEFIT] - Premium Quality",
+            "description": f"Discover the transformative power of the {product_name}, a revolutionary addition to your {category.lower()} routine. This premium product delivers professional-grade results from the comfort of your home, helping you look and feel your absolute best.\n\nFormulated with the finest ingredients, the {product_name} is gentle on your skin while effectively addressing your specific {category.lower()} needs. Its innovative approach sets a new standard in personal care, offering results you can see and feel immediately.\n\nThe {product_name} has been developed following extensive research and testing to ensure optimal performance and safety. Each component has been carefully selected to work in harmony, providing a comprehensive solution to your {category.lower()} requirements.\n\nPerfect for daily use, the {product_name} integrates seamlessly into your existing routine, enhancing your natural beauty without complicated procedures or extensive time commitments. Its user-friendly design makes professional-quality care accessible to everyone.\n\nChoose the {product_name} for your {category.lower()} needs and join thousands of satisfied customers who have made this exceptional product part of their daily self-care ritual."
+        },
+        "Sports & Outdoors": {
+            "title": f"{product_name} - Professional Grade [CATEGORY] Equipment - Durable [FEATURE1] with [FEATURE2] for [BENEFIT] - Performance Engineered",
+            "description": f"Elevate your performance with the game-changing {product_name}, engineered for athletes and outdoor enthusiasts who demand the very best. This professional-grade {category.lower()} equipment combines innovative design with durable construction to support your active lifestyle.\n\nBuilt to withstand the challenges of intense use and varying environmental conditions, the {product_name} delivers consistent performance when you need it most. Its resilient construction ensures longevity, making it a worthwhile investment for serious enthusiasts.\n\nThe {product_name} features cutting-edge technology that enhances your natural abilities, helping you achieve new personal bests and overcome previous limitations. Every aspect has been optimized to support peak performance, giving you a competitive edge.\n\nExtensive field testing by professional athletes has informed the development of the {product_name}, resulting in equipment that addresses real-world needs and challenges. The feedback of experts has been incorporated at every stage of the design process.\n\nTake your {category.lower()} experience to the next level with the {product_name} - where superior quality meets exceptional performance for those who refuse to compromise."
+        }
+    }
+    
+    # Default template for categories not in our list
+    default_template = {
+        "title": f"{product_name} - Premium Quality [FEATURE1] with [FEATURE2] - Professional [CATEGORY] for [BENEFIT]",
+        "description": f"Introducing the remarkable {product_name}, a standout product in the {category} market designed to exceed your expectations. This premium item combines innovative design with exceptional functionality to deliver a superior experience.\n\nMeticulously crafted with attention to detail, the {product_name} addresses common challenges while offering unique benefits that set it apart from competitors. Every aspect has been carefully considered to ensure optimal performance and user satisfaction.\n\nThe {product_name} represents our commitment to quality and innovation in the {category} industry. We've incorporated feedback from customers and experts alike to create a product that truly meets the needs of its users.\n\nWhether you're a professional seeking reliable equipment or an enthusiast looking for quality, the {product_name} delivers consistent results you can count on. Its versatile design adapts to various situations, providing flexible solutions for diverse requirements.\n\nChoose the {product_name} for a combination of quality, performance, and value that's unmatched in today's market. Join our satisfied customers who have made this exceptional product an essential part of their lives."
+    }
+    
+    # Select the appropriate template or use default
+    template = templates.get(category, default_template)
+    
+    # Process features for title and description
+    main_features = features[:2] if len(features) >= 2 else features + ["Quality"] * (2 - len(features))
+    benefit = "Maximum Performance" if not features else features[0].split(" ")[-1]
+    
+    # Replace placeholders in title
+    title = template["title"]
+    title = title.replace("[FEATURE1]", main_features[0])
+    title = title.replace("[FEATURE2]", main_features[1])
+    title = title.replace("[CATEGORY]", category)
+    title = title.replace("[BENEFIT]", benefit)
+    title = title.replace("[YEAR]", "2025")
+    
+    # Generate benefit-focused bullet points based on features
+    bullet_templates = [
+        "[FEATURE]: Enjoy [BENEFIT] with our advanced design that sets new standards in [CATEGORY].",
+        "PREMIUM [FEATURE]: Experience exceptional [BENEFIT] that makes everyday tasks easier and more efficient.",
+        "INNOVATIVE [FEATURE]: Discover the difference with our unique approach to [BENEFIT] that competitors can't match.",
+        "DURABLE [FEATURE]: Rely on long-lasting performance with quality construction designed for [BENEFIT].",
+        "USER-FRIENDLY [FEATURE]: Appreciate the intuitive design that makes [BENEFIT] accessible to everyone.",
+        "VERSATILE [FEATURE]: Adapt to changing needs with flexible functionality perfect for various [BENEFIT] scenarios.",
+        "PROFESSIONAL-GRADE [FEATURE]: Achieve results comparable to professional services with our [BENEFIT] solution.",
+        "ECO-FRIENDLY [FEATURE]: Make responsible choices with our sustainable approach to [BENEFIT]."
+    ]
+    
+    bullets = []
+    for i, feature in enumerate(features[:5]):
+        if i < len(bullet_templates):
+            bullet = bullet_templates[i].replace("[FEATURE]", feature.upper())
+            bullet = bullet.replace("[BENEFIT]", "enhanced performance" if not benefit else benefit)
+            bullet = bullet.replace("[CATEGORY]", category)
+            bullets.append(bullet)
+    
+    # Pad bullets to exactly 5 if needed
+    if len(bullets) < 5:
+        for i in range(5 - len(bullets)):
+            index = (len(bullets) + i) % len(bullet_templates)
+            generic_feature = f"Quality Feature {i+1}"
+            bullet = bullet_templates[index].replace("[FEATURE]", generic_feature.upper())
+            bullet = bullet.replace("[BENEFIT]", "enhanced performance" if not benefit else benefit)
+            bullet = bullet.replace("[CATEGORY]", category)
+            bullets.append(bullet)
+    
+    # Use user-provided keywords if available, or generate them
+    if target_keywords and isinstance(target_keywords, list) and len(target_keywords) > 0:
+        # Use user-provided keywords
+        keywords = target_keywords
+    else:
+        # Generate keywords based on product features and category
+        keywords_templates = {
+            "Electronics": ["tech", "gadget", "smart", "wireless", "digital", "device", "electronic", "innovative"],
+            "Home & Kitchen": ["home", "kitchen", "decor", "appliance", "cookware", "furniture", "household", "storage"],
+            "Beauty & Personal Care": ["beauty", "skincare", "haircare", "cosmetic", "organic", "natural", "wellness", "spa"],
+            "Sports & Outdoors": ["sports", "fitness", "outdoor", "training", "athletic", "performance", "equipment", "gear"]
+        }
+        
+        base_keywords = keywords_templates.get(category, ["quality", "premium", "professional", "durable"])
+        
+        # Extract potential keywords from features
+        feature_words = []
+        for feature in features:
+            words = feature.lower().split()
+            feature_words.extend([word for word in words if len(word) > 3 and word not in ["with", "that", "this", "from", "your", "will", "have", "more", "than"]])
+        
+        # Generate final keywords
+        product_words = product_name.lower().split()
+        keywords = list(set(base_keywords + feature_words + product_words))[:15]  # Limit to 15 keywords
+    
+    keywords_str = ", ".join(keywords)
+    
+    # Generate competitor URLs based on product name and category
+    competitor_base_urls = [
+        "https://www.amazon.com/dp/B08N5LNQCX",
+        "https://www.amazon.com/dp/B07PXGQC1Q",
+        "https://www.amazon.com/dp/B096TWFVLG",
+        "https://www.amazon.com/dp/B08KGYVKRT",
+        "https://www.amazon.com/dp/B09B9XJ4KG"
+    ]
+    
+    # Generate competitor titles based on product and category
+    competitor_titles = [
+        f"Premium {product_name} with Advanced Features - Best Seller 2025",
+        f"Professional {category} {product_name} - Top Rated on Amazon",
+        f"{product_name} Elite Series - #1 Customer Choice for {category}",
+        f"Ultimate {product_name} {category} Solution - Fast Shipping",
+        f"Deluxe {product_name} Pro - High Performance {category} Product"
+    ]
+    
+    # Create competitor URLs with titles
+    competitor_urls = []
+    for i in range(min(5, len(competitor_base_urls))):
+        competitor_urls.append({
+            "url": competitor_base_urls[i],
+            "title": competitor_titles[i]
+        })
+
+    return {"title": title, "bullets": bullets, "description": template["description"],
+            "keywords": keywords, "competitor_urls": competitor_urls}
+
+
+def _products(count, seed=7):
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        features = rng.sample(FEATURES, rng.randint(1, 7))
+        keywords = rng.sample(["air purifier", "hepa", "quiet", "allergy"], 3) if i % 4 == 0 else None
+        products.append((f"Air Purifier Model {i % 500}", rng.choice(CATEGORIES), features, keywords))
+    return products
+
+
+def _rate(generate, products, analysis):
+    started = time.perf_counter()
+    for product_name, category, features, keywords in products:
+        listing = generate(product_name, category, features, keywords)
+        if analysis:
+            seo_analysis.analyze_listing(product_name, listing["title"], listing["bullets"],
+                                         listing["description"], listing["keywords"])
+    return len(products) / (time.perf_counter() - started)
+
+
+def _check(products):
+    for product in products:
+        old = _legacy_template_listing(*product)
+        new = listing_templates.generate_template_listing(*product)
+        if product[3] is None:
+            old_keywords, new_keywords = set(old.pop("keywords")), set(new.pop("keywords"))
+            if len(old_keywords) != len(new_keywords) or (len(new_keywords) < 15 and old_keywords != new_keywords):
+                raise AssertionError(f"Keywords differ for {product}")
+        if old != new:
+            raise AssertionError(f"Outputs differ for {product}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=20000)
+    parser.add_argument("--analysis", action="store_true", help="include seo_analysis.analyze_listing")
+    args = parser.parse_args()
+
+    products = _products(args.listings)
+    _check(products[:1000])
+    print(f"{'version':<18}{'listings/s':>12}")
+    for label, generate in (("legacy", _legacy_template_listing),
+                            ("listing_templates", listing_templates.generate_template_listing)):
+        print(f"{label:<18}{_rate(generate, products, args.analysis):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Tail latency and failures of LLM calls with and without llm_transport.
+
+A fault-injecting stub LLM server answers after --latency seconds; a share
+of requests (--slow-rate) stalls for --slow-latency extra seconds and a share
+(--error-rate) fails with 429/500/503. --requests chat completions are sent
+with --concurrency in flight for each client setup:
+
+- "sdk default": a plain AsyncOpenAI client (its built-in 2 retries, 10 min
+  timeout), like the clients the apps used to create;
+- "transport": llm_transport.LLMTransport with backoff, a --timeout per
+  attempt and a --deadline per call;
+- "transport + hedge": the same with hedging after the p95 latency.
+
+--warmup requests go first so the hedge delay has latency samples. Every
+setup gets a fresh stub with the same fault seed.
+
+Usage:
+    python benchmarks/bench_transport.py --requests 400 --concurrency 20 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import AsyncOpenAI  # noqa: E402
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+from llm_transport import LLMTransport  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Write a listing for an air purifier."}]
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))]
+
+
+async def _run(args, call, client):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples = []
+    failures = 0
+
+    async def one(measure):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                failures += measure
+                return
+            if measure:
+                samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(False) for _ in range(args.warmup)))
+    await asyncio.gather(*(one(True) for _ in range(args.requests)))
+    await client.close()
+    return samples, failures
+
+
+def _setup(args, name, stub):
+    if name == "sdk default":
+        client = AsyncOpenAI(base_url=stub.base_url, api_key="stub")
+        return lambda: client.chat.completions.create(model="gpt-4o", messages=MESSAGES), client, None
+    transport = LLMTransport(timeout=args.timeout, deadline=args.deadline, hedge=name.endswith("hedge"),
+                             max_connections=args.concurrency * 2)
+    client = transport.async_openai_client(base_url=stub.base_url, api_key="stub")
+    return (lambda: transport.acall(client.chat.completions.create, key="bench",
+                                    model="gpt-4o", messages=MESSAGES)), client, transport
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=2.0, help="transport attempt timeout in seconds")
+    parser.add_argument("--deadline", type=float, default=10.0, help="transport deadline in seconds")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'client':<20}{'p50':>9}{'p99':>9}{'max':>9}{'failed':>8}{'LLM calls':>11}{'hedges':>8}")
+    for name in ("sdk default", "transport", "transport + hedge"):
+        with StubLLMServer(latency=args.latency, error_rate=args.error_rate, slow_rate=args.slow_rate,
+                           slow_latency=args.slow_latency, seed=7) as stub:
+            call, client, transport = _setup(args, name, stub)
+            samples, failures = asyncio.run(_run(args, call, client))
+            hedges = transport.stats()["hedges"] if transport else 0
+            print(f"{name:<20}{statistics.median(samples) * 1000:>6.0f} ms"
+                  f"{_percentile(samples, 99) * 1000:>6.0f} ms{max(samples) * 1000:>6.0f} ms"
+                  f"{failures:>8}{stub.completions:>11}{hedges:>8}")
+
+
+if __name__ == "__main__":
+    main()
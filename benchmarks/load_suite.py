@@ -0,0 +1,336 @@
+"""
+Load test of the three apps against a stub LLM, with results comparable across commits.
+
+Starts the stub OpenAI-compatible server (stub_llm_server.py) in this
+process with the given latency, token rate and error rate, then runs each
+target app in its own server process, pointed at the stub:
+
+* ``main`` - main.py under uvicorn, POST /api/generate-listing
+* ``app``  - app/main.py under uvicorn, POST /generate-listing
+* ``app1`` - app1.py under the Flask server (threaded), POST /api/generate-listing
+
+Each target gets --warmup requests, then for every --concurrency level a
+closed loop of that many clients sends --requests requests in total. Every
+request is for a different product, so the listing caches and request
+coalescing do not hide the LLM. For each level the suite records the
+throughput, p50/p95/p99/max latency, errors (non-2xx responses) and the
+server's resident and peak memory (from /proc, so Linux only). The
+microbenchmarks of microbench.py run as well, unless --no-micro is given.
+
+Results go to a JSON file named after the current commit (default
+benchmarks/results/<commit>.json) together with the settings, Python
+version and CPU count. --compare prints the change between two such
+files.
+
+Usage:
+    python benchmarks/load_suite.py --targets main app app1 --concurrency 1 8 32 --requests 200 \\
+        --latency 0.5 --tokens-per-second 100 --error-rate 0.01
+    python benchmarks/load_suite.py --compare benchmarks/results/a1b2c3d.json benchmarks/results/e4f5a6b.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import microbench  # noqa: E402
+from stub_llm_server import StubLLMServer, token_delay_for  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+FEATURES = ["Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft"]
+
+
+def _main_payload(n):
+    return {"title": f"AeroPure Air Purifier {n}", "category": "Home & Kitchen", "features": FEATURES,
+            "keywords": "air purifier, hepa filter", "competitor_urls": []}
+
+
+def _app_payload(n):
+    return {"product_name": f"AeroPure Air Purifier {n}", "category": "Home & Kitchen", "features": FEATURES}
+
+
+def _app1_payload(n):
+    return {"product_name": f"AeroPure Air Purifier {n}", "category": "Home & Kitchen", "features": FEATURES,
+            "keywords": ["air purifier", "hepa filter"]}
+
+
+# name: (server command after the Python executable, request path, payload factory)
+TARGETS = {
+    "main": (["-m", "uvicorn", "main:app", "--log-level", "warning"], "/api/generate-listing", _main_payload),
+    "app": (["-m", "uvicorn", "app.main:app", "--log-level", "warning"], "/generate-listing", _app_payload),
+    "app1": (["-m", "flask", "--app", "app1", "run", "--with-threads"], "/api/generate-listing",
+             _app1_payload),
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _memory_mib(pid):
+    """Return (resident, peak resident) MiB of a process, or (None, None) without /proc."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("VmRSS", "VmHWM"):
+                    values[name] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        return None, None
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def _percentile(sorted_samples, percent):
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, max(0, int(round(percent / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+class _Server:
+    """One target app running in a child process."""
+
+    def __init__(self, name, env, log):
+        command, self.path, self.payload = TARGETS[name]
+        self.port = _free_port()
+        command = command + ["--host", "127.0.0.1", "--port", str(self.port)]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.process = subprocess.Popen([sys.executable] + command, cwd=REPO_DIR, env=env, stdout=log,
+                                        stderr=subprocess.STDOUT)
+
+    async def wait_ready(self, http, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode}")
+            try:
+                await http.get(f"{self.base_url}/", timeout=1.0)
+                return
+            except Exception:
+                await asyncio.sleep(0.1)
+        raise RuntimeError(f"Server on {self.base_url} did not start within {timeout}s")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+async def _drive(http, server, concurrency, requests, first_id):
+    """Send ``requests`` requests from ``concurrency`` clients; return latencies and errors."""
+    latencies = []
+    errors = {}
+    next_id = iter(range(first_id, first_id + requests))
+
+    async def client():
+        for n in next_id:
+            started = time.perf_counter()
+            try:
+                response = await http.post(server.base_url + server.path, json=server.payload(n))
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if isinstance(status, int) and status < 300:
+                latencies.append(elapsed)
+            else:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _run_target(name, env, args, log):
+    import httpx
+
+    rows = []
+    server = _Server(name, env, log)
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 1)
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as http:
+            await server.wait_ready(http)
+            await _drive(http, server, min(4, args.warmup or 1), args.warmup, 0)
+            first_id = args.warmup
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = await _drive(http, server, concurrency, args.requests, first_id)
+                first_id += args.requests
+                latencies.sort()
+                rss, peak_rss = _memory_mib(server.process.pid)
+                ms = (lambda seconds: round(seconds * 1000, 2) if seconds is not None else None)
+                rows.append({
+                    "target": name,
+                    "concurrency": concurrency,
+                    "requests": args.requests,
+                    "ok": len(latencies),
+                    "errors": errors,
+                    "elapsed_s": round(elapsed, 3),
+                    "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+                    "p50_ms": ms(statistics.median(latencies)) if latencies else None,
+                    "p95_ms": ms(_percentile(latencies, 95)),
+                    "p99_ms": ms(_percentile(latencies, 99)),
+                    "max_ms": ms(latencies[-1]) if latencies else None,
+                    "rss_mib": rss,
+                    "peak_rss_mib": peak_rss,
+                })
+                _print_load_row(rows[-1])
+    finally:
+        server.stop()
+    return rows
+
+
+def _print_load_header():
+    print(f"{'target':<8}{'conc':>6}{'ok':>7}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'RSS MiB':>9}{'peak':>8}", flush=True)
+
+
+def _print_load_row(row):
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-".rjust(int(spec.split(".")[0] or 0))
+    print(f"{row['target']:<8}{row['concurrency']:>6}{row['ok']:>7}{sum(row['errors'].values()):>6}"
+          f"{fmt(row['throughput_rps'], '9.1f')}{fmt(row['p50_ms'], '10.1f')}{fmt(row['p95_ms'], '10.1f')}"
+          f"{fmt(row['p99_ms'], '10.1f')}{fmt(row['rss_mib'], '9.1f')}{fmt(row['peak_rss_mib'], '8.1f')}",
+          flush=True)
+
+
+def _change(old, new):
+    if old in (None, 0) or new is None:
+        return "-"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(base_path, new_path):
+    """Print the change of every load and microbenchmark figure between two results files."""
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"base {base['commit']} ({base['created_at']})  ->  new {new['commit']} ({new['created_at']})")
+    if base.get("config") != new.get("config"):
+        print("warning: the runs used different settings, see their config")
+
+    base_load = {(r["target"], r["concurrency"]): r for r in base.get("load", [])}
+    print(f"\n{'target':<8}{'conc':>6}{'req/s':>18}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'peak MiB':>16}")
+    for row in new.get("load", []):
+        old = base_load.get((row["target"], row["concurrency"]))
+        if old is None:
+            continue
+        cells = [f"{old[k] or 0:.0f}->{row[k] or 0:.0f} {_change(old[k], row[k]):>7}"
+                 for k in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mib")]
+        print(f"{row['target']:<8}{row['concurrency']:>6}" + "".join(f"{cell:>18}" for cell in cells))
+
+    base_micro = {r["name"]: r for r in base.get("micro", [])}
+    if new.get("micro") and base_micro:
+        print(f"\n{'microbenchmark':<40}{'us/call':>24}")
+        for row in new["micro"]:
+            old = base_micro.get(row["name"])
+            if old is not None:
+                cell = f"{old['us_per_call']:.1f}->{row['us_per_call']:.1f} " \
+                       f"{_change(old['us_per_call'], row['us_per_call']):>7}"
+                print(f"{row['name']:<40}{cell:>24}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=["main", "app", "app1"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="concurrent clients, one run per value")
+    parser.add_argument("--requests", type=int, default=200, help="requests per run")
+    parser.add_argument("--warmup", type=int, default=10, help="requests before the first run")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub seconds before answering")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="stub generation speed (0: answer after --latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub calls that fail")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the stub's fault injection")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--no-micro", action="store_true", help="skip the microbenchmarks")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two results files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit, dirty = _git_commit()
+    results = {
+        "commit": commit + ("-dirty" if dirty else ""),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {"targets": args.targets, "concurrency": args.concurrency, "requests": args.requests,
+                   "warmup": args.warmup, "latency": args.latency,
+                   "tokens_per_second": args.tokens_per_second, "error_rate": args.error_rate,
+                   "seed": args.seed},
+        "load": [],
+        "micro": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp, StubLLMServer(
+            latency=args.latency, token_delay=token_delay_for(args.tokens_per_second),
+            error_rate=args.error_rate, seed=args.seed) as stub:
+        env = dict(os.environ,
+                   OPENAI_BASE_URL=stub.base_url,
+                   OPENAI_API_KEY="stub",
+                   LLM_BACKENDS="openai:gpt-4o",
+                   DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   PYTHONPATH=REPO_DIR)
+        env.pop("ANTHROPIC_API_KEY", None)
+        log_path = os.path.join(tmp, "servers.log")
+        with open(log_path, "w") as log:
+            _print_load_header()
+            for name in args.targets:
+                try:
+                    results["load"].extend(asyncio.run(_run_target(name, env, args, log)))
+                except RuntimeError as e:
+                    log.flush()
+                    with open(log_path, encoding="utf-8", errors="replace") as f:
+                        tail = f.read()[-2000:]
+                    print(f"{name}: {str(e)}\n{tail}", file=sys.stderr)
+        results["stub"] = {"completions": stub.completions, "errors": stub.errors}
+
+    if not args.no_micro:
+        print(f"\n{'microbenchmark':<40}{'us/call':>12}{'calls/s':>12}")
+        results["micro"] = microbench.run()
+        for row in results["micro"]:
+            print(f"{row['name']:<40}{row['us_per_call']:>12.1f}{row['calls_per_s']:>12.0f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Microbenchmarks of the CPU-bound pieces behind app1: SEO analyzers and template generator.
+
+Each benchmark calls one function on a fixed, seeded set of listings and
+reports the best time per call over --repeat rounds (each round runs for
+at least --min-time seconds), so numbers are comparable across commits on
+the same machine. run() returns the rows that load_suite.py stores in its
+results file; run this file on its own for a quick look.
+
+Usage:
+    python benchmarks/microbench.py --repeat 5 --min-time 0.2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import listing_templates  # noqa: E402
+import seo_analysis  # noqa: E402
+
+CATEGORIES = ["Electronics", "Home & Kitchen", "Beauty & Personal Care", "Sports & Outdoors", "Pet Supplies"]
+FEATURES = [
+    "Ultra-quiet 25dB operation", "True HEPA H13 filter", "Covers 500 sq ft", "Smart air quality sensor",
+    "Energy efficient motor", "Sleep mode with timer", "Washable pre-filter", "Compact portable design",
+]
+KEYWORDS = ["air purifier", "hepa filter", "quiet", "bedroom", "allergies", "smart", "large room",
+            "pet hair", "smoke", "dust", "energy efficient", "night mode"]
+
+# Listings per benchmark call set; every call of a round cycles through them
+LISTINGS = 32
+
+
+def _products(seed=7):
+    rng = random.Random(seed)
+    products = []
+    for n in range(LISTINGS):
+        products.append({
+            "product_name": f"AeroPure {n} Air Purifier",
+            "category": rng.choice(CATEGORIES),
+            "features": rng.sample(FEATURES, rng.randint(2, 6)),
+            "keywords": rng.sample(KEYWORDS, rng.randint(3, 10)),
+        })
+    return products
+
+
+def _listings(products):
+    listings = []
+    for product in products:
+        listing = listing_templates.generate_template_listing(product["product_name"], product["category"],
+                                                              product["features"], product["keywords"])
+        listing["product_name"] = product["product_name"]
+        listings.append(listing)
+    return listings
+
+
+def _benchmarks():
+    products = _products()
+    listings = _listings(products)
+    known = [p for p in products if p["category"] != "Pet Supplies"]
+    unknown = [dict(p, category="Pet Supplies") for p in products]
+
+    def cycle(items, fn):
+        items = list(items)
+        state = {"i": 0}
+
+        def call():
+            item = items[state["i"] % len(items)]
+            state["i"] += 1
+            fn(item)
+        return call
+
+    return [
+        ("template: known category", cycle(known, lambda p: listing_templates.generate_template_listing(
+            p["product_name"], p["category"], p["features"], p["keywords"]))),
+        ("template: default category", cycle(unknown, lambda p: listing_templates.generate_template_listing(
+            p["product_name"], p["category"], p["features"], p["keywords"]))),
+        ("seo: keyword density", cycle(listings, lambda l: seo_analysis.analyze_keyword_density(
+            l["description"], l["keywords"]))),
+        ("seo: title length", cycle(listings, lambda l: seo_analysis.analyze_title_length(l["title"]))),
+        ("seo: keyword placement", cycle(listings, lambda l: seo_analysis.analyze_keyword_placement(
+            l["title"], l["bullets"], l["keywords"]))),
+        ("seo: build_seo_analysis", cycle(listings, lambda l: seo_analysis.build_seo_analysis(
+            l["title"], l["bullets"], l["description"], l["keywords"]))),
+        ("aeo: apply_aeo_strategies", cycle(listings, lambda l: seo_analysis.apply_aeo_strategies(
+            l["product_name"], l["title"], l["bullets"], l["description"], l["keywords"]))),
+        ("psych: apply_psychological_techniques", cycle(
+            listings, lambda l: seo_analysis.apply_psychological_techniques(l["bullets"], l["description"]))),
+        ("analyze_listing (all three)", cycle(listings, lambda l: seo_analysis.analyze_listing(
+            l["product_name"], l["title"], l["bullets"], l["description"], l["keywords"]))),
+    ]
+
+
+def _best_per_call(fn, repeat, min_time):
+    # Calibrate the number of calls per round, then keep the best round
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        if time.perf_counter() - started >= min_time:
+            break
+        calls *= 2
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        per_call = (time.perf_counter() - started) / calls
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+
+def run(repeat=5, min_time=0.2):
+    """
+    Run every microbenchmark.
+
+    Args:
+        repeat (int): Timed rounds per benchmark; the best one counts
+        min_time (float): Shortest round in seconds
+
+    Returns:
+        list: One {"name", "us_per_call", "calls_per_s"} dict per benchmark
+    """
+    rows = []
+    for name, fn in _benchmarks():
+        seconds = _best_per_call(fn, repeat, min_time)
+        rows.append({"name": name, "us_per_call": round(seconds * 1e6, 3),
+                     "calls_per_s": round(1 / seconds, 1)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed round")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<40}{'us/call':>12}{'calls/s':>12}")
+    for row in run(args.repeat, args.min_time):
+        print(f"{row['name']:<40}{row['us_per_call']:>12.1f}{row['calls_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Local HTTP server for saved competitor pages, used by the benchmarks.
+
+Serves the HTML files in benchmarks/fixtures/pages (or --directory):
+GET /pages/<file name> returns that file, and GET /dp/<n> returns the n-th
+file (cycling), so any number of distinct competitor URLs can be made from a
+few saved pages. Responses carry an ETag and a Last-Modified header and
+conditional requests (If-None-Match / If-Modified-Since) are answered with
+304. Every response waits --latency seconds, standing in for a remote site.
+
+Usage:
+    python benchmarks/page_fixture_server.py --port 8902 --latency 0.3
+
+Then fetch e.g. http://127.0.0.1:8902/dp/1 or
+http://127.0.0.1:8902/pages/amazon_air_purifier.html
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Request handler; pages and settings live on self.server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def do_GET(self):
+        server = self.server
+        page = server.page_for(self.path)
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        if page is None:
+            self._send(404, b"Not found")
+            return
+        body, etag, last_modified = page
+        if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == last_modified):
+            with server.lock:
+                server.not_modified += 1
+            self._send(304, b"", {"ETag": etag, "Last-Modified": last_modified})
+            return
+        self._send(200, body, {"ETag": etag, "Last-Modified": last_modified,
+                               "Content-Type": "text/html; charset=utf-8"})
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class _PageHTTPServer(ThreadingHTTPServer):
+    """HTTP server holding the saved pages and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, directory, latency):
+        super().__init__(address, _PageHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.pages = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if name.endswith(".html"):
+                with open(path, "rb") as f:
+                    body = f.read()
+                self.set_page(name, body, os.path.getmtime(path))
+
+    def set_page(self, name, body, modified=None):
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        last_modified = formatdate(modified or time.time(), usegmt=True)
+        self.pages[name] = (body, etag, last_modified)
+
+    def page_for(self, path):
+        path = path.split("?")[0]
+        if path.startswith("/pages/"):
+            return self.pages.get(path[len("/pages/"):])
+        if path.startswith("/dp/") and path[len("/dp/"):].isdigit() and self.pages:
+            names = sorted(self.pages)
+            return self.pages[names[int(path[len("/dp/"):]) % len(names)]]
+        return None
+
+
+class PageFixtureServer:
+    """
+    Threaded fixture server that can be started in-process.
+
+    Args:
+        directory (str): Directory of saved .html pages
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free port
+        latency (float): Seconds to wait before every response
+    """
+
+    def __init__(self, directory=FIXTURE_DIR, host="127.0.0.1", port=0, latency=0.0):
+        self._httpd = _PageHTTPServer((host, port), directory, latency)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self, count):
+        """Return ``count`` distinct product URLs (cycling over the saved pages)."""
+        return [f"{self.base_url}/dp/{n}" for n in range(count)]
+
+    @property
+    def requests(self):
+        """Number of requests served so far."""
+        return self._httpd.requests
+
+    @property
+    def not_modified(self):
+        """Number of 304 responses served so far."""
+        return self._httpd.not_modified
+
+    def set_page(self, name, body):
+        """Replace (or add) a page, giving it a new ETag."""
+        self._httpd.set_page(name, body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve saved competitor pages")
+    parser.add_argument("--directory", default=FIXTURE_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8902)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    args = parser.parse_args()
+
+    server = PageFixtureServer(args.directory, args.host, args.port, args.latency)
+    print(f"Page fixture server listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""
+Local stub of the OpenAI chat completions API used by the benchmarks.
+
+The server answers POST /v1/chat/completions with a canned Amazon listing
+(only the sections named in the prompt's JSON schema) after a configurable
+delay, so benchmarks can measure our own overhead and concurrency behaviour
+without calling the real provider. Requests with "stream": true are answered
+with SSE chunks of CHUNK_CHARS characters, one every --token-delay seconds,
+after the initial --latency; non-streamed responses wait for the same total
+time.
+
+POST /v1/messages is answered the same way in the format of Anthropic's
+Messages API (not streamed), so the stub can stand in for either provider.
+
+Faults can be injected for resilience benchmarks: --error-rate of the
+completion requests fail with one of ERROR_STATUSES (429 with Retry-After)
+and --slow-rate of them take --slow-latency extra seconds.
+
+Completions longer than the request's max_tokens are cut off there and
+finish with "length". Chat completions carry the openai-processing-ms
+and x-request-id headers OpenAI sends. Responses report token usage estimated at
+CHARS_PER_TOKEN characters per token, and the server emulates provider-side
+prompt caching like OpenAI's: once a prompt of at least --cache-min-tokens
+tokens has been seen, later prompts sharing its prefix report the shared
+part, in CACHE_BLOCK_TOKENS blocks, as ``prompt_tokens_details.cached_tokens``.
+
+Usage:
+    python benchmarks/stub_llm_server.py --port 8901 --latency 2.0 --token-delay 0.01
+    python benchmarks/stub_llm_server.py --port 8901 --latency 0.5 --tokens-per-second 80 --error-rate 0.05
+
+Point the app at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8901/v1 OPENAI_API_KEY=stub
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8901 ANTHROPIC_API_KEY=stub
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned listing returned for every completion request
+STUB_LISTING = {
+    "title": "Ultra Quiet Air Purifier with True HEPA Filter - Smart Air Quality Monitor for Large Rooms up to 500 sq ft",
+    "bullets": [
+        "ADVANCED HEPA FILTRATION: Removes 99.97% of dust, pollen, smoke, and other particles as small as 0.3 microns",
+        "WHISPER-QUIET OPERATION: With noise levels as low as 25dB, this air purifier won't disturb your sleep",
+        "PERFECT FOR LARGE SPACES: Efficiently cleans the air in rooms up to 500 square feet",
+        "INTELLIGENT AIR QUALITY MONITORING: Built-in sensors automatically adjust fan speed",
+        "ENERGY-SAVING DESIGN: Eco-mode reduces power consumption by up to 50%"
+    ],
+    "description": (
+        "Transform your home environment with our Ultra Quiet Air Purifier, designed to provide "
+        "you with clean, fresh air without the noise.\n\nEngineered for modern living, our air "
+        "purifier operates at just 25dB on its lowest setting.\n\nPerfect for large spaces up to "
+        "500 square feet, this versatile purifier is ideal for living rooms, bedrooms and offices."
+    ),
+    "keywords": ["air purifier", "hepa filter", "quiet", "home"]
+}
+
+# Analysis sections added when the prompt's JSON schema asks for them
+STUB_ANALYSIS = {
+    "seo_analysis": {
+        "title_analysis": {
+            "character_count": 104,
+            "character_limit": 200,
+            "within_limit": True,
+            "recommendation": "Title length is good. Consider adding the filter grade and room size earlier."
+        },
+        "keyword_placement": {
+            "keywords_in_title": ["air purifier", "hepa filter", "quiet"],
+            "keywords_in_bullets": ["hepa filter", "quiet", "air purifier"],
+            "missing_keywords": ["home"]
+        },
+        "keyword_density": {
+            "air purifier": {"count": 4, "percentage": 2.1},
+            "hepa filter": {"count": 2, "percentage": 1.0},
+            "quiet": {"count": 3, "percentage": 1.5},
+            "home": {"count": 1, "percentage": 0.5}
+        },
+        "seo_score": {"score": 82, "max_score": 100, "percentage": 82, "rating": "Good"},
+        "recommendations": [
+            "Add 'home' to at least one bullet point",
+            "Mention the room size in the title",
+            "Use the primary keyword in the first sentence of the description"
+        ]
+    },
+    "aeo_analysis": {
+        "strategies_applied": [
+            "Primary keyword at the start of the title",
+            "Benefit-led bullet points with capitalized headers",
+            "Specific measurable claims (25dB, 500 sq ft, 99.97%)"
+        ],
+        "recommendations": [
+            "Add backend search terms for synonyms such as 'air cleaner'",
+            "Include usage scenarios for bedrooms and nurseries"
+        ]
+    },
+    "psychological_techniques": {
+        "applied_techniques": ["Authority", "Social proof", "Loss aversion"],
+        "impact_analysis": {
+            "scarcity": "Not used; a limited-time filter bundle would add urgency.",
+            "social_proof": "Implied by 'trusted by families'; reviews could be referenced.",
+            "authority": "True HEPA certification and the 99.97% figure build credibility.",
+            "reciprocity": "A free replacement pre-filter would trigger reciprocity."
+        }
+    }
+}
+
+# Characters per streamed chunk, roughly one token
+CHUNK_CHARS = 4
+
+# Statuses of injected errors
+ERROR_STATUSES = (429, 500, 503)
+
+# Usage accounting and prompt-cache emulation
+CHARS_PER_TOKEN = 4
+CACHE_BLOCK_TOKENS = 128
+
+
+def token_delay_for(tokens_per_second):
+    """Return the token_delay that makes the stub generate ``tokens_per_second``."""
+    if not tokens_per_second:
+        return 0.0
+    return CHUNK_CHARS / CHARS_PER_TOKEN / tokens_per_second
+
+
+def _usage(prompt_tokens, cached_tokens, content):
+    completion_tokens = len(content) // CHARS_PER_TOKEN
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+
+
+def _completion_body(model, content, usage, finish_reason="stop"):
+    """Build an OpenAI-compatible chat completion response body."""
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": finish_reason
+        }],
+        "usage": usage
+    }
+
+
+def _chunk_body(model, content, finish_reason=None):
+    """Build an OpenAI-compatible streamed chat completion chunk."""
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+
+
+def _message_body(model, content, usage, finish_reason="stop"):
+    """Build an Anthropic-compatible Messages API response body."""
+    return {
+        "id": "msg_stub",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": content}],
+        "stop_reason": "max_tokens" if finish_reason == "length" else "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": usage["prompt_tokens"] - usage["prompt_tokens_details"]["cached_tokens"],
+                  "cache_read_input_tokens": usage["prompt_tokens_details"]["cached_tokens"],
+                  "output_tokens": usage["completion_tokens"]}
+    }
+
+
+def _listing_for(request):
+    """
+    Return the canned listing with the sections the request's schema names.
+
+    Prompts without a listing schema (competitor analysis, free text) get
+    STUB_LISTING.
+    """
+    system = str(request.get("system", "")) + "".join(
+        str(m.get("content", "")) for m in request.get("messages", []) if m.get("role") == "system")
+    full = dict(STUB_LISTING, **STUB_ANALYSIS)
+    selected = {key: value for key, value in full.items() if f'\n  "{key}":' in system}
+    return selected or STUB_LISTING
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Request handler; server settings live on self.server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        # /v1/messages answers like Anthropic's Messages API (not streamed)
+        messages_api = self.path.endswith("/messages")
+        if not (messages_api or self.path.endswith("/chat/completions")):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        with self.server.lock:
+            self.server.completions += 1
+            fault = self.server.rng.random()
+            status = self.server.rng.choice(ERROR_STATUSES)
+            slow = self.server.rng.random() < self.server.slow_rate
+
+        if fault < self.server.error_rate:
+            with self.server.lock:
+                self.server.errors += 1
+            self._send_json(status, {"error": {"message": f"injected {status}", "type": "stub_error"}},
+                            {"Retry-After": "0"} if status == 429 else None)
+            return
+        extra_latency = self.server.slow_latency if slow else 0.0
+
+        model = request.get("model", "stub")
+        content = json.dumps(_listing_for(request))
+        messages = request.get("messages", [])
+        if messages_api and messages and messages[-1].get("role") == "assistant":
+            # Continue a prefilled assistant turn such as "{"
+            content = content[len(messages[-1].get("content", "")):]
+        finish_reason = "stop"
+        max_tokens = request.get("max_tokens")
+        if max_tokens and len(content) > max_tokens * CHARS_PER_TOKEN:
+            content = content[:max_tokens * CHARS_PER_TOKEN]
+            finish_reason = "length"
+        chunks = [content[i:i + CHUNK_CHARS] for i in range(0, len(content), CHUNK_CHARS)]
+        prompt = str(request.get("system", "")) + "".join(str(m.get("content", "")) for m in messages)
+        usage = _usage(len(prompt) // CHARS_PER_TOKEN, self.server.cached_prefix_tokens(prompt), content)
+
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self._stream(model, chunks, usage if include_usage else None, finish_reason, extra_latency)
+            return
+
+        started = time.perf_counter()
+        time.sleep(self.server.latency + extra_latency + len(chunks) * self.server.token_delay)
+        if messages_api:
+            self._send_json(200, _message_body(model, content, usage, finish_reason))
+            return
+        # Like OpenAI, report the server-side processing time and a request id
+        headers = {"openai-processing-ms": str(round((time.perf_counter() - started) * 1000)),
+                   "x-request-id": f"req_stub_{random.getrandbits(48):012x}"}
+        self._send_json(200, _completion_body(model, content, usage, finish_reason), headers)
+
+    def _stream(self, model, chunks, usage=None, finish_reason="stop", extra_latency=0.0):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        time.sleep(self.server.latency + extra_latency)
+        try:
+            for piece in chunks:
+                self._write_event(_chunk_body(model, piece))
+                if self.server.token_delay:
+                    time.sleep(self.server.token_delay)
+            self._write_event(_chunk_body(model, None, finish_reason))
+            if usage is not None:
+                self._write_event(dict(_chunk_body(model, None), choices=[], usage=usage))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # Clients may hang up as soon as they have seen [DONE]
+            self.close_connection = True
+
+    def _write_event(self, body):
+        self._write_chunk(f"data: {json.dumps(body)}\n\n".encode())
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Hedging clients cancel the slower of two requests
+            self.close_connection = True
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    """HTTP server holding the stub settings and the prompt-prefix cache."""
+
+    cache_min_tokens = 1024
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prefixes = set()
+        self._prefix_lock = threading.Lock()
+
+    def cached_prefix_tokens(self, prompt):
+        """Return the cached tokens of ``prompt`` and cache its prefixes."""
+        block_chars = CACHE_BLOCK_TOKENS * CHARS_PER_TOKEN
+        if len(prompt) < self.cache_min_tokens * CHARS_PER_TOKEN:
+            return 0
+        first = -(-self.cache_min_tokens // CACHE_BLOCK_TOKENS)
+        blocks = [hashlib.sha256(prompt[:n * block_chars].encode()).digest()
+                  for n in range(first, len(prompt) // block_chars + 1)]
+        cached = 0
+        with self._prefix_lock:
+            for n, digest in enumerate(blocks, start=first):
+                if digest not in self._prefixes:
+                    break
+                cached = n * CACHE_BLOCK_TOKENS
+            self._prefixes.update(blocks)
+        return cached
+
+
+class StubLLMServer:
+    """
+    Threaded stub LLM server that can be started in-process.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 picks a free port
+        latency (float): Seconds to wait before answering each completion
+        token_delay (float): Seconds between streamed chunks
+        cache_min_tokens (int): Shortest prompt whose prefix gets cached
+        error_rate (float): Share of completions answered with an error status
+        slow_rate (float): Share of completions delayed by ``slow_latency``
+        slow_latency (float): Extra seconds for slow completions
+        seed (int, optional): Seed of the fault injection
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, token_delay=0.0, cache_min_tokens=1024,
+                 error_rate=0.0, slow_rate=0.0, slow_latency=0.0, seed=None):
+        self._httpd = _StubHTTPServer((host, port), _StubHandler)
+        self._httpd.cache_min_tokens = cache_min_tokens
+        self._httpd.daemon_threads = True
+        self._httpd.latency = latency
+        self._httpd.token_delay = token_delay
+        self._httpd.completions = 0
+        self._httpd.errors = 0
+        self._httpd.error_rate = error_rate
+        self._httpd.slow_rate = slow_rate
+        self._httpd.slow_latency = slow_latency
+        self._httpd.rng = random.Random(seed)
+        self._httpd.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def root_url(self):
+        """Server root, the base URL of Anthropic clients."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self):
+        """Base URL of OpenAI clients."""
+        return f"{self.root_url}/v1"
+
+    @property
+    def completions(self):
+        """Number of completion requests served so far."""
+        return self._httpd.completions
+
+    @property
+    def errors(self):
+        """Number of injected error responses."""
+        return self._httpd.errors
+
+    def set_faults(self, error_rate=None, slow_rate=None, slow_latency=None):
+        """Change the injected faults of the running server."""
+        if error_rate is not None:
+            self._httpd.error_rate = error_rate
+        if slow_rate is not None:
+            self._httpd.slow_rate = slow_rate
+        if slow_latency is not None:
+            self._httpd.slow_latency = slow_latency
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--tokens-per-second", type=float,
+                        help="generation speed; overrides --token-delay")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024,
+                        help="shortest prompt whose prefix is cached")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests that are slow")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="extra seconds for slow requests")
+    args = parser.parse_args()
+
+    token_delay = token_delay_for(args.tokens_per_second) if args.tokens_per_second else args.token_delay
+    server = StubLLMServer(args.host, args.port, args.latency, token_delay, args.cache_min_tokens,
+                           args.error_rate, args.slow_rate, args.slow_latency)
+    print(f"Stub LLM server listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Circuit breaker for calls to a dependency that can go down (the LLM).
+
+closed     calls go through; failures are counted over a sliding window and
+           ``failure_threshold`` of them within ``window`` seconds open it
+open       calls are refused at once with CircuitOpenError, so callers can
+           serve their fallback without waiting for a timeout; after
+           ``reset_timeout`` seconds the breaker goes half-open
+half_open  up to ``half_open_max_calls`` probe calls go through; a
+           successful probe closes the breaker, a failed one opens it again
+
+Only transient errors (llm_transport.is_retryable: timeouts, connection
+errors, 429 and 5xx) count as failures. Anything else, such as a 400 for a
+bad request, says nothing about the dependency's health: it is re-raised
+without changing the breaker's state.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from llm_transport import is_retryable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_WINDOW_SECONDS = 60.0
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_HALF_OPEN_MAX_CALLS = 1
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling through an open circuit breaker."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    Args:
+        name (str): Name used in errors and stats
+        failure_threshold (int): Failures within ``window`` that open the breaker
+        window (float): Sliding window for counting failures, in seconds
+        reset_timeout (float): Seconds the breaker stays open before probing
+        half_open_max_calls (int): Concurrent probe calls while half-open
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, window=DEFAULT_WINDOW_SECONDS,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT, half_open_max_calls=DEFAULT_HALF_OPEN_MAX_CALLS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = deque()
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "successes": 0, "failures": 0, "short_circuited": 0,
+                       "opened": 0, "closed": 0}
+
+    @classmethod
+    def from_env(cls, name):
+        """
+        Create a breaker configured from environment variables.
+
+        CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_WINDOW, CIRCUIT_RESET_TIMEOUT and
+        CIRCUIT_HALF_OPEN_CALLS.
+        """
+        return cls(
+            name,
+            failure_threshold=int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)),
+            window=float(os.environ.get("CIRCUIT_WINDOW", DEFAULT_WINDOW_SECONDS)),
+            reset_timeout=float(os.environ.get("CIRCUIT_RESET_TIMEOUT", DEFAULT_RESET_TIMEOUT)),
+            half_open_max_calls=int(os.environ.get("CIRCUIT_HALF_OPEN_CALLS", DEFAULT_HALF_OPEN_MAX_CALLS)),
+        )
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        # Caller holds the lock
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._failures.clear()
+        self._stats["opened"] += 1
+
+    def allow(self):
+        """
+        Reserve a call if the breaker lets it through.
+
+        Every allowed call must be followed by record_success() or
+        record_failure().
+
+        Returns:
+            bool: False when the call should be short-circuited
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_max_calls):
+                self._stats["short_circuited"] += 1
+                return False
+            if state == HALF_OPEN:
+                self._probes += 1
+            self._stats["calls"] += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._failures.clear()
+                self._stats["closed"] += 1
+
+    def release(self):
+        """Give back an allowed call that ended without success or failure."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def record_failure(self):
+        now = time.monotonic()
+        with self._lock:
+            self._stats["failures"] += 1
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window:
+                self._failures.popleft()
+            if self._state == CLOSED and len(self._failures) >= self.failure_threshold:
+                self._open(now)
+
+    def _record_error(self, error):
+        if is_retryable(error):
+            self.record_failure()
+        else:
+            # Not the dependency's fault: free a half-open probe slot
+            # without a verdict
+            self.release()
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call ``fn`` through the breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker is open (``fn`` is not called)
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        except BaseException:
+            # Interrupted (KeyboardInterrupt, SystemExit): free a half-open
+            # probe slot without a verdict
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, fn, *args, **kwargs):
+        """Async variant of call() for coroutine functions."""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            self._record_error(e)
+            raise
+        except BaseException:
+            # Cancelled: free a half-open probe slot without a verdict
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        """Return the breaker state, configuration and counters."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            stats = dict(self._stats)
+            stats.update({
+                "name": self.name,
+                "state": state,
+                "recent_failures": len([t for t in self._failures if now - t <= self.window]),
+                "failure_threshold": self.failure_threshold,
+                "window_seconds": self.window,
+                "reset_timeout_seconds": self.reset_timeout,
+                "open_for_seconds": round(now - self._opened_at, 1) if state == OPEN else 0.0,
+            })
+        return stats
@@ -0,0 +1,462 @@
+"""
+Competitor page ingestion: fetch, extract and cache competitor listings.
+
+Competitor URLs are fetched concurrently over one pooled httpx.AsyncClient
+(at most ``concurrency`` requests in flight, ``max_urls`` per call).
+Threaded callers share that client through a background event loop. The
+URLs come from users, so every host, redirect hops included, must resolve
+to public addresses only: loopback, private, link-local, reserved and
+multicast addresses are refused, and the address actually connected to is
+checked again before the page is read. Bodies are streamed and abandoned
+once they pass ``max_page_bytes``. Each page is parsed in a
+process pool, because HTML parsing is CPU-bound and would otherwise hold up
+the event loop or the GIL. Parsing takes Amazon's product title, feature
+bullets and description, and falls back to trafilatura's main-content
+extraction for other layouts.
+
+Parsed pages are cached per URL. For ``ttl`` seconds a page is served
+without any request. After that it is revalidated with If-None-Match /
+If-Modified-Since, so an unchanged page costs a 304 and no re-parse; if
+revalidation fails, the stale page is served.
+
+Each page comes back as a dict with url, title, bullets and description,
+plus "error" when it could not be fetched or parsed. Callers pass these
+dicts to openai_utils.analyze_competitive_listings.
+"""
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+import process_pool
+
+try:
+    import trafilatura
+except ImportError:  # pragma: no cover - exercised where trafilatura is absent
+    trafilatura = None
+
+try:
+    import lxml.html
+except ImportError:  # pragma: no cover - lxml comes with trafilatura
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through the environment (see CompetitorFetcher.from_env)
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_PAGE_BYTES = 5 * 1024 * 1024
+DEFAULT_MAX_URLS = 10
+
+MAX_REDIRECTS = 5
+
+MAX_BULLETS = 10
+MAX_DESCRIPTION_CHARS = 2000
+
+USER_AGENT = "Mozilla/5.0 (compatible; AIAssistant competitor analysis)"
+
+
+
+class BlockedURLError(ValueError):
+    """Raised for a competitor URL that is not a public http(s) address."""
+
+
+def is_public_address(address):
+    """Return True if ``address`` (an IP string) is a public unicast address."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def _resolve(host, port):
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def check_url(url):
+    """
+    Refuse URLs that are not http(s) or whose host has a non-public address.
+
+    Every address the host resolves to is checked, so a name with one public
+    and one internal record is refused too.
+
+    Args:
+        url (httpx.URL): URL about to be requested
+
+    Raises:
+        BlockedURLError: If the URL must not be fetched
+    """
+    if url.scheme not in ("http", "https") or not url.host:
+        raise BlockedURLError(f"Not an http(s) URL: {url}")
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        addresses = await _resolve(url.host, port)
+    except socket.gaierror as e:
+        raise BlockedURLError(f"Cannot resolve {url.host}: {e}")
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        raise BlockedURLError(f"{url.host} does not resolve to a public address")
+
+
+def _check_peer(response):
+    # The host may resolve differently by the time httpx connects (DNS
+    # rebinding): check the address the connection actually went to
+    stream = response.extensions.get("network_stream")
+    peer = stream.get_extra_info("server_addr") if stream is not None else None
+    if peer and not is_public_address(peer[0]):
+        raise BlockedURLError(f"{response.url.host} connected to a non-public address")
+
+
+def _text(element):
+    return " ".join(element.text_content().split())
+
+
+def _first_text(doc, xpath):
+    for element in doc.xpath(xpath):
+        text = _text(element) if hasattr(element, "text_content") else " ".join(str(element).split())
+        if text:
+            return text
+    return ""
+
+
+def extract_page(html, url):
+    """
+    Extract the title, bullets and description of a product page.
+
+    Runs in the worker processes, so it only takes and returns plain data.
+
+    Args:
+        html (str): Page HTML
+        url (str): Page URL (helps trafilatura with relative metadata)
+
+    Returns:
+        dict: url, title, bullets (list) and description
+    """
+    page = {"url": url, "title": "", "bullets": [], "description": ""}
+    if lxml is None:
+        raise RuntimeError("lxml is required to parse competitor pages")
+    doc = lxml.html.fromstring(html)
+
+    # Amazon product layout
+    page["title"] = _first_text(doc, '//*[@id="productTitle"]')
+    bullets = [_text(li) for li in doc.xpath('//*[@id="feature-bullets"]//li')]
+    page["bullets"] = [bullet for bullet in bullets if bullet][:MAX_BULLETS]
+    page["description"] = _first_text(doc, '//*[@id="productDescription"]')
+
+    if not (page["title"] and page["bullets"] and page["description"]) and trafilatura is not None:
+        # Any other layout: main-content extraction
+        extracted = trafilatura.bare_extraction(doc, url=url, with_metadata=True, include_comments=False,
+                                                include_tables=False)
+        if extracted is not None:
+            page["title"] = page["title"] or extracted.title or ""
+            if not page["bullets"] and extracted.body is not None:
+                items = (" ".join(item.itertext()).strip() for item in extracted.body.iter("item"))
+                page["bullets"] = [" ".join(item.split()) for item in items if item][:MAX_BULLETS]
+            page["description"] = page["description"] or extracted.text or extracted.description or ""
+
+    page["title"] = page["title"] or _first_text(doc, '//meta[@property="og:title"]/@content') \
+        or _first_text(doc, "//title")
+    page["description"] = page["description"][:MAX_DESCRIPTION_CHARS]
+    return page
+
+
+def get_pool(workers=None):
+    """Return the shared extraction process pool, creating it on first use."""
+    return process_pool.get_pool("competitor_pages", workers)
+
+
+class _Entry:
+    __slots__ = ("page", "etag", "last_modified", "checked_at")
+
+    def __init__(self, page, etag, last_modified, checked_at):
+        self.page = page
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = checked_at
+
+
+class PageCache:
+    """
+    LRU cache of parsed pages with the validators to revalidate them.
+
+    Args:
+        max_entries (int): Maximum number of pages kept
+        ttl (float): Seconds a page is served without revalidation
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Return (page, fresh, validator headers); page is None on a miss."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None, False, {}
+            self._entries.move_to_end(url)
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return entry.page, time.monotonic() - entry.checked_at < self.ttl, headers
+
+    def set(self, url, page, etag=None, last_modified=None):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[url] = _Entry(page, etag, last_modified, time.monotonic())
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, url):
+        """Mark a page as revalidated now (the server answered 304)."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry.checked_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CompetitorFetcher:
+    """
+    Fetch and parse competitor pages concurrently, with a revalidating cache.
+
+    Args:
+        concurrency (int): Pages fetched at the same time
+        timeout (float): Per-request timeout in seconds
+        ttl (float): Seconds a parsed page is served without revalidation
+        max_entries (int): Pages kept in the cache
+        max_page_bytes (int): Larger pages are refused
+        workers (int, optional): Extraction processes; 1 parses in a thread
+        max_urls (int): Most URLs fetched in one call
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT_SECONDS,
+                 ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_page_bytes=DEFAULT_MAX_PAGE_BYTES, workers=None, max_urls=DEFAULT_MAX_URLS):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_page_bytes = max_page_bytes
+        self.workers = workers or os.cpu_count() or 1
+        self.max_urls = max_urls
+        self.cache = PageCache(max_entries, ttl)
+        self._client = None
+        self._client_loop = None
+        self._sync_loop = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "fetched": 0, "not_modified": 0, "cache_hits": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a fetcher configured from environment variables.
+
+        COMPETITOR_FETCH_CONCURRENCY, COMPETITOR_FETCH_TIMEOUT,
+        COMPETITOR_CACHE_TTL, COMPETITOR_CACHE_SIZE,
+        COMPETITOR_MAX_PAGE_BYTES, COMPETITOR_EXTRACT_WORKERS and
+        COMPETITOR_MAX_URLS.
+        """
+        workers = os.environ.get("COMPETITOR_EXTRACT_WORKERS")
+        return cls(
+            concurrency=int(os.environ.get("COMPETITOR_FETCH_CONCURRENCY", DEFAULT_CONCURRENCY)),
+            timeout=float(os.environ.get("COMPETITOR_FETCH_TIMEOUT", DEFAULT_TIMEOUT_SECONDS)),
+            ttl=float(os.environ.get("COMPETITOR_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            max_entries=int(os.environ.get("COMPETITOR_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            max_page_bytes=int(os.environ.get("COMPETITOR_MAX_PAGE_BYTES", DEFAULT_MAX_PAGE_BYTES)),
+            workers=int(workers) if workers else None,
+            max_urls=int(os.environ.get("COMPETITOR_MAX_URLS", DEFAULT_MAX_URLS)),
+        )
+
+    def _new_client(self):
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+            # Redirects are followed by _get so every hop is checked; no
+            # proxies from the environment, so _check_peer sees the server
+            follow_redirects=False,
+            trust_env=False,
+        )
+
+    def _get_client(self):
+        # The shared client belongs to the event loop that created it
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._client is None or self._client_loop is not loop:
+                self._client = self._new_client()
+                self._client_loop = loop
+            return self._client
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    async def _extract(self, html, url):
+        loop = asyncio.get_running_loop()
+        if self.workers == 1:
+            return await loop.run_in_executor(None, extract_page, html, url)
+        return await loop.run_in_executor(get_pool(self.workers), extract_page, html, url)
+
+    async def _get(self, client, url, headers):
+        # Streamed GET following redirects by hand, checking every hop;
+        # the caller closes the response
+        for _ in range(MAX_REDIRECTS + 1):
+            await check_url(url)
+            response = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+            try:
+                _check_peer(response)
+            except BaseException:
+                await response.aclose()
+                raise
+            if not response.is_redirect:
+                return response
+            await response.aclose()
+            url = response.url.join(response.headers["Location"])
+            # The validators belong to the original URL
+            headers = None
+        raise ValueError(f"More than {MAX_REDIRECTS} redirects")
+
+    async def _read_body(self, response):
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > self.max_page_bytes:
+            raise ValueError(f"Page is larger than {self.max_page_bytes} bytes")
+        chunks = []
+        size = 0
+        # Decoded bytes, so a compressed page is held to the limit unpacked
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_page_bytes:
+                raise ValueError(f"Page is larger than {self.max_page_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def _fetch_page(self, client, semaphore, url):
+        self._count("requests")
+        page, fresh, validators = self.cache.get(url)
+        if page is not None and fresh:
+            self._count("cache_hits")
+            return dict(page)
+
+        try:
+            async with semaphore:
+                response = await self._get(client, httpx.URL(url), validators)
+                try:
+                    if response.status_code == 304 and page is not None:
+                        self.cache.touch(url)
+                        self._count("not_modified")
+                        return dict(page)
+                    response.raise_for_status()
+                    body = await self._read_body(response)
+                finally:
+                    await response.aclose()
+            html = body.decode(response.encoding or "utf-8", errors="replace")
+            parsed = await self._extract(html, url)
+        except Exception as e:
+            self._count("errors")
+            if page is not None:
+                # Revalidation failed: a stale page beats no page
+                logger.warning("Serving stale competitor page %s: %s", url, e)
+                return dict(page)
+            logger.warning("Could not ingest competitor page %s: %s", url, e)
+            return {"url": url, "title": "", "bullets": [], "description": "", "error": str(e)}
+
+        self._count("fetched")
+        self.cache.set(url, parsed, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return dict(parsed)
+
+    async def fetch_pages(self, urls, client=None):
+        """
+        Fetch and parse competitor pages.
+
+        Args:
+            urls (list): Page URLs
+            client (httpx.AsyncClient, optional): Client to use instead of
+                the shared one
+
+        Returns:
+            list: One page dict per URL, in input order
+
+        Raises:
+            ValueError: If there are more than ``max_urls`` URLs
+        """
+        if len(urls) > self.max_urls:
+            raise ValueError(f"At most {self.max_urls} competitor URLs can be fetched at once")
+        client = client or self._get_client()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return list(await asyncio.gather(*(self._fetch_page(client, semaphore, url) for url in urls)))
+
+    def _background_loop(self):
+        # One event loop thread per process runs the fetches of threaded
+        # callers, so they all share its pooled client
+        with self._lock:
+            if self._sync_loop is None:
+                self._sync_loop = asyncio.new_event_loop()
+                threading.Thread(target=self._sync_loop.run_forever, name="competitor-fetch",
+                                 daemon=True).start()
+            return self._sync_loop
+
+    def fetch_pages_sync(self, urls):
+        """Blocking variant of fetch_pages() for threaded (Flask) callers."""
+        return asyncio.run_coroutine_threadsafe(self.fetch_pages(urls), self._background_loop()).result()
+
+    def _after_fork(self):
+        # Neither the loop thread nor the client's connections survive a fork
+        self._lock = threading.Lock()
+        self._sync_loop = None
+        self._client = None
+        self._client_loop = None
+
+    async def aclose(self):
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def stats(self):
+        """Return request counters and the number of cached pages."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["cached_pages"] = len(self.cache)
+        return stats
+
+
+fetcher = CompetitorFetcher.from_env()
+os.register_at_fork(after_in_child=fetcher._after_fork)
+
+
+def competitor_urls(competitors):
+    """
+    Pick the http(s) URLs out of a list of competitor entries.
+
+    Args:
+        competitors (list): URLs, titles or {"url": ..., "title": ...} dicts
+
+    Returns:
+        list: The URLs, in order and without duplicates
+    """
+    urls = []
+    for competitor in competitors or []:
+        url = competitor.get("url") if isinstance(competitor, dict) else competitor
+        if isinstance(url, str) and url.strip().lower().startswith(("http://", "https://")):
+            urls.append(url.strip())
+    return list(dict.fromkeys(urls))
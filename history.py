@@ -0,0 +1,124 @@
+"""
+Listing history queries with keyset pagination.
+
+Listings are returned newest first. Ids are assigned in insertion order
+together with the created_at server default, so the history is ordered by
+id descending: a page's cursor encodes the id of its last row and the next
+page starts strictly below it. Every page is then an index range scan on the
+primary key (or ix_listing_category_id when filtering by category) no matter
+how deep the client pages, unlike OFFSET. Keying on the integer id also
+avoids comparing timestamps whose stored format differs between databases;
+the created_at range bounds are rendered in the database's own format.
+Bullet points and competitor URLs are eager-loaded with one extra IN query
+each per page instead of one query per listing.
+"""
+import base64
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from models import Listing
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(listing_id):
+    """Encode the position of a listing as an opaque cursor string."""
+    raw = json.dumps({"id": listing_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded.encode()))["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _prefix_upper_bound(prefix):
+    # Smallest string greater than every string starting with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _created_at_bound(session, value):
+    # SQLite stores the server default as "YYYY-MM-DD HH:MM:SS" text while
+    # datetime parameters are sent with ".000000" appended, so a listing
+    # created at exactly the bound's second would sort below it. datetime()
+    # renders the bound in the stored format; the column is left bare so
+    # ix_listing_created_at stays usable.
+    if session.get_bind().dialect.name == "sqlite":
+        return func.datetime(value)
+    return value
+
+
+def query_listings(session, category=None, product_prefix=None, created_from=None,
+                   created_to=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of stored listings, newest first.
+
+    Args:
+        session (Session): SQLAlchemy session
+        category (str, optional): Exact category to filter on
+        product_prefix (str, optional): Case-sensitive product_name prefix
+        created_from (datetime, optional): Inclusive lower bound on created_at
+        created_to (datetime, optional): Exclusive upper bound on created_at
+        cursor (str, optional): next_cursor from the previous page
+        limit (int): Page size, capped at MAX_PAGE_SIZE
+
+    Returns:
+        tuple: (list of Listing with bullets and competitors loaded,
+        next_cursor or None on the last page)
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    stmt = select(Listing).options(
+        selectinload(Listing.bullet_points),
+        selectinload(Listing.competitor_urls)
+    )
+    if category:
+        stmt = stmt.where(Listing.category == category)
+    if product_prefix:
+        # A range instead of LIKE so a plain b-tree index is usable everywhere
+        stmt = stmt.where(Listing.product_name >= product_prefix,
+                          Listing.product_name < _prefix_upper_bound(product_prefix))
+    if created_from:
+        stmt = stmt.where(Listing.created_at >= _created_at_bound(session, created_from))
+    if created_to:
+        stmt = stmt.where(Listing.created_at < _created_at_bound(session, created_to))
+    if cursor:
+        stmt = stmt.where(Listing.id < decode_cursor(cursor))
+
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(Listing.id.desc()).limit(limit + 1)
+    rows = session.scalars(stmt).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.id)
+    return rows, next_cursor
+
+
+def serialize_listing(listing):
+    """Convert a Listing with loaded children into a JSON-ready dict."""
+    return {
+        "id": listing.id,
+        "product_name": listing.product_name,
+        "category": listing.category,
+        "title": listing.title,
+        "description": listing.description,
+        "keywords": [k.strip() for k in (listing.keywords or "").split(",") if k.strip()],
+        "created_at": listing.created_at.isoformat() if listing.created_at else None,
+        "bullets": [b.bullet_text for b in listing.bullet_points],
+        "competitor_urls": [{"url": c.url, "title": c.title} for c in listing.competitor_urls]
+    }
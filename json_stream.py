@@ -0,0 +1,150 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = ",}]" + _WHITESPACE
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "start", "key", "index", "expecting_key")
+
+    def __init__(self, kind, path, start):
+        self.kind = kind
+        self.path = path
+        self.start = start
+        self.key = None
+        self.index = -1
+        self.expecting_key = kind == "{"
+
+
+class IncrementalJSONParser:
+    """
+    Incremental JSON parser that reports values as soon as they are complete.
+
+    Feed it chunks of a JSON document as they arrive (for example the deltas
+    of a streamed chat completion) and it returns ``(path, value)`` pairs for
+    every value that has been fully received, where ``path`` is a tuple of
+    object keys and array indexes. Only values at most ``max_depth`` levels
+    deep are decoded; with the default of 2 a listing stream yields
+    ``("title",)`` as soon as the title string closes, then
+    ``("bullets", 0)``, ``("bullets", 1)``, ... and finally the root ``()``.
+
+    Each character is scanned once no matter how the document is chunked;
+    only completed values are handed to ``json.loads``.
+
+    Args:
+        max_depth (int): Deepest path length to decode and report
+    """
+
+    def __init__(self, max_depth=2):
+        self.max_depth = max_depth
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._string_is_key = False
+        self._scalar_start = None
+        self._value_path = None
+        self._done = False
+
+    @property
+    def done(self):
+        """True once the root value has been completed."""
+        return self._done
+
+    def feed(self, chunk):
+        """
+        Consume the next chunk of the document.
+
+        Args:
+            chunk (str): Next piece of JSON text
+
+        Returns:
+            list: ``(path, value)`` pairs completed by this chunk, in order
+        """
+        self._text += chunk
+        events = []
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1].key = json.loads(text[self._string_start:i + 1])
+                    else:
+                        self._complete(self._string_start, i + 1, self._value_path, events)
+                continue
+
+            if self._scalar_start is not None:
+                if c not in _SCALAR_END:
+                    continue
+                self._complete(self._scalar_start, i, self._value_path, events)
+                self._scalar_start = None
+
+            if c in _WHITESPACE:
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                top = self._stack[-1] if self._stack else None
+                self._string_is_key = top is not None and top.kind == "{" and top.expecting_key
+                if not self._string_is_key:
+                    self._value_path = self._next_path()
+            elif c in "{[":
+                self._stack.append(_Frame(c, self._next_path(), i))
+            elif c in "}]":
+                frame = self._stack.pop()
+                self._complete(frame.start, i + 1, frame.path, events)
+            elif c == ":":
+                self._stack[-1].expecting_key = False
+            elif c == ",":
+                if self._stack[-1].kind == "{":
+                    self._stack[-1].expecting_key = True
+            else:
+                self._scalar_start = i
+                self._value_path = self._next_path()
+
+        self._pos = len(text)
+        return events
+
+    def close(self):
+        """
+        Finish the document, completing a trailing top-level scalar.
+
+        Returns:
+            list: Remaining ``(path, value)`` pairs
+
+        Raises:
+            ValueError: If the document is incomplete
+        """
+        events = []
+        if self._scalar_start is not None and not self._stack:
+            self._complete(self._scalar_start, len(self._text), self._value_path, events)
+            self._scalar_start = None
+        if not self._done:
+            raise ValueError("Incomplete JSON document")
+        return events
+
+    def _next_path(self):
+        if not self._stack:
+            return ()
+        parent = self._stack[-1]
+        if parent.kind == "[":
+            parent.index += 1
+            return parent.path + (parent.index,)
+        return parent.path + (parent.key,)
+
+    def _complete(self, start, end, path, events):
+        if not self._stack:
+            self._done = True
+        if len(path) <= self.max_depth:
+            events.append((path, json.loads(self._text[start:end])))
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through the environment (see ListingCache.from_env)
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_DB_ENTRIES = 100_000
+# Writes between sweeps of expired rows (and recounts of the on-disk tier)
+DEFAULT_DB_SWEEP_INTERVAL = 1000
+
+
+def _normalize_text(value):
+    """Lowercase and collapse whitespace so cosmetic differences share a key."""
+    return " ".join(str(value).lower().split())
+
+
+def _normalize_list(values, sort=False):
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = values.split(",")
+    normalized = [_normalize_text(v) for v in values if str(v).strip()]
+    return sorted(set(normalized)) if sort else normalized
+
+
+def make_key(kind, model, prompt_version, temperature, **inputs):
+    """
+    Build a content-addressed cache key.
+
+    Strings are lowercased and whitespace-collapsed, ``target_keywords`` and
+    ``competitors`` are de-duplicated and sorted (their order does not change
+    the output), while ``features`` keep their order because it drives the
+    bullet order in the generated listing.
+
+    Args:
+        kind (str): What is being cached, e.g. "listing" or "competitors"
+        model (str): Model name the response was generated with
+        prompt_version (str): Version of the prompt template
+        temperature (float): Sampling temperature
+        **inputs: Request inputs (product_name, category, features, ...)
+
+    Returns:
+        str: Hex SHA-256 digest of the canonical request
+    """
+    canonical = {"kind": kind, "model": model, "prompt_version": prompt_version,
+                 "temperature": round(float(temperature), 3)}
+    for name, value in inputs.items():
+        if name in ("target_keywords", "competitors"):
+            canonical[name] = _normalize_list(value, sort=True)
+        elif isinstance(value, (list, tuple)):
+            canonical[name] = _normalize_list(value)
+        elif value is None:
+            canonical[name] = None
+        else:
+            canonical[name] = _normalize_text(value)
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ListingCache:
+    """
+    Two-tier response cache for generated listings and analyses.
+
+    The first tier is an in-process LRU bounded by ``max_entries``. The
+    optional second tier is a SQLite file shared by every worker on the host,
+    bounded by ``max_db_entries`` (least recently used rows are dropped).
+    Both tiers expire entries after ``ttl`` seconds; expired rows that are not
+    read again are swept every ``db_sweep_interval`` writes. The on-disk row
+    count is kept as a running total and recounted at each sweep, so rows
+    other workers add are noticed within one sweep interval. Values must be JSON
+    serializable and are returned as fresh copies, so callers may mutate them.
+
+    Args:
+        max_entries (int): Maximum number of entries kept in memory
+        ttl (float): Seconds an entry stays valid
+        db_path (str, optional): SQLite file for the on-disk tier
+        max_db_entries (int): Maximum number of rows kept on disk
+        db_sweep_interval (int): Writes between sweeps of expired rows
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS,
+                 db_path=None, max_db_entries=DEFAULT_MAX_DB_ENTRIES,
+                 db_sweep_interval=DEFAULT_DB_SWEEP_INTERVAL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_db_entries = max_db_entries
+        self.db_sweep_interval = db_sweep_interval
+        self._db_rows = 0
+        self._db_writes = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0,
+                       "sets": 0, "evictions": 0, "expirations": 0}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS listing_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_listing_cache_accessed_at ON listing_cache (accessed_at)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_listing_cache_expires_at ON listing_cache (expires_at)"
+            )
+            self._db_rows = self._count_db_rows()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a cache configured from environment variables.
+
+        LISTING_CACHE_SIZE (0 disables the memory tier), LISTING_CACHE_TTL,
+        LISTING_CACHE_DB (path enables the SQLite tier), LISTING_CACHE_DB_SIZE
+        and LISTING_CACHE_DB_SWEEP_INTERVAL.
+        """
+        return cls(
+            max_entries=int(os.environ.get("LISTING_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl=float(os.environ.get("LISTING_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            db_path=os.environ.get("LISTING_CACHE_DB") or None,
+            max_db_entries=int(os.environ.get("LISTING_CACHE_DB_SIZE", DEFAULT_MAX_DB_ENTRIES)),
+            db_sweep_interval=int(os.environ.get("LISTING_CACHE_DB_SWEEP_INTERVAL",
+                                                 DEFAULT_DB_SWEEP_INTERVAL)),
+        )
+
+    def get(self, key):
+        """Return a copy of the cached value for ``key`` or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, raw = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return json.loads(raw)
+                del self._memory[key]
+                self._stats["expirations"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM listing_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    raw, expires_at = row
+                    if expires_at > now:
+                        self._db.execute(
+                            "UPDATE listing_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        # Promote to the memory tier
+                        self._remember(key, expires_at, raw)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return json.loads(raw)
+                    deleted = self._db.execute("DELETE FROM listing_cache WHERE key = ?", (key,)).rowcount
+                    self._db_rows -= deleted
+                    self._stats["expirations"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """Store a JSON-serializable ``value`` under ``key`` in every tier."""
+        raw = json.dumps(value)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._stats["sets"] += 1
+            self._remember(key, expires_at, raw)
+            if self._db is not None:
+                inserted = self._db.execute(
+                    "INSERT OR IGNORE INTO listing_cache (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, raw, expires_at, now),
+                ).rowcount
+                if inserted:
+                    self._db_rows += 1
+                else:
+                    self._db.execute(
+                        "UPDATE listing_cache SET value = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                        (raw, expires_at, now, key),
+                    )
+                self._trim_db(now)
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM listing_cache")
+                self._db_rows = 0
+
+    def stats(self):
+        """Return hit/miss counters and current tier sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["max_entries"] = self.max_entries
+            if self._db is not None:
+                stats["disk_entries"] = self._db_rows
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _remember(self, key, expires_at, raw):
+        # Caller holds self._lock
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (expires_at, raw)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _count_db_rows(self):
+        return self._db.execute("SELECT COUNT(*) FROM listing_cache").fetchone()[0]
+
+    def _trim_db(self, now):
+        # Caller holds self._lock. Expired rows are swept (index range scan)
+        # and the running count resynced every db_sweep_interval writes; the
+        # size cap is enforced on every write from the running count.
+        self._db_writes += 1
+        if self._db_writes >= self.db_sweep_interval:
+            self._db_writes = 0
+            swept = self._db.execute("DELETE FROM listing_cache WHERE expires_at <= ?", (now,)).rowcount
+            self._stats["expirations"] += swept
+            self._db_rows = self._count_db_rows()
+        excess = self._db_rows - self.max_db_entries
+        if excess > 0:
+            evicted = self._db.execute(
+                "DELETE FROM listing_cache WHERE key IN "
+                "(SELECT key FROM listing_cache ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+            self._db_rows -= evicted
+            self._stats["evictions"] += evicted
@@ -0,0 +1,244 @@
+"""
+Template engine for the listing generator used when the LLM is unavailable.
+
+Category templates live in data files (TEMPLATE_DIR, by default
+data/templates/*.json). default.json holds the template for categories
+without a file of their own, plus the bullet patterns and competitor
+listings; every other file names its "category" and overrides any of the
+default fields:
+
+    {
+      "category": "Electronics",
+      "title": "{product_name} - Premium {feature1} with {feature2} ...",
+      "description": "Introducing the innovative {product_name} ...",
+      "keywords": ["tech", "gadget"],
+      "bullets": ["{feature}: Enjoy {benefit} ..."],
+      "competitors": [{"url": "https://...", "title": "Premium {product_name} ..."}]
+    }
+
+Placeholders use str.format syntax ({{ and }} for literal braces):
+product_name, category, category_lower, feature1, feature2 and benefit, and
+in bullets also feature. Each text is parsed once at load time into literal
+segments and field slots; rendering fills the slots and joins the segments,
+so a listing costs a handful of list copies and joins instead of building
+the templates and chaining str.replace calls on every request. Unknown
+placeholders fail at load time.
+"""
+import json
+import os
+import string
+import threading
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "templates")
+DEFAULT_TEMPLATE_FILE = "default.json"
+
+BULLET_COUNT = 5
+MAX_KEYWORDS = 15
+DEFAULT_BENEFIT = "Maximum Performance"
+DEFAULT_BULLET_BENEFIT = "enhanced performance"
+
+LISTING_FIELDS = frozenset({"product_name", "category", "category_lower", "feature1", "feature2", "benefit"})
+BULLET_FIELDS = LISTING_FIELDS | {"feature"}
+
+# Feature words too generic to be keywords
+KEYWORD_STOP_WORDS = frozenset({"with", "that", "this", "from", "your", "will", "have", "more", "than"})
+
+_formatter = string.Formatter()
+
+
+class CompiledTemplate:
+    """
+    A template text parsed into literal segments and placeholder slots.
+
+    Args:
+        text (str): Template text with {placeholder} fields
+        fields (frozenset): Placeholder names the text may use
+
+    Raises:
+        ValueError: If the text uses an unknown placeholder, a format spec
+            or a conversion, or has unbalanced braces
+    """
+
+    __slots__ = ("text", "_parts", "_slots")
+
+    def __init__(self, text, fields=LISTING_FIELDS):
+        self.text = text
+        parts = []
+        slots = []
+        for literal, name, spec, conversion in _formatter.parse(text):
+            if literal:
+                parts.append(literal)
+            if name is None:
+                continue
+            if name not in fields or spec or conversion:
+                raise ValueError(f"Unsupported template placeholder: {{{name}}}")
+            slots.append((len(parts), name))
+            parts.append("")
+        self._parts = parts
+        self._slots = tuple(slots)
+
+    @property
+    def fields(self):
+        return frozenset(name for _, name in self._slots)
+
+    def render(self, values):
+        """
+        Fill the placeholders from ``values`` and return the text.
+
+        Args:
+            values (dict): Placeholder values by name
+
+        Returns:
+            str: Rendered text
+        """
+        parts = self._parts[:]
+        for index, name in self._slots:
+            parts[index] = values[name]
+        return "".join(parts)
+
+
+class CategoryTemplate:
+    """Compiled templates of one category (or the default)."""
+
+    def __init__(self, category, data):
+        self.category = category
+        try:
+            self.title = CompiledTemplate(data["title"])
+            self.description = CompiledTemplate(data["description"])
+            self.bullets = tuple(CompiledTemplate(text, BULLET_FIELDS) for text in data["bullets"])
+            self.competitors = tuple((c["url"], CompiledTemplate(c["title"])) for c in data["competitors"])
+        except KeyError as e:
+            raise ValueError(f"Template for {category or 'default'} is missing {str(e)}")
+        if not self.bullets:
+            raise ValueError(f"Template for {category or 'default'} has no bullets")
+        self.keywords = list(data.get("keywords", ()))
+
+
+class TemplateLibrary:
+    """
+    Category templates loaded and compiled from a directory of JSON files.
+
+    Args:
+        directory (str): Directory holding default.json and one file per category
+    """
+
+    def __init__(self, directory=DEFAULT_TEMPLATE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._default = None
+        self._categories = {}
+        self.reload()
+
+    @classmethod
+    def from_env(cls):
+        """Create a library from TEMPLATE_DIR, defaulting to data/templates."""
+        return cls(os.environ.get("TEMPLATE_DIR", DEFAULT_TEMPLATE_DIR))
+
+    def reload(self):
+        """
+        (Re)load and compile every template file in the directory.
+
+        Raises:
+            ValueError: If default.json is missing or a template is invalid
+        """
+        path = os.path.join(self.directory, DEFAULT_TEMPLATE_FILE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                default_data = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Default listing template not found: {path}")
+        default = CategoryTemplate(None, default_data)
+
+        categories = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".json") or filename == DEFAULT_TEMPLATE_FILE:
+                continue
+            with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                data = json.load(f)
+            category = data.get("category")
+            if not category:
+                raise ValueError(f"Template file {filename} does not name a category")
+            categories[category] = CategoryTemplate(category, {**default_data, **data})
+
+        with self._lock:
+            self._default = default
+            self._categories = categories
+
+    def categories(self):
+        """Return the names of the categories with their own template."""
+        return sorted(self._categories)
+
+    def get(self, category):
+        """Return the template of a category, or the default template."""
+        return self._categories.get(category, self._default)
+
+
+library = TemplateLibrary.from_env()
+
+
+def _keywords(product_name, features, base_keywords):
+    feature_words = [word for feature in features for word in feature.lower().split()
+                     if len(word) > 3 and word not in KEYWORD_STOP_WORDS]
+    # dict.fromkeys drops duplicates but keeps the order, so the output is stable
+    return list(dict.fromkeys(base_keywords + feature_words + product_name.lower().split()))[:MAX_KEYWORDS]
+
+
+def generate_template_listing(product_name, category, features, target_keywords=None, templates=None):
+    """
+    Generate a listing from the category templates, without the LLM.
+
+    Pure function: no analysis, storage or I/O.
+
+    Args:
+        product_name (str): The name of the product
+        category (str): Product category
+        features (list): List of key product features
+        target_keywords (list, optional): Keywords to use instead of generated ones
+        templates (TemplateLibrary, optional): Library to use, defaults to
+            the module library
+
+    Returns:
+        dict: Listing with title, bullets, description, keywords and competitor URLs
+
+    Raises:
+        ValueError: If required product information is missing
+    """
+    if not product_name or not category or not features:
+        raise ValueError("Missing required product information")
+
+    template = (templates or library).get(category)
+    main_features = features[:2] if len(features) >= 2 else features + ["Quality"] * (2 - len(features))
+    benefit = features[0].split(" ")[-1] if features else DEFAULT_BENEFIT
+    values = {
+        "product_name": product_name,
+        "category": category,
+        "category_lower": category.lower(),
+        "feature1": main_features[0],
+        "feature2": main_features[1],
+        "benefit": benefit,
+    }
+
+    # One bullet per feature (up to five), padded with generic features
+    bullet_values = dict(values, benefit=benefit or DEFAULT_BULLET_BENEFIT)
+    patterns = template.bullets
+    bullets = []
+    for i, feature in enumerate(features[:BULLET_COUNT]):
+        if i < len(patterns):
+            bullet_values["feature"] = feature.upper()
+            bullets.append(patterns[i].render(bullet_values))
+    for i in range(BULLET_COUNT - len(bullets)):
+        bullet_values["feature"] = f"QUALITY FEATURE {i + 1}"
+        bullets.append(patterns[(len(bullets) + i) % len(patterns)].render(bullet_values))
+
+    if target_keywords and isinstance(target_keywords, list):
+        keywords = target_keywords
+    else:
+        keywords = _keywords(product_name, features, template.keywords)
+
+    return {
+        "title": template.title.render(values),
+        "bullets": bullets,
+        "description": template.description.render(values),
+        "keywords": keywords,
+        "competitor_urls": [{"url": url, "title": title.render(values)} for url, title in template.competitors],
+    }
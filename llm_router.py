@@ -0,0 +1,349 @@
+"""
+Latency-aware routing of listing generation across LLM providers.
+
+A Router holds an ordered list of backends (provider + model). For every
+request it tries the healthy backends fastest first, going by the rolling
+median latency of each backend (backends without samples yet are tried
+first so they get measured). A backend whose recent error rate reaches
+ERROR_THRESHOLD, or that fails CONSECUTIVE_FAILURES times in a row, is
+skipped for COOLDOWN_SECONDS and is then tried again; skipped backends are
+still used as a last resort.
+
+Each attempt runs through llm_transport with part of the request deadline,
+keeping back roughly the p95 latency of the next backend, so a stalled
+provider is abandoned while there is still time to fail over. Any backend
+error fails over (outages, rate limits, but also a revoked key, a missing
+API key or an unknown model), except rejections of the request itself
+(REQUEST_ERROR_STATUS, e.g. a 400 for a prompt over the context window),
+which are raised straight away since another backend would reject the
+request too.
+
+Backends come from LLM_BACKENDS, e.g.
+``openai:gpt-4o,anthropic:claude-3-5-sonnet-latest``; by default OpenAI
+GPT-4o, plus Claude when ANTHROPIC_API_KEY is set.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from types import SimpleNamespace
+
+from llm_transport import LatencyTracker, transport as default_transport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPENAI_MODEL = "gpt-4o"
+DEFAULT_ANTHROPIC_MODEL = "claude-3-5-sonnet-latest"
+
+# Outcomes kept per backend for the error rate
+OUTCOME_WINDOW = 50
+MIN_OUTCOMES = 5
+ERROR_THRESHOLD = 0.5
+CONSECUTIVE_FAILURES = 3
+COOLDOWN_SECONDS = 30.0
+
+# Rejections of the request itself; any other error counts against the backend
+REQUEST_ERROR_STATUS = frozenset({400, 413, 422})
+
+# Share of the remaining deadline an attempt may use when another backend
+# is left to fail over to and its latency is not known yet
+FAILOVER_SHARE = 0.5
+
+# Normalized result of a completion on any backend. usage has the OpenAI
+# attribute names (prompt_tokens, completion_tokens,
+# prompt_tokens_details.cached_tokens) whatever the provider.
+Completion = namedtuple("Completion", "content finish_reason usage backend")
+
+
+def is_request_error(error):
+    """Return True if ``error`` rejects the request itself rather than the backend."""
+    return getattr(error, "status_code", None) in REQUEST_ERROR_STATUS
+
+
+def _anthropic_usage(usage):
+    cached = getattr(usage, "cache_read_input_tokens", None) or 0
+    created = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return SimpleNamespace(
+        prompt_tokens=usage.input_tokens + cached + created,
+        completion_tokens=usage.output_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached)
+    )
+
+
+class Backend:
+    """
+    One provider and model behind the router.
+
+    Args:
+        provider (str): "openai" or "anthropic"
+        model (str): Model name sent to the provider
+        transport (LLMTransport): Transport the clients are built on
+        client_kwargs: Extra client arguments (api_key, base_url, ...)
+    """
+
+    def __init__(self, provider, model, transport=default_transport, **client_kwargs):
+        if provider not in ("openai", "anthropic"):
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        self.provider = provider
+        self.model = model
+        self.name = f"{provider}:{model}"
+        self.transport = transport
+        self._client_kwargs = client_kwargs
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+        self.latency = LatencyTracker()
+        self._outcomes = deque(maxlen=OUTCOME_WINDOW)
+        self._consecutive_failures = 0
+        self._unhealthy_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                factory = (self.transport.openai_client if self.provider == "openai"
+                           else self.transport.anthropic_client)
+                self._client = factory(**self._client_kwargs)
+            return self._client
+
+    def async_client(self):
+        with self._lock:
+            if self._async_client is None:
+                factory = (self.transport.async_openai_client if self.provider == "openai"
+                           else self.transport.async_anthropic_client)
+                self._async_client = factory(**self._client_kwargs)
+            return self._async_client
+
+    def _request(self, messages, temperature, max_tokens, json_mode):
+        # Provider-specific arguments of the create call
+        if self.provider == "openai":
+            kwargs = {"model": self.model, "messages": messages, "temperature": temperature}
+            if max_tokens:
+                kwargs["max_tokens"] = max_tokens
+            if json_mode:
+                kwargs["response_format"] = {"type": "json_object"}
+            return kwargs
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        chat = [m for m in messages if m["role"] != "system"]
+        if json_mode:
+            # Prefilling the reply keeps Claude to a bare JSON object
+            chat = chat + [{"role": "assistant", "content": "{"}]
+        kwargs = {"model": self.model, "messages": chat, "temperature": temperature,
+                  "max_tokens": max_tokens or 4096}
+        if system:
+            kwargs["system"] = system
+        return kwargs
+
+    def _completion(self, response, json_mode):
+        if self.provider == "openai":
+            choice = response.choices[0]
+            return Completion(choice.message.content, choice.finish_reason, response.usage, self.name)
+        text = "".join(block.text for block in response.content if block.type == "text")
+        if json_mode:
+            text = "{" + text
+        finish_reason = "length" if response.stop_reason == "max_tokens" else "stop"
+        return Completion(text, finish_reason, _anthropic_usage(response.usage), self.name)
+
+    def complete(self, messages, temperature, max_tokens, json_mode, deadline):
+        kwargs = self._request(messages, temperature, max_tokens, json_mode)
+        client = self.client()
+        create = client.chat.completions.create if self.provider == "openai" else client.messages.create
+        response = self.transport.call(create, key=self.name, deadline=deadline, **kwargs)
+        return self._completion(response, json_mode)
+
+    async def acomplete(self, messages, temperature, max_tokens, json_mode, deadline):
+        kwargs = self._request(messages, temperature, max_tokens, json_mode)
+        client = self.async_client()
+        create = client.chat.completions.create if self.provider == "openai" else client.messages.create
+        response = await self.transport.acall(create, key=self.name, deadline=deadline, **kwargs)
+        return self._completion(response, json_mode)
+
+    def healthy(self, now=None):
+        return (now or time.monotonic()) >= self._unhealthy_until
+
+    def error_rate(self):
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+    def record(self, seconds, error=None):
+        """Record the outcome of one request on this backend."""
+        # A rejected request says nothing about the backend; outages, rate
+        # limits and auth or model errors do
+        failed = error is not None and not is_request_error(error)
+        with self._lock:
+            self.requests += 1
+            self._outcomes.append(failed)
+            if error is None:
+                self._consecutive_failures = 0
+            elif failed:
+                self.failures += 1
+                self._consecutive_failures += 1
+                outcomes = list(self._outcomes)
+                rate = sum(outcomes) / len(outcomes)
+                if (self._consecutive_failures >= CONSECUTIVE_FAILURES
+                        or (len(outcomes) >= MIN_OUTCOMES and rate >= ERROR_THRESHOLD)):
+                    self._unhealthy_until = time.monotonic() + COOLDOWN_SECONDS
+                    self._consecutive_failures = 0
+                    self._outcomes.clear()
+                    logger.warning("LLM backend %s marked unhealthy for %.0fs", self.name, COOLDOWN_SECONDS)
+        if error is None:
+            self.latency.add(seconds)
+
+    def stats(self):
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate(), 4),
+            "healthy": self.healthy(),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class Router:
+    """
+    Route completions to the fastest healthy backend, failing over in time.
+
+    Args:
+        backends (list): Backend objects in preference order (ties keep it)
+        deadline (float, optional): Default request budget in seconds,
+            defaults to the transport deadline
+    """
+
+    def __init__(self, backends, deadline=None):
+        if not backends:
+            raise ValueError("At least one LLM backend is required")
+        self.backends = list(backends)
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "failovers": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a router from LLM_BACKENDS (comma separated provider:model).
+
+        Without LLM_BACKENDS: OpenAI GPT-4o, then Claude when
+        ANTHROPIC_API_KEY is set.
+        """
+        spec = os.environ.get("LLM_BACKENDS")
+        if not spec:
+            spec = f"openai:{DEFAULT_OPENAI_MODEL}"
+            if os.environ.get("ANTHROPIC_API_KEY"):
+                spec += f",anthropic:{DEFAULT_ANTHROPIC_MODEL}"
+        backends = []
+        for item in spec.split(","):
+            provider, _, model = item.strip().partition(":")
+            if not model:
+                model = DEFAULT_OPENAI_MODEL if provider == "openai" else DEFAULT_ANTHROPIC_MODEL
+            backends.append(Backend(provider, model))
+        return cls(backends)
+
+    def order(self):
+        """Return the backends in the order the next request tries them."""
+        now = time.monotonic()
+        healthy = [b for b in self.backends if b.healthy(now)]
+        unhealthy = [b for b in self.backends if not b.healthy(now)]
+        # Unmeasured backends sort first (0.0) so they get measured; sorted() keeps config order on ties
+        healthy = sorted(healthy, key=lambda b: b.latency.percentile(50) or 0.0)
+        return healthy + unhealthy
+
+    def _budget(self, candidates, index, expires_at):
+        remaining = expires_at - time.monotonic()
+        if index == len(candidates) - 1:
+            return remaining
+        reserve = candidates[index + 1].latency.percentile(95)
+        if reserve is None:
+            return remaining * FAILOVER_SHARE
+        return max(remaining - reserve, remaining * (1 - FAILOVER_SHARE))
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def complete(self, messages, temperature=0.7, max_tokens=None, json_mode=False, deadline=None):
+        """
+        Run a chat completion on the best available backend.
+
+        Args:
+            messages (list): OpenAI-style chat messages (system/user)
+            temperature (float): Sampling temperature
+            max_tokens (int, optional): Output token limit
+            json_mode (bool): Ask for a JSON object reply
+            deadline (float, optional): Budget in seconds for all backends
+
+        Returns:
+            Completion: Reply text, finish reason ("stop"/"length"),
+            normalized usage and the backend name
+
+        Raises:
+            Exception: A rejected request (REQUEST_ERROR_STATUS) at once,
+                else the last error when every backend failed
+        """
+        self._count("requests")
+        candidates = self.order()
+        expires_at = time.monotonic() + (deadline or self.deadline or default_transport.deadline)
+        error = None
+        for index, backend in enumerate(candidates):
+            budget = self._budget(candidates, index, expires_at)
+            if budget <= 0:
+                break
+            if index:
+                self._count("failovers")
+                logger.warning("Failing over to %s: %s", backend.name, error)
+            started = time.monotonic()
+            try:
+                completion = backend.complete(messages, temperature, max_tokens, json_mode, budget)
+            except Exception as e:
+                backend.record(time.monotonic() - started, e)
+                if is_request_error(e):
+                    # Another backend would reject the request too
+                    self._count("failures")
+                    raise
+                error = e
+                continue
+            backend.record(time.monotonic() - started)
+            return completion
+        self._count("failures")
+        raise error or TimeoutError("LLM request deadline exceeded")
+
+    async def acomplete(self, messages, temperature=0.7, max_tokens=None, json_mode=False, deadline=None):
+        """Async variant of complete()."""
+        self._count("requests")
+        candidates = self.order()
+        expires_at = time.monotonic() + (deadline or self.deadline or default_transport.deadline)
+        error = None
+        for index, backend in enumerate(candidates):
+            budget = self._budget(candidates, index, expires_at)
+            if budget <= 0:
+                break
+            if index:
+                self._count("failovers")
+                logger.warning("Failing over to %s: %s", backend.name, error)
+            started = time.monotonic()
+            try:
+                completion = await backend.acomplete(messages, temperature, max_tokens, json_mode, budget)
+            except Exception as e:
+                backend.record(time.monotonic() - started, e)
+                if is_request_error(e):
+                    # Another backend would reject the request too
+                    self._count("failures")
+                    raise
+                error = e
+                continue
+            backend.record(time.monotonic() - started)
+            return completion
+        self._count("failures")
+        raise error or TimeoutError("LLM request deadline exceeded")
+
+    def stats(self):
+        """Return router counters and per-backend health and latency."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backends"] = {b.name: b.stats() for b in self.backends}
+        return stats
@@ -0,0 +1,468 @@
+"""
+Shared transport for LLM provider calls.
+
+Every LLM client in the project is built here, on one pooled httpx client per
+process (keep-alive connections, bounded pool), and every call goes through
+LLMTransport.call / acall, which add:
+
+- a per-call deadline covering all attempts, with each attempt's timeout cut
+  to the time that is left, so a stalled provider can no longer hold a
+  worker until the socket dies;
+- exponential backoff with full jitter on 429, 5xx, timeouts and connection
+  errors (Retry-After is honoured when it fits in the deadline);
+- optional hedged requests: when an attempt has not answered after the p95
+  latency observed for that kind of call, a second identical request is sent
+  and the first answer wins. Hedged attempts run on a thread pool no larger
+  than the connection pool; when it is busy, calls run unhedged on the
+  caller's thread instead of queueing behind other requests. Hedging costs
+  extra provider calls, so it is off unless LLM_HEDGE is set.
+
+The SDK clients are created with max_retries=0 so retries are only done here.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+import tracing
+
+try:
+    import anthropic
+except ImportError:  # optional: only needed for Anthropic backends
+    anthropic = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_DEADLINE = 120.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+
+# Latency samples kept per call key for the hedge delay
+LATENCY_WINDOW = 200
+
+RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies.
+
+    Args:
+        window (int): Number of most recent samples kept
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, percent):
+        """Return the ``percent`` percentile in seconds, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percent / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+def is_retryable(error):
+    """
+    Return True if ``error`` is worth retrying.
+
+    Works with the openai and anthropic SDK errors (both expose
+    ``status_code`` on status errors and name their connection and timeout
+    errors alike) and with plain httpx transport errors.
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    if isinstance(error, (httpx.TimeoutException, httpx.NetworkError, TimeoutError)):
+        return True
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _close_result(future):
+    # Done callback for the losing attempt of a hedged call
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            logger.debug("Closing a hedged response failed", exc_info=True)
+
+
+class LLMTransport:
+    """
+    Pooled, retrying and optionally hedging transport for LLM calls.
+
+    Args:
+        timeout (float): Longest single attempt in seconds
+        connect_timeout (float): Connection timeout in seconds
+        deadline (float): Default budget in seconds for a call, all attempts
+            and backoff included
+        max_retries (int): Retries after the first attempt
+        backoff_base (float): First backoff ceiling in seconds, doubled per retry
+        backoff_max (float): Largest backoff in seconds
+        max_connections (int): Connection pool size, also the most hedged
+            attempts running at once
+        max_keepalive (int): Idle keep-alive connections kept in the pool
+        keepalive_expiry (float): Seconds an idle connection is kept
+        hedge (bool): Send a second request when the first is slower than the
+            hedge percentile
+        hedge_percentile (float): Latency percentile used as the hedge delay
+        hedge_min_samples (int): Samples needed before hedging starts
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 deadline=DEFAULT_DEADLINE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE,
+                 keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY, hedge=False,
+                 hedge_percentile=DEFAULT_HEDGE_PERCENTILE, hedge_min_samples=DEFAULT_HEDGE_MIN_SAMPLES):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._http_client = None
+        self._async_http_client = None
+        self._hedge_pool = None
+        # One hedge pool thread per pooled connection; never queue behind it
+        self._hedge_slots = threading.BoundedSemaphore(max_connections)
+        self._max_connections = max_connections
+        self._latency = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0,
+                       "deadline_exceeded": 0, "hedges": 0, "hedge_wins": 0}
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a transport configured from environment variables.
+
+        LLM_TIMEOUT, LLM_CONNECT_TIMEOUT, LLM_DEADLINE, LLM_MAX_RETRIES,
+        LLM_BACKOFF_BASE, LLM_BACKOFF_MAX, LLM_MAX_CONNECTIONS,
+        LLM_MAX_KEEPALIVE, LLM_KEEPALIVE_EXPIRY, LLM_HEDGE (1 enables
+        hedging), LLM_HEDGE_PERCENTILE and LLM_HEDGE_MIN_SAMPLES.
+        """
+        return cls(
+            timeout=float(os.environ.get("LLM_TIMEOUT", DEFAULT_TIMEOUT)),
+            connect_timeout=float(os.environ.get("LLM_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+            deadline=float(os.environ.get("LLM_DEADLINE", DEFAULT_DEADLINE)),
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            backoff_base=float(os.environ.get("LLM_BACKOFF_BASE", DEFAULT_BACKOFF_BASE)),
+            backoff_max=float(os.environ.get("LLM_BACKOFF_MAX", DEFAULT_BACKOFF_MAX)),
+            max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            max_keepalive=int(os.environ.get("LLM_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+            keepalive_expiry=float(os.environ.get("LLM_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY)),
+            hedge=os.environ.get("LLM_HEDGE", "").lower() in ("1", "true", "yes"),
+            hedge_percentile=float(os.environ.get("LLM_HEDGE_PERCENTILE", DEFAULT_HEDGE_PERCENTILE)),
+            hedge_min_samples=int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", DEFAULT_HEDGE_MIN_SAMPLES)),
+        )
+
+    def _httpx_timeout(self):
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def http_client(self):
+        """Return the shared pooled httpx.Client."""
+        with self._lock:
+            if self._http_client is None:
+                # The hook adds the provider's own timing to traced requests
+                self._http_client = httpx.Client(
+                    limits=self.limits, timeout=self._httpx_timeout(),
+                    event_hooks={"response": [tracing.record_provider_response]})
+            return self._http_client
+
+    def async_http_client(self):
+        """Return the shared pooled httpx.AsyncClient."""
+        with self._lock:
+            if self._async_http_client is None:
+                self._async_http_client = httpx.AsyncClient(
+                    limits=self.limits, timeout=self._httpx_timeout(),
+                    event_hooks={"response": [tracing.arecord_provider_response]})
+            return self._async_http_client
+
+    def openai_client(self, **kwargs):
+        """Create an OpenAI client on the shared pool; retries are left to call()."""
+        return OpenAI(http_client=self.http_client(), max_retries=0, timeout=self._httpx_timeout(), **kwargs)
+
+    def async_openai_client(self, **kwargs):
+        """Create an AsyncOpenAI client on the shared pool; retries are left to acall()."""
+        return AsyncOpenAI(http_client=self.async_http_client(), max_retries=0,
+                           timeout=self._httpx_timeout(), **kwargs)
+
+    def anthropic_client(self, **kwargs):
+        """Create an Anthropic client on the shared pool; retries are left to call()."""
+        if anthropic is None:
+            raise RuntimeError("The anthropic package is not installed")
+        return anthropic.Anthropic(http_client=self.http_client(), max_retries=0,
+                                   timeout=self._httpx_timeout(), **kwargs)
+
+    def async_anthropic_client(self, **kwargs):
+        """Create an AsyncAnthropic client on the shared pool; retries are left to acall()."""
+        if anthropic is None:
+            raise RuntimeError("The anthropic package is not installed")
+        return anthropic.AsyncAnthropic(http_client=self.async_http_client(), max_retries=0,
+                                        timeout=self._httpx_timeout(), **kwargs)
+
+    def latency(self, key):
+        """Return the LatencyTracker of calls made with ``key``."""
+        with self._lock:
+            tracker = self._latency.get(key)
+            if tracker is None:
+                tracker = self._latency[key] = LatencyTracker()
+            return tracker
+
+    def hedge_delay(self, key):
+        """Return the seconds to wait before hedging a ``key`` call, or None."""
+        tracker = self.latency(key)
+        if not self.hedge or len(tracker) < self.hedge_min_samples:
+            return None
+        return tracker.percentile(self.hedge_percentile)
+
+    def backoff(self, retry, error=None):
+        """Return the sleep before retry number ``retry`` (0-based)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** retry)))
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _attempt_timeout(self, expires_at):
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            return None
+        return httpx.Timeout(min(self.timeout, remaining), connect=min(self.connect_timeout, remaining))
+
+    def _retry_delay(self, retry, error, expires_at):
+        # None when the error is final: not retryable, out of retries or of time
+        if not is_retryable(error) or retry >= self.max_retries:
+            return None
+        delay = self.backoff(retry, error)
+        if time.monotonic() + delay >= expires_at:
+            self._count("deadline_exceeded")
+            return None
+        return delay
+
+    def call(self, fn, *args, key="default", deadline=None, hedge=True, **kwargs):
+        """
+        Call an SDK method with deadline, retries and optional hedging.
+
+        ``fn`` must accept a ``timeout`` keyword (every openai and anthropic
+        request method does); it is set to the time left for each attempt.
+
+        Args:
+            fn (callable): SDK request method, e.g. client.chat.completions.create
+            key (str): Kind of call; latencies and hedge delays are kept per key
+            deadline (float, optional): Budget in seconds, defaults to self.deadline
+            hedge (bool): Allow hedging for this call (disable for streams)
+
+        Returns:
+            The result of ``fn``
+
+        Raises:
+            Exception: The last error once it is not retryable, the retries
+                are used up or the deadline would pass
+        """
+        self._count("calls")
+        expires_at = time.monotonic() + (deadline or self.deadline)
+        retry = 0
+        while True:
+            timeout = self._attempt_timeout(expires_at)
+            if timeout is None:
+                self._count("deadline_exceeded")
+                self._count("failures")
+                raise TimeoutError(f"LLM call deadline of {deadline or self.deadline}s exceeded")
+            try:
+                delay = self.hedge_delay(key) if hedge else None
+                if delay is None:
+                    return self._timed(key, fn, args, dict(kwargs, timeout=timeout))
+                return self._hedged(key, delay, fn, args, dict(kwargs, timeout=timeout))
+            except Exception as e:
+                sleep = self._retry_delay(retry, e, expires_at)
+                if sleep is None:
+                    self._count("failures")
+                    raise
+                logger.warning("LLM call failed (%s), retrying in %.2fs", e, sleep)
+                self._count("retries")
+                retry += 1
+                time.sleep(sleep)
+
+    def _timed(self, key, fn, args, kwargs):
+        self._count("attempts")
+        started = time.monotonic()
+        result = fn(*args, **kwargs)
+        self.latency(key).add(time.monotonic() - started)
+        return result
+
+    def _submit(self, key, fn, args, kwargs):
+        # Returns None when every hedge thread is busy, rather than queueing
+        if not self._hedge_slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._max_connections, thread_name_prefix="llm-hedge")
+        try:
+            # Run in a copy of the caller's context so trace spans and log
+            # context set by the request carry over to the hedge thread
+            future = self._hedge_pool.submit(contextvars.copy_context().run, self._timed, key, fn, args,
+                                             kwargs)
+        except BaseException:
+            self._hedge_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._hedge_slots.release())
+        return future
+
+    def _hedged(self, key, delay, fn, args, kwargs):
+        primary = self._submit(key, fn, args, kwargs)
+        if primary is None:
+            return self._timed(key, fn, args, kwargs)
+        done, _ = concurrent.futures.wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        backup = self._submit(key, fn, args, kwargs)
+        if backup is None:
+            return primary.result()
+        self._count("hedges")
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    # The slower request finishes in the background; close
+                    # its response so the connection goes back to the pool
+                    for loser in pending:
+                        loser.add_done_callback(_close_result)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def acall(self, fn, *args, key="default", deadline=None, hedge=True, **kwargs):
+        """Async variant of call() for AsyncOpenAI / AsyncAnthropic methods."""
+        self._count("calls")
+        expires_at = time.monotonic() + (deadline or self.deadline)
+        retry = 0
+        while True:
+            timeout = self._attempt_timeout(expires_at)
+            if timeout is None:
+                self._count("deadline_exceeded")
+                self._count("failures")
+                raise TimeoutError(f"LLM call deadline of {deadline or self.deadline}s exceeded")
+            try:
+                delay = self.hedge_delay(key) if hedge else None
+                if delay is None:
+                    return await self._atimed(key, fn, args, dict(kwargs, timeout=timeout))
+                return await self._ahedged(key, delay, fn, args, dict(kwargs, timeout=timeout))
+            except Exception as e:
+                sleep = self._retry_delay(retry, e, expires_at)
+                if sleep is None:
+                    self._count("failures")
+                    raise
+                logger.warning("LLM call failed (%s), retrying in %.2fs", e, sleep)
+                self._count("retries")
+                retry += 1
+                await asyncio.sleep(sleep)
+
+    async def _atimed(self, key, fn, args, kwargs):
+        self._count("attempts")
+        started = time.monotonic()
+        result = await fn(*args, **kwargs)
+        self.latency(key).add(time.monotonic() - started)
+        return result
+
+    async def _ahedged(self, key, delay, fn, args, kwargs):
+        primary = asyncio.ensure_future(self._atimed(key, fn, args, kwargs))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            self._count("hedges")
+            backup = asyncio.ensure_future(self._atimed(key, fn, args, kwargs))
+            pending = {primary, backup}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancelling the loser closes its connection; if the caller was
+            # cancelled, this also stops every attempt still running
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self):
+        """Return call counters and latency percentiles per call key."""
+        with self._lock:
+            stats = dict(self._stats)
+            keys = list(self._latency)
+        stats["latency_ms"] = {}
+        for key in keys:
+            tracker = self.latency(key)
+            stats["latency_ms"][key] = {
+                "samples": len(tracker),
+                **{f"p{p}": round(tracker.percentile(p) * 1000, 1) if len(tracker) else None
+                   for p in (50, 95, 99)}
+            }
+        return stats
+
+
+# Process-wide transport shared by every LLM client
+transport = LLMTransport.from_env()
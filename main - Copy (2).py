@@ -2,15 +2,26 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-import openai
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load .env
 load_dotenv()
 
-# Load OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from llm_transport import transport
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the shared AsyncOpenAI client on the LLM transport, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = transport.async_openai_client(api_key=os.getenv("OPENAI_API_KEY"))
+        return _client
 
 # Create FastAPI app
 app = FastAPI()
@@ -34,7 +45,9 @@ async def ask_openai(request: Request):
         return JSONResponse(content={"response": "No prompt provided."})
 
     try:
-        response = openai.ChatCompletion.create(
+        response = await transport.acall(
+            get_client().chat.completions.create,
+            key="ask",
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "user", "content": prompt}
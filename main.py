@@ -1,16 +1,51 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-import openai
-import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env (for local testing)
 load_dotenv()
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# Imported after load_dotenv() so the shared clients pick up OPENAI_API_KEY
+import metrics
+import structured_logging
+import tracing
+from competitor_pages import competitor_urls, fetcher as competitor_fetcher
+from listing_cache import make_key
+from llm_transport import transport
+from openai_utils import (analyze_competitive_listings_async, get_async_client, listing_sections,
+                          stream_amazon_listing_async)
+from rate_limit import AsyncTokenBucket
+from single_flight import AsyncSingleFlight
+
+# Queued, sampled logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE, ...)
+structured_logging.configure()
+logger = logging.getLogger(__name__)
+
+# Batch generation limits: in-flight LLM calls per batch, provider request rate
+# shared by every batch on this worker, and maximum items per batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+llm_rate_limiter = AsyncTokenBucket.per_minute(
+    float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500")),
+    capacity=BATCH_CONCURRENCY
+)
+
+# Model behind /api/generate-listing
+LISTING_TEXT_MODEL = "gpt-4"  # Or "gpt-3.5-turbo" for lower cost
+LISTING_TEXT_TEMPERATURE = 0.7
+
+# Coalesces identical /api/generate-listing payloads in flight
+listing_text_flight = AsyncSingleFlight("listing_text")
+_LISTING_TEXT_IN_FLIGHT = metrics.LLM_CALLS_IN_FLIGHT.labels("listing_text")
 
 app = FastAPI()
 
@@ -23,6 +58,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request durations and in-flight requests for GET /metrics
+app.add_middleware(metrics.ASGIMetricsMiddleware, app_name="main")
+
+# Opt-in per-request timing breakdown (X-Trace: 1 or TRACE_REQUESTS=1)
+app.add_middleware(tracing.ASGITracingMiddleware, paths=("/api/generate-listing",))
+
+# Request id and sampling decision for the log records of each request
+app.add_middleware(structured_logging.ASGILoggingMiddleware)
+
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -35,22 +79,30 @@ def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-@app.post("/api/generate-listing")
-async def generate_listing(request: Request):
-    try:
-        data = await request.json()
-        print("Received generate-listing request:", data)  # Optional debug
+async def _generate_listing_content(data):
+    """Run one generate-listing payload through the LLM and return its text."""
+    title = data.get("title", "")
+    category = data.get("category", "")
+    features = data.get("features", [])
+    keywords = data.get("keywords", "")
+    raw_urls = data.get("competitor_urls", [])
+
+    # Handle both list of strings and list of objects
+    urls = [u["url"] if isinstance(u, dict) and "url" in u else str(u) for u in raw_urls]
+    logger.debug("Parsed competitor URLs: %s", structured_logging.payload(urls))
 
-        title = data.get("title", "")
-        category = data.get("category", "")
-        features = data.get("features", [])
-        keywords = data.get("keywords", "")
-        raw_urls = data.get("competitor_urls", [])
+    # Identical payloads already in flight (double-clicks, teammates
+    # generating the same product) share one LLM call
+    key = make_key("listing_text", LISTING_TEXT_MODEL, None, LISTING_TEXT_TEMPERATURE, title=title,
+                   category=category, features=features, target_keywords=keywords, competitors=urls)
+    content, _ = await listing_text_flight.do(key, _request_listing_content, title, category,
+                                              features, keywords, urls)
+    return content
 
-        # Handle both list of strings and list of objects
-        urls = [u["url"] if isinstance(u, dict) and "url" in u else str(u) for u in raw_urls]
-        print("Parsed competitor URLs:", urls)
 
+async def _request_listing_content(title, category, features, keywords, urls):
+    """Ask the LLM for the listing text of one generate-listing payload."""
+    with metrics.PROMPT_BUILD.time():
         prompt = f"""
 You're an expert Amazon copywriter. Generate a high-converting product listing with the following info:
 
@@ -68,36 +120,240 @@ Return:
 - SEO Score (0-100) with brief analysis
 """
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # Or "gpt-3.5-turbo" for lower cost
+    # Await the shared async client so other requests keep being served
+    # while this generation is in flight; the transport adds the deadline,
+    # retries and hedging
+    with _LISTING_TEXT_IN_FLIGHT.track_inprogress(), metrics.LLM_WAIT.time():
+        response = await transport.acall(
+            get_async_client().chat.completions.create,
+            key="listing_text",
+            model=LISTING_TEXT_MODEL,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
+            temperature=LISTING_TEXT_TEMPERATURE,
             max_tokens=800
         )
+    metrics.record_tokens(LISTING_TEXT_MODEL, response.usage)
+
+    return response.choices[0].message.content.strip()
+
+
+@app.post("/api/generate-listing")
+async def generate_listing(request: Request):
+    try:
+        with tracing.span("validation"):
+            try:
+                data = await request.json()
+            except ValueError:
+                return JSONResponse(content={"error": "Invalid JSON body"}, status_code=400)
+            if not isinstance(data, dict):
+                return JSONResponse(content={"error": "Expected a JSON object"}, status_code=400)
+        logger.debug("Received generate-listing request: %s", structured_logging.payload(data))
+
+        content = await _generate_listing_content(data)
+        with metrics.SERIALIZATION.time():
+            return JSONResponse(content={"listing": content})
+
+    except Exception as e:
+        logger.error("Error in /api/generate-listing: %s", e)
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
 
-        content = response.choices[0].message.content.strip()
-        return JSONResponse(content={"listing": content})
+def _sse(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/generate-listing/stream")
+async def generate_listing_stream(request: Request):
+    """
+    Streaming variant of /api/generate-listing using Server-Sent Events.
+
+    Emits "title", one "bullet" per bullet point, "description" and "field"
+    (any other top-level key) events as soon as each is complete, then
+    "done" with the full listing. Every event carries "elapsed_ms" since the
+    request started; "done" also reports "first_field_ms" (time to the
+    first rendered field) and "total_ms". Errors are sent as an "error"
+    event because the response status has already been committed.
+    """
+    started = time.perf_counter()
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse(content={"error": "Invalid JSON body"}, status_code=400)
+    if not isinstance(data, dict):
+        return JSONResponse(content={"error": "Expected a JSON object"}, status_code=400)
+    logger.debug("Received generate-listing stream request: %s", structured_logging.payload(data))
+
+    keywords = data.get("keywords", "")
+    if isinstance(keywords, str):
+        keywords = [k.strip() for k in keywords.split(",") if k.strip()]
+
+    try:
+        sections = listing_sections(data.get("sections"))
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    async def events():
+        first_field_ms = None
+        try:
+            async for path, value in stream_amazon_listing_async(
+                data.get("title", ""),
+                data.get("category", ""),
+                data.get("features", []),
+                target_keywords=keywords,
+                sections=sections
+            ):
+                elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+                if path == ():
+                    yield _sse("done", {
+                        "listing": value,
+                        "first_field_ms": first_field_ms,
+                        "total_ms": elapsed_ms
+                    })
+                    continue
+
+                if path == ("title",):
+                    event, payload = "title", {"title": value}
+                elif len(path) == 2 and path[0] == "bullets":
+                    event, payload = "bullet", {"index": path[1], "text": value}
+                elif path == ("description",):
+                    event, payload = "description", {"description": value}
+                elif len(path) == 1 and path[0] != "bullets":
+                    event, payload = "field", {"name": path[0], "value": value}
+                else:
+                    continue
+
+                if first_field_ms is None:
+                    first_field_ms = elapsed_ms
+                payload["elapsed_ms"] = elapsed_ms
+                yield _sse(event, payload)
+
+        except Exception as e:
+            logger.error("Error in /api/generate-listing/stream: %s", e)
+            yield _sse("error", {"error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/generate-listings/batch")
+async def generate_listings_batch(request: Request):
+    """
+    Generate many listings in one call.
+
+    Accepts either a JSON list of generate-listing payloads or an object
+    {"items": [...], "concurrency": n}. Items are fanned out to the LLM
+    through a semaphore (at most BATCH_CONCURRENCY in flight, or the lower
+    per-request "concurrency") and the shared token-bucket rate limiter
+    (LLM_REQUESTS_PER_MINUTE), so a batch runs at the provider's rate limit
+    instead of one request at a time. Results keep the input order; a
+    failing item reports its error without failing the batch.
+    """
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            return JSONResponse(content={"error": "Invalid JSON body"}, status_code=400)
+        items = data.get("items", []) if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return JSONResponse(content={"error": "Expected a non-empty list of listing payloads"},
+                                status_code=400)
+        if len(items) > BATCH_MAX_ITEMS:
+            return JSONResponse(content={"error": f"Batch exceeds {BATCH_MAX_ITEMS} items"},
+                                status_code=400)
+
+        concurrency = BATCH_CONCURRENCY
+        if isinstance(data, dict) and "concurrency" in data:
+            requested = data["concurrency"]
+            # bool is an int subclass: reject true/false explicitly
+            if not isinstance(requested, int) or isinstance(requested, bool) or requested < 1:
+                return JSONResponse(content={"error": "concurrency must be a positive integer"},
+                                    status_code=400)
+            concurrency = min(requested, BATCH_CONCURRENCY)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index, item):
+            async with semaphore:
+                await llm_rate_limiter.acquire()
+                try:
+                    if not isinstance(item, dict):
+                        raise ValueError("Item must be a JSON object")
+                    return {"index": index, "listing": await _generate_listing_content(item)}
+                except Exception as e:
+                    logger.error("Error in batch item %d: %s", index, e)
+                    return {"index": index, "error": str(e)}
+
+        results = await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
+        failed = sum(1 for r in results if "error" in r)
+        return JSONResponse(content={
+            "results": results,
+            "succeeded": len(results) - failed,
+            "failed": failed
+        })
 
     except Exception as e:
-        print("Error in /api/generate-listing:", e)
+        logger.error("Error in /api/generate-listings/batch: %s", e)
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.post("/api/analyze-competitors")
 async def analyze_competitors(request: Request):
+    """
+    Fetch and analyze competitor listings.
+
+    Accepts {"urls": [...], "product_name": ..., "category": ...}. The pages
+    are fetched concurrently and parsed by competitor_pages (cached, with
+    ETag revalidation); "analysis" has the title, bullets and description
+    of each URL (or its "error") and "insights" the LLM's comparison of the
+    pages that could be read.
+    """
     try:
-        data = await request.json()
-        urls = data.get("urls", [])
+        try:
+            data = await request.json()
+        except ValueError:
+            return JSONResponse(content={"error": "Invalid JSON body"}, status_code=400)
+        if not isinstance(data, dict):
+            return JSONResponse(content={"error": "Expected a JSON object"}, status_code=400)
+        urls = competitor_urls(data.get("urls", []))
+        if not urls:
+            return JSONResponse(content={"error": "No competitor URLs provided"}, status_code=400)
+        if len(urls) > competitor_fetcher.max_urls:
+            return JSONResponse(
+                content={"error": f"At most {competitor_fetcher.max_urls} competitor URLs per request"},
+                status_code=400)
+
+        pages = await competitor_fetcher.fetch_pages(urls)
+        readable = [page for page in pages if "error" not in page]
+        logger.info("Fetched %d/%d competitor pages", len(readable), len(pages))
 
-        analysis = []
-        for idx, url in enumerate(urls):
-            analysis.append({
-                "url": url,
-                "insight": f"Product {idx+1} seems to focus on 'durability' and 'eco-friendliness'. Consider highlighting similar strengths or finding gaps."
-            })
+        insights = None
+        if readable:
+            insights = await analyze_competitive_listings_async(
+                readable,
+                data.get("product_name") or data.get("title") or "",
+                data.get("category") or ""
+            )
 
-        return JSONResponse(content={"analysis": analysis})
+        return JSONResponse(content={"analysis": pages, "insights": insights})
 
     except Exception as e:
-        print("Error in /api/analyze-competitors:", e)
+        logger.error("Error in /api/analyze-competitors: %s", e)
         return JSONResponse(content={"error": str(e)}, status_code=500)
+
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """Report LLM transport retry counters and how many calls were coalesced."""
+    return JSONResponse(content={
+        "transport": transport.stats(),
+        "coalescing": listing_text_flight.stats()
+    })
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: pipeline stage timings, tokens, caches and requests."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
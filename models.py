@@ -0,0 +1,60 @@
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import DeclarativeBase
+
+# Define the base class for SQLAlchemy models
+class Base(DeclarativeBase):
+    pass
+
+# SQLAlchemy extension; bound to the Flask app with db.init_app(app). The
+# tables are also usable without Flask through Base.metadata (batch jobs,
+# benchmarks) since db.Model shares Base's metadata.
+db = SQLAlchemy(model_class=Base)
+
+# Define models
+class Listing(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    product_name = db.Column(db.String(255), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    title = db.Column(db.String(500), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    keywords = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    
+    # Define relationships
+    bullet_points = db.relationship('BulletPoint', backref='listing', cascade='all, delete-orphan',
+                                    order_by='BulletPoint.position')
+    competitor_urls = db.relationship('CompetitorURL', backref='listing', cascade='all, delete-orphan',
+                                      order_by='CompetitorURL.position')
+
+    __table_args__ = (
+        # Date range filters on the history
+        db.Index('ix_listing_created_at', 'created_at'),
+        # Keyset pagination of one category's history, newest (highest id) first
+        db.Index('ix_listing_category_id', 'category', 'id'),
+        # Product name prefix search (range scan on product_name)
+        db.Index('ix_listing_product_name', 'product_name'),
+    )
+
+class BulletPoint(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listing.id'), nullable=False, index=True)
+    bullet_text = db.Column(db.String(500), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    
+class CompetitorURL(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listing.id'), nullable=False, index=True)
+    url = db.Column(db.String(1024), nullable=False)
+    title = db.Column(db.String(500), nullable=True)
+    position = db.Column(db.Integer, nullable=False)
+
+def create_indexes(bind):
+    """
+    Create any missing indexes on existing tables.
+
+    db.create_all() only creates indexes together with new tables, so
+    databases created before an index was declared get it here.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
@@ -1,193 +1,567 @@
+import copy
 import json
 import os
 import logging
+import threading
 
-from openai import OpenAI
+import metrics
+import seo_analysis
+import token_budget
+import tracing
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from json_stream import IncrementalJSONParser
+from listing_cache import ListingCache, make_key
+from llm_router import Router
+from llm_transport import transport
+from prompts import (ANALYSIS_SECTIONS, COMPETITOR_PROMPT, COPY_SECTIONS, LISTING_PROMPT,
+                     LISTING_SECTIONS, listing_prompt, normalize_sections, registry as prompt_registry)
+from semantic_cache import SemanticCache
+from single_flight import AsyncSingleFlight, SingleFlight
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the app (see structured_logging)
 logger = logging.getLogger(__name__)
 
 # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 # do not change this unless explicitly requested by the user
 MODEL = "gpt-4o"
 
-# Create OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Version of the listing prompt in prompts.py; part of the cache keys
+PROMPT_VERSION = LISTING_PROMPT.version
 
-def generate_amazon_listing(product_name, category, features, target_keywords=None):
+LISTING_TEMPERATURE = 0.7
+COMPETITOR_TEMPERATURE = 0.5
+
+# Providers behind generate_amazon_listing(_async), see llm_router. Streaming
+# and competitor analysis stay on the OpenAI client below.
+router = Router.from_env()
+
+# Opens after repeated LLM failures so callers fall back at once instead of
+# waiting for every request to time out (see circuit_breaker)
+llm_breaker = CircuitBreaker.from_env("llm")
+
+# Where the analysis sections of a listing come from when the caller does not
+# pick sections: "local" asks the model for the copy only and computes
+# seo_analysis, aeo_analysis and psychological_techniques from it with
+# seo_analysis (exact keyword densities and character counts, no output
+# tokens); "llm" asks the model for the whole listing.
+LISTING_ANALYSIS = os.environ.get("LISTING_ANALYSIS", "local").lower()
+
+# OpenAI clients, created on first use so importing this module does not
+# require OPENAI_API_KEY (the Flask app falls back to templates without one).
+# The async client is shared by every coroutine-based caller (main.py,
+# stream_amazon_listing_async) so that generation requests never block the
+# event loop. Both sit on the pooled llm_transport clients, and every request
+# goes through transport.call/acall for deadlines, retries and hedging.
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the shared synchronous OpenAI client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = transport.openai_client(api_key=os.environ.get("OPENAI_API_KEY"))
+        return _client
+
+def get_async_client():
+    """Return the shared AsyncOpenAI client."""
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = transport.async_openai_client(api_key=os.environ.get("OPENAI_API_KEY"))
+        return _async_client
+
+def __getattr__(name):
+    # Keeps ``openai_utils.client`` / ``openai_utils.async_client`` working; import
+    # get_client / get_async_client instead, so the client is built on first use
+    if name == "client":
+        return get_client()
+    if name == "async_client":
+        return get_async_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Response cache for identical requests (configured via LISTING_CACHE_* env vars)
+listing_cache = ListingCache.from_env()
+
+# Near-duplicate cache consulted after an exact miss (SEMANTIC_CACHE_* env vars)
+semantic_cache = SemanticCache.from_env(ttl=listing_cache.ttl)
+
+# Concurrent cache misses for the same listing (same cache key, i.e. the same
+# normalized inputs) share one LLM call; see single_flight
+listing_flight = SingleFlight("listing")
+async_listing_flight = AsyncSingleFlight("listing_async")
+
+# Cache counters bound once for the request path (see metrics)
+_EXACT_HITS = metrics.CACHE_REQUESTS.labels("exact", "hit")
+_EXACT_MISSES = metrics.CACHE_REQUESTS.labels("exact", "miss")
+_SEMANTIC_HITS = metrics.CACHE_REQUESTS.labels("semantic", "hit")
+_SEMANTIC_MISSES = metrics.CACHE_REQUESTS.labels("semantic", "miss")
+_COMPETITOR_HITS = metrics.CACHE_REQUESTS.labels("competitors", "hit")
+_COMPETITOR_MISSES = metrics.CACHE_REQUESTS.labels("competitors", "miss")
+_LISTING_IN_FLIGHT = metrics.LLM_CALLS_IN_FLIGHT.labels("listing")
+_COMPETITORS_IN_FLIGHT = metrics.LLM_CALLS_IN_FLIGHT.labels("competitors")
+
+def listing_sections(sections=None):
+    """
+    Resolve the sections the model is asked to generate.
+
+    Args:
+        sections (list or str, optional): Requested sections; None picks the
+            default for LISTING_ANALYSIS
+
+    Returns:
+        tuple: Sections in prompts.LISTING_SECTIONS order
+
+    Raises:
+        ValueError: If a section is unknown
+    """
+    if sections is None:
+        return LISTING_SECTIONS if LISTING_ANALYSIS == "llm" else COPY_SECTIONS
+    return normalize_sections(sections)
+
+def _section_inputs(sections):
+    # Full listings keep the cache keys they had before sections existed
+    return {} if sections == LISTING_SECTIONS else {"sections": list(sections)}
+
+def _listing_cache_key(product_name, category, features, target_keywords, sections=LISTING_SECTIONS):
+    return make_key("listing", MODEL, PROMPT_VERSION, LISTING_TEMPERATURE,
+                    product_name=product_name, category=category,
+                    features=features, target_keywords=target_keywords,
+                    **_section_inputs(sections))
+
+def _semantic_partition(category, sections=LISTING_SECTIONS):
+    # Near duplicates are only looked up within the same category and prompt
+    return make_key("listing", MODEL, PROMPT_VERSION, LISTING_TEMPERATURE, category=category,
+                    **_section_inputs(sections))
+
+def _cached_listing(cache_key, product_name, category, features, target_keywords,
+                    sections=LISTING_SECTIONS):
+    """Return a listing from the exact or the near-duplicate cache, or None."""
+    cached = listing_cache.get(cache_key)
+    if cached is not None:
+        _EXACT_HITS.inc()
+        tracing.annotate(cache="exact")
+        logger.info("Serving cached listing for %s", product_name)
+        return cached
+    _EXACT_MISSES.inc()
+
+    cached, similarity = semantic_cache.lookup(_semantic_partition(category, sections), product_name,
+                                               features, target_keywords)
+    if cached is not None:
+        _SEMANTIC_HITS.inc()
+        tracing.annotate(cache="semantic", similarity=round(similarity, 3))
+        logger.info("Serving near-duplicate cached listing for %s (similarity %.3f)", product_name,
+                    similarity)
+    else:
+        _SEMANTIC_MISSES.inc()
+    return cached
+
+def _remember_listing(cache_key, product_name, category, features, target_keywords, listing,
+                      sections=LISTING_SECTIONS):
+    listing_cache.set(cache_key, listing)
+    semantic_cache.add(_semantic_partition(category, sections), product_name, features,
+                       target_keywords, listing)
+
+def _complete_listing(listing, sections, product_name, target_keywords):
+    """
+    Fill in the analysis sections the model was not asked for.
+
+    They are computed from the generated copy with the deterministic
+    seo_analysis analyzers, so every listing has the same shape whatever
+    sections were generated.
+    """
+    missing = [section for section in ANALYSIS_SECTIONS if section not in sections]
+    if not missing:
+        return listing
+    with metrics.SEO_ANALYSIS.time():
+        analysis = seo_analysis.analyze_listing(
+            product_name,
+            listing.get("title", ""),
+            listing.get("bullets", []),
+            listing.get("description", ""),
+            list(target_keywords or listing.get("keywords") or [])
+        )
+    for section in missing:
+        listing[section] = analysis[section]
+    return listing
+
+def _check_finish_reason(finish_reason, max_tokens):
+    if finish_reason == "length":
+        raise ValueError(f"Listing was cut off at max_tokens={max_tokens}")
+
+def _build_listing_messages(product_name, category, features, target_keywords=None, sections=None):
+    """
+    Build the chat messages used to generate an Amazon product listing.
+
+    Args:
+        product_name (str): The name of the product
+        category (str): Product category
+        features (list): List of key product features
+        target_keywords (list, optional): List of target keywords for SEO optimization
+        sections (list, optional): Sections to ask for, see listing_sections()
+
+    Returns:
+        list: Chat messages (system and user) for the completion request
+    """
+    return _render_listing_prompt(product_name, category, features, target_keywords,
+                                  listing_sections(sections)).messages
+
+def _render_listing_prompt(product_name, category, features, target_keywords=None,
+                           sections=LISTING_SECTIONS):
+    with metrics.PROMPT_BUILD.time():
+        rendered = listing_prompt(sections).render(product_name=product_name, category=category,
+                                                   features=features, target_keywords=target_keywords)
+    logger.info("Listing prompt v%s: ~%d tokens (%d in the static prefix)", rendered.version,
+                rendered.prompt_tokens, rendered.static_tokens)
+    return rendered
+
+def _record_prompt_usage(rendered, usage, model=MODEL):
+    # Router backends are named "provider:model"; tokens are counted per model
+    metrics.record_tokens(model.partition(":")[2] or model, usage)
+    tokens = prompt_registry.record(rendered, usage)
+    if tokens["prompt_tokens"] is not None:
+        logger.info("%s prompt used %s tokens, %s cached, %s completion", rendered.name,
+                    tokens['prompt_tokens'], tokens['cached_tokens'], tokens['completion_tokens'])
+
+def generate_amazon_listing(product_name, category, features, target_keywords=None, use_cache=True,
+                            sections=None):
     """
-    Generate an Amazon product listing using OpenAI's GPT-4o model.
+    Generate an Amazon product listing on the fastest healthy LLM backend
+    (OpenAI GPT-4o by default, see llm_router).
+
+    Concurrent calls with the same normalized inputs (a double-clicked
+    Generate, teammates generating the same product) share one LLM call
+    through listing_flight; each caller gets its own copy of the listing.
     
     Args:
         product_name (str): The name of the product
         category (str): Product category
         features (list): List of key product features
         target_keywords (list, optional): List of target keywords for SEO optimization
+        use_cache (bool): Serve identical and near-duplicate requests from
+            listing_cache and semantic_cache
+        sections (list, optional): Sections the model generates (see
+            prompts.LISTING_SECTIONS), default per LISTING_ANALYSIS; analysis
+            sections left out are computed locally from the generated copy
         
     Returns:
         dict: Generated listing with title, bullets, description, keywords, and SEO analysis
+
+    Raises:
+        CircuitOpenError: If llm_breaker is open (no LLM call was made)
     """
-    logger.info(f"Generating listing for {product_name} using OpenAI GPT-4o")
-    
-    # Format feature list for prompt
-    features_formatted = "\n".join([f"- {feature}" for feature in features])
-    
-    # Prepare keywords section for prompt
-    keywords_section = ""
-    if target_keywords and len(target_keywords) > 0:
-        keywords_formatted = ", ".join(target_keywords)
-        keywords_section = f"\nTarget Keywords: {keywords_formatted}"
+    sections = listing_sections(sections)
+    cache_key = _listing_cache_key(product_name, category, features, target_keywords, sections)
+    if use_cache:
+        cached = _cached_listing(cache_key, product_name, category, features, target_keywords, sections)
+        if cached is not None:
+            return cached
+
+    # Identical requests already in flight share that call instead of making their own
+    listing, shared = listing_flight.do(cache_key, _generate_listing, cache_key, product_name, category,
+                                        features, target_keywords, sections)
+    return copy.deepcopy(listing) if shared else listing
+
+def _generate_listing(cache_key, product_name, category, features, target_keywords, sections):
+    """Make the LLM call behind generate_amazon_listing and cache its listing."""
+    logger.info("Generating listing for %s", product_name)
     
-    # Craft the system prompt
-    system_message = """You are an expert Amazon listing generator specialized in creating high-converting product listings.
-Your goal is to create listings that rank well in Amazon search (SEO), optimize for Amazon's A9 algorithm (AEO),
-and incorporate proven psychological selling techniques to maximize conversion rates.
-
-You will provide:
-1. A compelling product title (under 200 characters) 
-2. 5 powerful bullet points that highlight key benefits
-3. A persuasive product description (4-5 paragraphs)
-4. SEO analysis including keyword placement and density
-5. AEO (Amazon Everything Optimizer) analysis for Amazon's algorithms
-6. Psychological selling techniques incorporated (scarcity, social proof, authority, reciprocity)
-
-Format your response as a valid JSON object with the following structure:
-{
-  "title": "string",
-  "bullets": ["string", "string", "string", "string", "string"],
-  "description": "string",
-  "keywords": ["string", "string", ...],
-  "seo_analysis": {
-    "title_analysis": {
-      "character_count": number,
-      "character_limit": number,
-      "within_limit": boolean,
-      "recommendation": "string"
-    },
-    "keyword_placement": {
-      "keywords_in_title": ["string", ...],
-      "keywords_in_bullets": ["string", ...],
-      "missing_keywords": ["string", ...]
-    },
-    "keyword_density": {
-      "keyword1": {"count": number, "percentage": number},
-      "keyword2": {"count": number, "percentage": number},
-      ...
-    },
-    "seo_score": {
-      "score": number,
-      "max_score": number,
-      "percentage": number,
-      "rating": "string"
-    },
-    "recommendations": ["string", ...]
-  },
-  "aeo_analysis": {
-    "strategies_applied": ["string", ...],
-    "recommendations": ["string", ...]
-  },
-  "psychological_techniques": {
-    "applied_techniques": ["string", ...],
-    "impact_analysis": {
-      "scarcity": "string",
-      "social_proof": "string",
-      "authority": "string",
-      "reciprocity": "string"
-    }
-  }
-}"""
-
-    # Craft the user prompt
-    user_message = f"""Generate a professional Amazon product listing for the following product:
-
-Product Name: {product_name}
-Category: {category}
-Key Features:
-{features_formatted}{keywords_section}
-
-Create a listing that:
-1. Is optimized for Amazon SEO and AEO (Amazon's A9 algorithm)
-2. Includes psychological selling techniques to increase conversions
-3. Follows Amazon's best practices for product listings
-4. Is tailored specifically for the {category} category
-5. Highlights the product's unique benefits and competitive advantages
-
-The listing should be comprehensive, persuasive, and ready to use on Amazon."""
+    prompt = _render_listing_prompt(product_name, category, features, target_keywords, sections)
+    max_tokens = token_budget.max_tokens_for(sections, len(target_keywords or []))
 
     try:
-        # Call the OpenAI API
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7
-        )
+        # Run the completion on the fastest healthy backend
+        with _LISTING_IN_FLIGHT.track_inprogress(), metrics.LLM_WAIT.time():
+            completion = llm_breaker.call(
+                router.complete,
+                prompt.messages,
+                temperature=LISTING_TEMPERATURE,
+                max_tokens=max_tokens,
+                json_mode=True
+            )
         
+        _record_prompt_usage(prompt, completion.usage, completion.backend)
+
         # Parse the response
-        content = response.choices[0].message.content
-        listing_data = json.loads(content)
+        _check_finish_reason(completion.finish_reason, max_tokens)
+        with metrics.JSON_PARSE.time():
+            listing_data = json.loads(completion.content)
+        listing_data = _complete_listing(listing_data, sections, product_name, target_keywords)
+        _remember_listing(cache_key, product_name, category, features, target_keywords, listing_data,
+                          sections)
         
-        logger.info("Successfully generated listing using OpenAI GPT-4o")
+        logger.info("Successfully generated listing using %s", completion.backend)
         return listing_data
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        logger.error(f"Error generating listing with OpenAI: {str(e)}")
+        logger.error("Error generating listing: %s", e)
         raise Exception(f"Failed to generate listing: {str(e)}")
 
-def analyze_competitive_listings(competitors, product_name, category):
+async def generate_amazon_listing_async(product_name, category, features, target_keywords=None,
+                                        use_cache=True, sections=None):
+    """
+    Generate an Amazon product listing without blocking the event loop.
+
+    Same contract as generate_amazon_listing, but awaits the async
+    provider clients so it can be called from FastAPI/asyncio handlers;
+    identical calls in flight on the event loop are coalesced through
+    async_listing_flight.
+
+    Args:
+        product_name (str): The name of the product
+        category (str): Product category
+        features (list): List of key product features
+        target_keywords (list, optional): List of target keywords for SEO optimization
+        use_cache (bool): Serve identical and near-duplicate requests from
+            listing_cache and semantic_cache
+        sections (list, optional): Sections the model generates (see
+            prompts.LISTING_SECTIONS), default per LISTING_ANALYSIS; analysis
+            sections left out are computed locally from the generated copy
+
+    Returns:
+        dict: Generated listing with title, bullets, description, keywords, and SEO analysis
+
+    Raises:
+        CircuitOpenError: If llm_breaker is open (no LLM call was made)
+    """
+    sections = listing_sections(sections)
+    cache_key = _listing_cache_key(product_name, category, features, target_keywords, sections)
+    if use_cache:
+        cached = _cached_listing(cache_key, product_name, category, features, target_keywords, sections)
+        if cached is not None:
+            return cached
+
+    listing, shared = await async_listing_flight.do(cache_key, _generate_listing_async, cache_key,
+                                                    product_name, category, features, target_keywords,
+                                                    sections)
+    return copy.deepcopy(listing) if shared else listing
+
+async def _generate_listing_async(cache_key, product_name, category, features, target_keywords, sections):
+    """Async variant of _generate_listing."""
+    logger.info("Generating listing for %s (async)", product_name)
+
+    prompt = _render_listing_prompt(product_name, category, features, target_keywords, sections)
+    max_tokens = token_budget.max_tokens_for(sections, len(target_keywords or []))
+
+    try:
+        with _LISTING_IN_FLIGHT.track_inprogress(), metrics.LLM_WAIT.time():
+            completion = await llm_breaker.acall(
+                router.acomplete,
+                prompt.messages,
+                temperature=LISTING_TEMPERATURE,
+                max_tokens=max_tokens,
+                json_mode=True
+            )
+        _record_prompt_usage(prompt, completion.usage, completion.backend)
+
+        _check_finish_reason(completion.finish_reason, max_tokens)
+        with metrics.JSON_PARSE.time():
+            listing_data = json.loads(completion.content)
+        listing_data = _complete_listing(listing_data, sections, product_name, target_keywords)
+        _remember_listing(cache_key, product_name, category, features, target_keywords, listing_data,
+                          sections)
+
+        logger.info("Successfully generated listing using %s (async)", completion.backend)
+        return listing_data
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error("Error generating listing: %s", e)
+        raise Exception(f"Failed to generate listing: {str(e)}")
+
+async def stream_amazon_listing_async(product_name, category, features, target_keywords=None,
+                                      use_cache=True, sections=None):
+    """
+    Stream an Amazon product listing field by field as the model writes it.
+
+    The completion is requested with ``stream=True`` and its deltas are fed
+    through an IncrementalJSONParser, so each top-level field (title,
+    description, ...) and each bullet is yielded as soon as it is complete
+    instead of after the whole JSON object has arrived.
+
+    Args:
+        product_name (str): The name of the product
+        category (str): Product category
+        features (list): List of key product features
+        target_keywords (list, optional): List of target keywords for SEO optimization
+        use_cache (bool): Serve identical and near-duplicate requests from
+            listing_cache and semantic_cache
+        sections (list, optional): Sections the model generates (see
+            prompts.LISTING_SECTIONS), default per LISTING_ANALYSIS; analysis
+            sections left out are computed locally from the generated copy
+
+    Yields:
+        tuple: ``(path, value)`` pairs such as ``(("title",), "...")`` or
+        ``(("bullets", 0), "...")``; the last pair is ``((), listing)`` with
+        the complete listing dict
+    """
+    sections = listing_sections(sections)
+    cache_key = _listing_cache_key(product_name, category, features, target_keywords, sections)
+    if use_cache:
+        cached = _cached_listing(cache_key, product_name, category, features, target_keywords, sections)
+        if cached is not None:
+            for key, value in cached.items():
+                if isinstance(value, list):
+                    for index, item in enumerate(value):
+                        yield (key, index), item
+                yield (key,), value
+            yield (), cached
+            return
+
+    logger.info("Streaming listing for %s using OpenAI GPT-4o", product_name)
+
+    prompt = _render_listing_prompt(product_name, category, features, target_keywords, sections)
+    max_tokens = token_budget.max_tokens_for(sections, len(target_keywords or []))
+    parser = IncrementalJSONParser(max_depth=2)
+    usage = listing = None
+
+    try:
+        # Retried until the response starts; a stream is never hedged (the
+        # LLM wait is the time to the first byte)
+        with metrics.LLM_WAIT.time():
+            stream = await llm_breaker.acall(
+                transport.acall,
+                get_async_client().chat.completions.create,
+                key="listing_stream",
+                hedge=False,
+                model=MODEL,
+                messages=prompt.messages,
+                response_format={"type": "json_object"},
+                temperature=LISTING_TEMPERATURE,
+                max_tokens=max_tokens,
+                stream=True,
+                # The final chunk then carries the token usage
+                stream_options={"include_usage": True}
+            )
+
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            _check_finish_reason(chunk.choices[0].finish_reason, max_tokens)
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            for path, value in parser.feed(delta):
+                if path == ():
+                    listing = value
+                    continue
+                yield path, value
+
+        for path, value in parser.close():
+            if path == ():
+                listing = value
+                continue
+            yield path, value
+        _record_prompt_usage(prompt, usage)
+
+        listing = _complete_listing(listing, sections, product_name, target_keywords)
+        for section in ANALYSIS_SECTIONS:
+            if section not in sections:
+                yield (section,), listing[section]
+        _remember_listing(cache_key, product_name, category, features, target_keywords, listing,
+                          sections)
+        yield (), listing
+
+    except Exception as e:
+        logger.error("Error streaming listing with OpenAI: %s", e)
+        raise Exception(f"Failed to generate listing: {str(e)}")
+
+def analyze_competitive_listings(competitors, product_name, category, use_cache=True):
     """
     Analyze competitive listings to extract insights and keywords.
     
     Args:
-        competitors (list): List of competitor URLs or listing titles
+        competitors (list): Competitor listing titles or URLs, or pages
+            parsed by competitor_pages (dicts with title, bullets and
+            description)
         product_name (str): Name of the product
         category (str): Product category
+        use_cache (bool): Serve identical requests from listing_cache
         
     Returns:
         dict: Analysis of competitive listings
     """
     if not competitors or len(competitors) == 0:
         return None
-    
-    competitors_formatted = "\n".join([f"- {comp}" for comp in competitors])
-    
-    system_message = """You are an expert Amazon competitive analyst.
-Your goal is to analyze competitor listings and extract useful insights for creating a better listing.
-Focus on identifying keywords, selling strategies, and unique selling propositions."""
-
-    user_message = f"""Analyze the following competitor listings for a product named "{product_name}" in the {category} category:
-
-{competitors_formatted}
-
-Provide insights on:
-1. Common keywords used
-2. Psychological selling techniques employed
-3. Unique selling propositions
-4. Common benefits highlighted
-5. Title structure patterns
 
-Format as a structured JSON response."""
+    cache_key = make_key("competitors", MODEL, COMPETITOR_PROMPT.version, COMPETITOR_TEMPERATURE,
+                         competitors=competitors, product_name=product_name, category=category)
+    if use_cache:
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            _COMPETITOR_HITS.inc()
+            return cached
+        _COMPETITOR_MISSES.inc()
+    
+    prompt = prompt_registry.render("competitors", competitors=competitors,
+                                    product_name=product_name, category=category)
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.5
-        )
+        with _COMPETITORS_IN_FLIGHT.track_inprogress(), metrics.LLM_WAIT.time():
+            response = transport.call(
+                get_client().chat.completions.create,
+                key="competitors",
+                model=MODEL,
+                messages=prompt.messages,
+                response_format={"type": "json_object"},
+                temperature=COMPETITOR_TEMPERATURE
+            )
+        _record_prompt_usage(prompt, response.usage)
         
         content = response.choices[0].message.content
         analysis_data = json.loads(content)
+        listing_cache.set(cache_key, analysis_data)
         
         return analysis_data
         
     except Exception as e:
-        logger.error(f"Error analyzing competitors with OpenAI: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Error analyzing competitors with OpenAI: %s", e)
+        return None
+
+async def analyze_competitive_listings_async(competitors, product_name, category, use_cache=True):
+    """
+    Async variant of analyze_competitive_listings for FastAPI/asyncio handlers.
+
+    Returns:
+        dict: Analysis of competitive listings, or None on failure
+    """
+    if not competitors:
+        return None
+
+    cache_key = make_key("competitors", MODEL, COMPETITOR_PROMPT.version, COMPETITOR_TEMPERATURE,
+                         competitors=competitors, product_name=product_name, category=category)
+    if use_cache:
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            _COMPETITOR_HITS.inc()
+            return cached
+        _COMPETITOR_MISSES.inc()
+
+    prompt = prompt_registry.render("competitors", competitors=competitors,
+                                    product_name=product_name, category=category)
+
+    try:
+        with _COMPETITORS_IN_FLIGHT.track_inprogress(), metrics.LLM_WAIT.time():
+            response = await transport.acall(
+                get_async_client().chat.completions.create,
+                key="competitors",
+                model=MODEL,
+                messages=prompt.messages,
+                response_format={"type": "json_object"},
+                temperature=COMPETITOR_TEMPERATURE
+            )
+        _record_prompt_usage(prompt, response.usage)
+
+        analysis_data = json.loads(response.choices[0].message.content)
+        listing_cache.set(cache_key, analysis_data)
+        return analysis_data
+
+    except Exception as e:
+        logger.error("Error analyzing competitors with OpenAI: %s", e)
+        return None
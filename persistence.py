@@ -0,0 +1,117 @@
+"""
+Batched persistence of generated listings.
+
+A listing and its bullet points and competitor URLs are written with three
+bulk INSERT statements inside one transaction: the listings are inserted
+with RETURNING to obtain their ids, then every child row of every listing
+goes out as a single executemany. store_listings accepts any number of
+listings, so batch jobs and the write-behind queue persist whole batches in
+one round trip per table instead of one flush per listing and one INSERT per
+child row. Listings stored this way are added to the full-text search index
+(see search.py) in the same transaction.
+"""
+import logging
+
+from sqlalchemy import insert
+
+import search
+from models import BulletPoint, CompetitorURL, Listing
+
+logger = logging.getLogger(__name__)
+
+
+def listing_record(product_name, category, title, description, keywords, bullets, competitor_urls=None):
+    """
+    Normalize a generated listing into a record for store_listings.
+
+    Args:
+        product_name (str): The name of the product
+        category (str): Product category
+        title (str): Listing title
+        description (str): Listing description
+        keywords (list or str): Keywords, joined with ", " when a list
+        bullets (list): Bullet point strings
+        competitor_urls (list, optional): URL strings or {"url", "title"} dicts
+
+    Returns:
+        dict: Record with listing columns plus "bullets" and "competitors"
+    """
+    if isinstance(keywords, (list, tuple)):
+        keywords = ", ".join(str(k) for k in keywords)
+
+    competitors = []
+    for competitor in competitor_urls or []:
+        if isinstance(competitor, dict):
+            if competitor.get("url"):
+                competitors.append({"url": competitor["url"], "title": competitor.get("title")})
+        elif competitor:
+            competitors.append({"url": str(competitor), "title": None})
+
+    return {
+        "product_name": product_name,
+        "category": category,
+        "title": title,
+        "description": description,
+        "keywords": keywords,
+        "bullets": [b for b in (bullets or []) if b],
+        "competitors": competitors
+    }
+
+
+def store_listings(records, session, commit=True):
+    """
+    Insert listings and their child rows in one transaction.
+
+    Args:
+        records (list): Records built with listing_record
+        session (Session): SQLAlchemy session (db.session inside Flask)
+        commit (bool): Commit the transaction; pass False to let the caller
+            commit as part of a larger unit of work
+
+    Returns:
+        list: New listing ids, in the order of ``records``
+    """
+    if not records:
+        return []
+
+    listing_rows = [{
+        "product_name": r["product_name"],
+        "category": r["category"],
+        "title": r["title"],
+        "description": r["description"],
+        "keywords": r.get("keywords")
+    } for r in records]
+
+    try:
+        ids = session.scalars(
+            insert(Listing).returning(Listing.id, sort_by_parameter_order=True),
+            listing_rows
+        ).all()
+
+        bullet_rows = []
+        competitor_rows = []
+        for listing_id, record in zip(ids, records):
+            for position, text in enumerate(record.get("bullets", [])):
+                bullet_rows.append({"listing_id": listing_id, "bullet_text": text, "position": position})
+            for position, competitor in enumerate(record.get("competitors", [])):
+                competitor_rows.append({
+                    "listing_id": listing_id,
+                    "url": competitor["url"],
+                    "title": competitor.get("title"),
+                    "position": position
+                })
+
+        if bullet_rows:
+            session.execute(insert(BulletPoint), bullet_rows)
+        if competitor_rows:
+            session.execute(insert(CompetitorURL), competitor_rows)
+
+        search.index_listings(session, ids)
+
+        if commit:
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    return list(ids)
@@ -0,0 +1,98 @@
+"""
+Shared process pools and an ordered, bounded map over them.
+
+CPU-bound batch work (template generation, SEO scoring, competitor page
+parsing) runs in process pools that are created on first use and kept for
+the life of the process, one per kind of work. map_ordered() spreads an
+iterable over such a pool in chunks and yields the results in input order
+while at most ``workers * 2`` chunks are in flight, so arbitrarily large
+inputs are processed with bounded memory while the pool stays busy.
+"""
+import itertools
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# Items handed to a worker process per task; amortizes pickling overhead
+DEFAULT_CHUNKSIZE = 64
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, workers=None):
+    """
+    Return the shared process pool called ``name``, creating it on first use.
+
+    Args:
+        name (str): Kind of work, e.g. "seo_scoring"; each name has its own pool
+        workers (int, optional): Worker processes, defaults to the CPU count
+
+    Returns:
+        ProcessPoolExecutor: The pool
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        return pool
+
+
+def _map_chunk(fn, items):
+    return [fn(item) for item in items]
+
+
+def map_ordered(fn, items, name, workers=None, chunksize=DEFAULT_CHUNKSIZE, executor=None):
+    """
+    Yield ``fn(item)`` for every item, in order, computed in a process pool.
+
+    Input is consumed lazily, ``chunksize`` items per worker task, with at
+    most ``workers * 2`` tasks in flight.
+
+    Args:
+        fn (callable): Module-level function (it is pickled by reference)
+        items (iterable): Inputs
+        name (str): Shared pool to use, see get_pool()
+        workers (int, optional): Worker processes; 1 runs ``fn`` in-process
+        chunksize (int): Items per worker task
+        executor (Executor, optional): Pool to use instead of the shared one
+
+    Yields:
+        One result per item, in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 and executor is None:
+        for item in items:
+            yield fn(item)
+        return
+
+    executor = executor or get_pool(name, workers)
+    iterator = iter(items)
+    pending = deque()
+    while True:
+        while len(pending) < workers * 2:
+            chunk = list(itertools.islice(iterator, chunksize))
+            if not chunk:
+                break
+            pending.append(executor.submit(_map_chunk, fn, chunk))
+        if not pending:
+            return
+        yield from pending.popleft().result()
+
+
+@contextmanager
+def cli_executor(workers):
+    """
+    Process pool for a command-line run, shut down when the run ends.
+
+    Yields:
+        ProcessPoolExecutor or None: None for a single worker (work in-process)
+    """
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        yield executor
+    finally:
+        if executor is not None:
+            executor.shutdown()
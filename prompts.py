@@ -0,0 +1,399 @@
+"""
+Versioned prompt registry for the OpenAI generation calls.
+
+Each PromptTemplate pairs a static system prompt with a per-request user
+template. The system prompt (instructions and the full JSON schema) is built
+once at import and every request sends the very same string as the first
+message, so the prompt prefix stays byte-identical across requests and
+provider-side prompt caching can reuse it. Only the short user message is
+rendered per request.
+
+Rendering also estimates the prompt's token count, and PromptRegistry.record
+adds the provider-reported prompt and cached tokens of each response, so
+stats() shows prompt sizes and the prompt-cache hit ratio per prompt. Note
+that OpenAI only caches prompts of 1,024 tokens or more; the listing prompt
+is below that today, so cached tokens stay at zero until the static prefix
+grows (e.g. with few-shot examples).
+
+Bump a template's version whenever its text changes: the version is part of
+the listing cache keys. listing_prompt() returns the variant of the listing
+prompt that only asks for some sections (see normalize_sections).
+"""
+import hashlib
+import string
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - exercised where tiktoken is absent
+    tiktoken = None
+
+# Tokens the chat format adds per message (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Removes ASCII punctuation; each removed mark counts as one token
+_STRIP_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            _encoding = False
+            if tiktoken is not None:
+                try:
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    # The encoding is downloaded on first use; offline hosts estimate
+                    pass
+        return _encoding
+
+
+def estimate_tokens(text):
+    """
+    Count (or estimate) the tokens of a text for the gpt-4o tokenizer.
+
+    Uses tiktoken when it is installed and its encoding is available,
+    otherwise a word and punctuation count that is usually within 10-15%
+    of the real figure for English listing copy and JSON.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Token count
+    """
+    if not text:
+        return 0
+    encoding = _encoding if _encoding is not None else _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    # Words (long ones count as several tokens) plus punctuation marks
+    stripped = text.translate(_STRIP_PUNCTUATION)
+    words = stripped.split()
+    return len(words) + sum(len(word) // 8 for word in words) + len(text) - len(stripped)
+
+
+RenderedPrompt = namedtuple("RenderedPrompt", "name version messages prompt_tokens static_tokens")
+
+
+class PromptTemplate:
+    """
+    A versioned prompt: a static system prompt and a per-request user template.
+
+    Args:
+        name (str): Prompt name, e.g. "listing"
+        version (str): Prompt version, part of the response cache keys
+        system (str): System prompt, sent unchanged with every request
+        user_template (str): str.format template of the user message
+        fields (callable, optional): Maps render() keyword arguments to the
+            template's fields; defaults to passing them through
+    """
+
+    def __init__(self, name, version, system, user_template, fields=None):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.user_template = user_template
+        self.fields = fields
+        self.static_tokens = estimate_tokens(system) + MESSAGE_OVERHEAD_TOKENS
+        self.fingerprint = hashlib.sha256(system.encode("utf-8")).hexdigest()[:16]
+
+    def render(self, **inputs):
+        """Render the messages for one request."""
+        values = self.fields(**inputs) if self.fields else inputs
+        user = self.user_template.format(**values)
+        messages = [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": user}
+        ]
+        prompt_tokens = self.static_tokens + estimate_tokens(user) + MESSAGE_OVERHEAD_TOKENS
+        return RenderedPrompt(self.name, self.version, messages, prompt_tokens, self.static_tokens)
+
+
+class PromptRegistry:
+    """Registered prompt templates and per-prompt token counters."""
+
+    def __init__(self):
+        self._templates = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def register(self, template, active=True):
+        """Add a template; the active version of a name is used by default."""
+        self._templates[(template.name, template.version)] = template
+        if active or template.name not in self._active:
+            self._active[template.name] = template.version
+        return template
+
+    def get(self, name, version=None):
+        """Return the template of ``name`` at ``version`` (default: active)."""
+        return self._templates[(name, version or self._active[name])]
+
+    def render(self, name, version=None, **inputs):
+        """Render the messages of a prompt for one request."""
+        return self.get(name, version).render(**inputs)
+
+    def record(self, rendered, usage=None):
+        """
+        Count a sent prompt and, when available, the provider's usage figures.
+
+        Args:
+            rendered (RenderedPrompt): Prompt that was sent
+            usage (object, optional): ``response.usage`` of the completion;
+                its prompt_tokens, prompt_tokens_details.cached_tokens and
+                completion_tokens are counted
+
+        Returns:
+            dict: Token figures of this request
+        """
+        provider_tokens = getattr(usage, "prompt_tokens", None) if usage is not None else None
+        details = getattr(usage, "prompt_tokens_details", None) if usage is not None else None
+        cached_tokens = (getattr(details, "cached_tokens", None) if details is not None else None) or 0
+        completion_tokens = (getattr(usage, "completion_tokens", None) if usage is not None else None) or 0
+
+        with self._lock:
+            stats = self._stats.setdefault(rendered.name, {
+                "requests": 0, "estimated_prompt_tokens": 0, "static_tokens": rendered.static_tokens,
+                "reported_requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "cache_hits": 0,
+                "completion_tokens": 0
+            })
+            stats["requests"] += 1
+            stats["estimated_prompt_tokens"] += rendered.prompt_tokens
+            stats["static_tokens"] = rendered.static_tokens
+            if provider_tokens is not None:
+                stats["reported_requests"] += 1
+                stats["prompt_tokens"] += provider_tokens
+                stats["cached_tokens"] += cached_tokens
+                stats["completion_tokens"] += completion_tokens
+                if cached_tokens:
+                    stats["cache_hits"] += 1
+
+        return {"estimated_prompt_tokens": rendered.prompt_tokens, "prompt_tokens": provider_tokens,
+                "cached_tokens": cached_tokens, "completion_tokens": completion_tokens}
+
+    def stats(self):
+        """Return token counters and prompt-cache hit ratios per prompt name."""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        for name, values in stats.items():
+            template = self.get(name)
+            values["version"] = template.version
+            values["fingerprint"] = template.fingerprint
+            values["cache_hit_ratio"] = (round(values["cache_hits"] / values["reported_requests"], 4)
+                                         if values["reported_requests"] else 0.0)
+            values["cached_token_ratio"] = (round(values["cached_tokens"] / values["prompt_tokens"], 4)
+                                            if values["prompt_tokens"] else 0.0)
+        return stats
+
+
+def _listing_fields(product_name, category, features, target_keywords=None):
+    keywords_section = ""
+    if target_keywords:
+        keywords_section = "\nTarget Keywords: " + ", ".join(target_keywords)
+    return {
+        "product_name": product_name,
+        "category": category,
+        "features_formatted": "\n".join("- " + str(feature) for feature in features),
+        "keywords_section": keywords_section
+    }
+
+
+def _format_competitor(competitor):
+    # Titles/URLs as given; pages parsed by competitor_pages with their copy
+    if not isinstance(competitor, dict):
+        return "- " + str(competitor)
+    lines = ["- " + (competitor.get("title") or competitor.get("url") or "Untitled listing")]
+    for bullet in competitor.get("bullets") or []:
+        lines.append("  * " + bullet)
+    if competitor.get("description"):
+        lines.append("  Description: " + competitor["description"])
+    return "\n".join(lines)
+
+
+def _competitor_fields(competitors, product_name, category):
+    return {
+        "product_name": product_name,
+        "category": category,
+        "competitors_formatted": "\n".join(_format_competitor(competitor) for competitor in competitors)
+    }
+
+
+# Sections of a generated listing: copy first, then the analyses
+COPY_SECTIONS = ("title", "bullets", "description", "keywords")
+ANALYSIS_SECTIONS = ("seo_analysis", "aeo_analysis", "psychological_techniques")
+LISTING_SECTIONS = COPY_SECTIONS + ANALYSIS_SECTIONS
+
+_LISTING_INTRO = """You are an expert Amazon listing generator specialized in creating high-converting product listings.
+Your goal is to create listings that rank well in Amazon search (SEO), optimize for Amazon's A9 algorithm (AEO),
+and incorporate proven psychological selling techniques to maximize conversion rates.
+
+You will provide:
+"""
+
+# "You will provide" items; keywords only appear in the schema
+_LISTING_ITEMS = {
+    "title": "A compelling product title (under 200 characters) ",
+    "bullets": "5 powerful bullet points that highlight key benefits",
+    "description": "A persuasive product description (4-5 paragraphs)",
+    "seo_analysis": "SEO analysis including keyword placement and density",
+    "aeo_analysis": "AEO (Amazon Everything Optimizer) analysis for Amazon's algorithms",
+    "psychological_techniques": "Psychological selling techniques incorporated "
+                                "(scarcity, social proof, authority, reciprocity)",
+}
+
+_LISTING_SCHEMA = {
+    "title": '''  "title": "string"''',
+    "bullets": '''  "bullets": ["string", "string", "string", "string", "string"]''',
+    "description": '''  "description": "string"''',
+    "keywords": '''  "keywords": ["string", "string", ...]''',
+    "seo_analysis": '''  "seo_analysis": {
+    "title_analysis": {
+      "character_count": number,
+      "character_limit": number,
+      "within_limit": boolean,
+      "recommendation": "string"
+    },
+    "keyword_placement": {
+      "keywords_in_title": ["string", ...],
+      "keywords_in_bullets": ["string", ...],
+      "missing_keywords": ["string", ...]
+    },
+    "keyword_density": {
+      "keyword1": {"count": number, "percentage": number},
+      "keyword2": {"count": number, "percentage": number},
+      ...
+    },
+    "seo_score": {
+      "score": number,
+      "max_score": number,
+      "percentage": number,
+      "rating": "string"
+    },
+    "recommendations": ["string", ...]
+  }''',
+    "aeo_analysis": '''  "aeo_analysis": {
+    "strategies_applied": ["string", ...],
+    "recommendations": ["string", ...]
+  }''',
+    "psychological_techniques": '''  "psychological_techniques": {
+    "applied_techniques": ["string", ...],
+    "impact_analysis": {
+      "scarcity": "string",
+      "social_proof": "string",
+      "authority": "string",
+      "reciprocity": "string"
+    }
+  }''',
+}
+
+
+def normalize_sections(sections):
+    """
+    Validate requested listing sections and return them in canonical order.
+
+    Args:
+        sections (iterable or None): Section names; None means all sections
+
+    Returns:
+        tuple: Sections in LISTING_SECTIONS order
+
+    Raises:
+        ValueError: If a section is unknown or none is requested
+    """
+    if sections is None:
+        return LISTING_SECTIONS
+    if isinstance(sections, str):
+        sections = [s.strip() for s in sections.split(",") if s.strip()]
+    unknown = set(sections) - set(LISTING_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown listing sections: {', '.join(sorted(unknown))}")
+    selected = tuple(s for s in LISTING_SECTIONS if s in sections)
+    if not selected:
+        raise ValueError("At least one listing section must be requested")
+    return selected
+
+
+def build_listing_system_prompt(sections=LISTING_SECTIONS):
+    """Build the listing system prompt asking only for ``sections``."""
+    items = [_LISTING_ITEMS[s] for s in sections if s in _LISTING_ITEMS]
+    return (_LISTING_INTRO
+            + "\n".join(f"{i}. {item}" for i, item in enumerate(items, start=1))
+            + "\n\nFormat your response as a valid JSON object with the following structure:\n{\n"
+            + ",\n".join(_LISTING_SCHEMA[s] for s in sections)
+            + "\n}")
+
+
+LISTING_SYSTEM_PROMPT = build_listing_system_prompt()
+
+LISTING_USER_TEMPLATE = """Generate a professional Amazon product listing for the following product:
+
+Product Name: {product_name}
+Category: {category}
+Key Features:
+{features_formatted}{keywords_section}
+
+Create a listing that:
+1. Is optimized for Amazon SEO and AEO (Amazon's A9 algorithm)
+2. Includes psychological selling techniques to increase conversions
+3. Follows Amazon's best practices for product listings
+4. Is tailored specifically for the {category} category
+5. Highlights the product's unique benefits and competitive advantages
+
+The listing should be comprehensive, persuasive, and ready to use on Amazon."""
+
+COMPETITOR_SYSTEM_PROMPT = """You are an expert Amazon competitive analyst.
+Your goal is to analyze competitor listings and extract useful insights for creating a better listing.
+Focus on identifying keywords, selling strategies, and unique selling propositions."""
+
+COMPETITOR_USER_TEMPLATE = """Analyze the following competitor listings for a product named "{product_name}" in the {category} category:
+
+{competitors_formatted}
+
+Provide insights on:
+1. Common keywords used
+2. Psychological selling techniques employed
+3. Unique selling propositions
+4. Common benefits highlighted
+5. Title structure patterns
+
+Format as a structured JSON response."""
+
+registry = PromptRegistry()
+
+LISTING_PROMPT = registry.register(PromptTemplate(
+    "listing", "1", LISTING_SYSTEM_PROMPT, LISTING_USER_TEMPLATE, fields=_listing_fields
+))
+COMPETITOR_PROMPT = registry.register(PromptTemplate(
+    "competitors", "1", COMPETITOR_SYSTEM_PROMPT, COMPETITOR_USER_TEMPLATE, fields=_competitor_fields
+))
+
+
+@lru_cache(maxsize=None)
+def _section_prompt(sections):
+    return registry.register(PromptTemplate(
+        f"listing[{','.join(sections)}]", LISTING_PROMPT.version,
+        build_listing_system_prompt(sections), LISTING_USER_TEMPLATE, fields=_listing_fields
+    ))
+
+
+def listing_prompt(sections=None):
+    """
+    Return the listing prompt asking the model for ``sections`` only.
+
+    Every section subset gets its own template (built once, so its prefix
+    is byte-identical across requests); all sections is LISTING_PROMPT.
+
+    Raises:
+        ValueError: If a section is unknown
+    """
+    sections = normalize_sections(sections)
+    if sections == LISTING_SECTIONS:
+        return LISTING_PROMPT
+    return _section_prompt(sections)
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token-bucket rate limiter for asyncio code.
+
+    The bucket holds at most ``capacity`` tokens and refills continuously at
+    ``rate`` tokens per second. ``acquire`` waits until enough tokens are
+    available, so callers are smoothed to the configured rate while short
+    bursts up to ``capacity`` go through immediately.
+
+    Args:
+        rate (float): Tokens added per second
+        capacity (float, optional): Bucket size, defaults to one second of tokens
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute, capacity=None):
+        """Create a bucket from a provider-style requests-per-minute limit."""
+        return cls(requests_per_minute / 60.0, capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        """Wait until ``tokens`` are available and take them."""
+        if tokens > self.capacity:
+            raise ValueError("cannot acquire more tokens than the bucket capacity")
+        # The lock keeps waiters in FIFO order so no caller is starved
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
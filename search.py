@@ -0,0 +1,219 @@
+"""
+Full-text search over stored listings.
+
+Listing titles, keywords, bullet points and descriptions are kept in an
+inverted index next to the listing tables:
+
+- SQLite: an FTS5 virtual table ``listing_fts`` (porter stemming) whose
+  rowid is the listing id, ranked with bm25.
+- Postgres: a ``listing_search`` table holding one weighted tsvector per
+  listing behind a GIN index, ranked with ts_rank_cd.
+
+In both, matches in the title weigh most, then keywords, bullet points and
+the description. ensure_search_index() creates the index and backfills
+listings stored while it did not exist; after that persistence.store_listings
+indexes every new batch in the same transaction (index_listings), so search
+results never lag behind stored listings.
+"""
+import logging
+import re
+import weakref
+
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.orm import selectinload
+
+from models import BulletPoint, Listing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS = 20
+MAX_RESULTS = 100
+
+# Postgres text search configuration used for documents and queries
+TEXT_SEARCH_CONFIG = "english"
+
+# bm25 column weights for (title, keywords, bullets, description)
+FTS5_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Engines whose index has been created by ensure_search_index
+_indexed_binds = weakref.WeakSet()
+
+_LISTING = Listing.__tablename__
+_BULLET = BulletPoint.__tablename__
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS listing_fts USING fts5("
+    "title, keywords, bullets, description, tokenize='porter unicode61')",
+)
+
+_SQLITE_SOURCE = (
+    f"SELECT l.id, coalesce(l.title, ''), coalesce(l.keywords, ''), "
+    f"coalesce((SELECT group_concat(b.bullet_text, ' ') FROM {_BULLET} b WHERE b.listing_id = l.id), ''), "
+    f"coalesce(l.description, '') FROM {_LISTING} l"
+)
+
+_POSTGRES_DDL = (
+    f"CREATE TABLE IF NOT EXISTS listing_search ("
+    f"listing_id INTEGER PRIMARY KEY REFERENCES {_LISTING}(id) ON DELETE CASCADE, "
+    f"document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_listing_search_document ON listing_search USING GIN (document)",
+)
+
+_POSTGRES_SOURCE = (
+    f"SELECT l.id, "
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(l.title, '')), 'A') || "
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(l.keywords, '')), 'B') || "
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce("
+    f"(SELECT string_agg(b.bullet_text, ' ') FROM {_BULLET} b WHERE b.listing_id = l.id), '')), 'C') || "
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(l.description, '')), 'D') "
+    f"FROM {_LISTING} l"
+)
+
+
+def _dialect(bind):
+    name = bind.dialect.name
+    if name not in ("sqlite", "postgresql"):
+        raise RuntimeError(f"Full-text search is not supported on {name}")
+    return name
+
+
+def ensure_search_index(bind):
+    """
+    Create the search index if needed and index listings missing from it.
+
+    Listing ids only grow, so the backfill indexes every listing above the
+    highest indexed id (all of them on first run) in one statement.
+
+    Args:
+        bind (Engine): Engine the listing tables live in
+
+    Returns:
+        int: Number of listings indexed by the backfill
+    """
+    dialect = _dialect(bind)
+    with bind.begin() as conn:
+        if dialect == "sqlite":
+            for statement in _SQLITE_DDL:
+                conn.execute(text(statement))
+            result = conn.execute(text(
+                f"INSERT INTO listing_fts (rowid, title, keywords, bullets, description) "
+                f"{_SQLITE_SOURCE} WHERE l.id > (SELECT coalesce(max(rowid), 0) FROM listing_fts)"
+            ))
+        else:
+            for statement in _POSTGRES_DDL:
+                conn.execute(text(statement))
+            result = conn.execute(text(
+                f"INSERT INTO listing_search (listing_id, document) "
+                f"{_POSTGRES_SOURCE} WHERE l.id > (SELECT coalesce(max(listing_id), 0) FROM listing_search)"
+            ))
+    _indexed_binds.add(bind)
+    if result.rowcount:
+        logger.info("Indexed %d listings for search", result.rowcount)
+    return max(result.rowcount, 0)
+
+
+def index_listings(session, listing_ids):
+    """
+    (Re)index listings inside the caller's transaction.
+
+    Does nothing unless ensure_search_index() was called for the session's
+    engine, so code writing listings to databases without a search index
+    (benchmarks, scripts) is unaffected; their listings are picked up by the
+    next ensure_search_index() backfill.
+
+    Args:
+        session (Session): Session whose transaction wrote the listings
+        listing_ids (list): Ids of listings and bullet points already written
+    """
+    if not listing_ids:
+        return
+    bind = session.get_bind()
+    if bind not in _indexed_binds:
+        return
+
+    ids = bindparam("ids", expanding=True)
+    if _dialect(bind) == "sqlite":
+        session.execute(text("DELETE FROM listing_fts WHERE rowid IN :ids").bindparams(ids),
+                        {"ids": list(listing_ids)})
+        session.execute(text(
+            f"INSERT INTO listing_fts (rowid, title, keywords, bullets, description) "
+            f"{_SQLITE_SOURCE} WHERE l.id IN :ids"
+        ).bindparams(ids), {"ids": list(listing_ids)})
+    else:
+        session.execute(text(
+            f"INSERT INTO listing_search (listing_id, document) "
+            f"{_POSTGRES_SOURCE} WHERE l.id IN :ids "
+            f"ON CONFLICT (listing_id) DO UPDATE SET document = EXCLUDED.document"
+        ).bindparams(ids), {"ids": list(listing_ids)})
+
+
+def _terms(query):
+    terms = _TERM_RE.findall(query or "")
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    return terms
+
+
+def _fts5_query(terms):
+    # Quote every term so user input is never parsed as FTS5 syntax; all must match
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_listings(session, query, category=None, limit=DEFAULT_RESULTS, offset=0):
+    """
+    Find stored listings matching every word of a query, best match first.
+
+    Args:
+        session (Session): SQLAlchemy session
+        query (str): Words to search for; punctuation is ignored
+        category (str, optional): Only return listings in this category
+        limit (int): Maximum results, capped at MAX_RESULTS
+        offset (int): Results to skip, for paging through matches
+
+    Returns:
+        list: (Listing with bullets and competitors loaded, score) tuples;
+        higher scores are better matches
+
+    Raises:
+        ValueError: If the query contains no words
+    """
+    terms = _terms(query)
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    offset = max(0, int(offset))
+    params = {"limit": limit, "offset": offset}
+    category_join = ""
+    if category:
+        category_join = f"JOIN {_LISTING} l ON l.id = {{id}} AND l.category = :category "
+        params["category"] = category
+
+    if _dialect(session.get_bind()) == "sqlite":
+        weights = ", ".join(str(w) for w in FTS5_WEIGHTS)
+        params["query"] = _fts5_query(terms)
+        # bm25 is lower for better matches
+        ranked = session.execute(text(
+            f"SELECT f.rowid, -bm25(listing_fts, {weights}) AS score FROM listing_fts f "
+            f"{category_join.format(id='f.rowid')}"
+            f"WHERE listing_fts MATCH :query ORDER BY score DESC, f.rowid DESC "
+            f"LIMIT :limit OFFSET :offset"
+        ), params).all()
+    else:
+        params["query"] = " ".join(terms)
+        ranked = session.execute(text(
+            f"SELECT s.listing_id, ts_rank_cd(s.document, q) AS score "
+            f"FROM listing_search s CROSS JOIN plainto_tsquery('{TEXT_SEARCH_CONFIG}', :query) q "
+            f"{category_join.format(id='s.listing_id')}"
+            f"WHERE s.document @@ q ORDER BY score DESC, s.listing_id DESC "
+            f"LIMIT :limit OFFSET :offset"
+        ), params).all()
+
+    if not ranked:
+        return []
+    listings = session.scalars(
+        select(Listing)
+        .where(Listing.id.in_([row[0] for row in ranked]))
+        .options(selectinload(Listing.bullet_points), selectinload(Listing.competitor_urls))
+    ).all()
+    by_id = {listing.id: listing for listing in listings}
+    return [(by_id[listing_id], float(score)) for listing_id, score in ranked if listing_id in by_id]
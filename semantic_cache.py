@@ -0,0 +1,410 @@
+"""
+Semantic near-duplicate cache for generated listings.
+
+The exact cache in listing_cache.py only matches byte-identical requests
+(after case and whitespace normalization). Many requests differ only in how
+features are worded or ordered ("Ultra-quiet 25dB" vs "25 dB whisper
+quiet"), so this layer embeds each request and serves a stored listing whose
+request is similar enough.
+
+Embeddings are computed locally on the CPU by feature hashing: the product
+name, features and keywords are normalized (lowercased, numbers split from
+units, stop words dropped) and their words and character trigrams are hashed
+into a fixed number of signed dimensions, then L2-normalized, so the cosine
+similarity of two requests is a dot product. Listings are only compared with
+listings of the same category (and model, prompt version and temperature)
+whose requests mention exactly the same numbers: "25dB" and "25 dB" are
+near duplicates, "25dB" and "45dB" are different products however similar
+the wording.
+
+The vector index is brute force: with NumPy installed every partition is a
+float32 matrix scored with one matrix-vector product; without it, sparse
+vectors are scored through an inverted index of hashed features.
+
+Two thresholds control what a lookup returns:
+
+- ``similarity >= exact_threshold``: the stored listing as is
+- ``threshold <= similarity < exact_threshold``: the stored listing adapted
+  to the request: the stored product name is replaced with the requested one
+  and the SEO, AEO and psychological analyses are recomputed locally with
+  the requested keywords
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+
+import seo_analysis
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised where NumPy is absent
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through the environment (see SemanticCache.from_env)
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_EXACT_THRESHOLD = 0.98
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_DIMENSIONS = 1024
+
+# Relative weight of each request field in the embedding
+FIELD_WEIGHTS = {"product_name": 1.0, "features": 1.0, "target_keywords": 0.5}
+
+# Weight of all character trigrams of a word together, relative to the word
+TRIGRAM_WEIGHT = 0.5
+
+# Lookup latencies kept for the p50/p95 figures in stats()
+LATENCY_WINDOW = 1024
+
+_STOP_WORDS = frozenset((
+    "a an and are as at be by for from in is it its of on or the to with "
+    "your you our this that".split()
+))
+_UNIT_SPLIT_RE = re.compile(r"(?<=\d)(?=[a-z])|(?<=[a-z])(?=\d)")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def _words(text):
+    """Normalize text into content words, splitting numbers from units."""
+    text = _UNIT_SPLIT_RE.sub(" ", str(text).lower())
+    return [w for w in _WORD_RE.findall(text) if w not in _STOP_WORDS]
+
+
+def _features(words):
+    # Whole words plus character trigrams of longer words, so "quietest"
+    # still overlaps with "quiet"
+    for word in words:
+        yield "w:" + word, 1.0
+        if len(word) > 4:
+            padded = f"<{word}>"
+            weight = TRIGRAM_WEIGHT / (len(padded) - 2)
+            for i in range(len(padded) - 2):
+                yield "t:" + padded[i:i + 3], weight
+
+
+def _numbers(fields):
+    # Sorted numbers mentioned anywhere in the request
+    return tuple(sorted({w for texts in fields for text in texts for w in _words(text)
+                         if w[0].isdigit()}))
+
+
+def _request_fields(product_name, features, target_keywords):
+    # Texts of each field, in FIELD_WEIGHTS order
+    fields = [[product_name or ""], features or [], target_keywords or []]
+    return [texts.split(",") if isinstance(texts, str) else texts for texts in fields]
+
+
+def embed_request(product_name, features, target_keywords=None, dimensions=DEFAULT_DIMENSIONS):
+    """
+    Embed a listing request as a sparse, L2-normalized hashed feature vector.
+
+    Args:
+        product_name (str): The name of the product
+        features (list): List of key product features
+        target_keywords (list, optional): Target keywords
+        dimensions (int): Number of hashed dimensions
+
+    Returns:
+        dict: {dimension: weight}; the dot product of two embeddings is their
+        cosine similarity
+    """
+    vector = {}
+    for field, texts in zip(FIELD_WEIGHTS, _request_fields(product_name, features, target_keywords)):
+        weight = FIELD_WEIGHTS[field]
+        for text in texts:
+            for feature, feature_weight in _features(_words(text)):
+                h = zlib.crc32(feature.encode("utf-8"))
+                index = h % dimensions
+                value = weight * feature_weight
+                # The sign bit keeps hash collisions from only ever adding up
+                vector[index] = vector.get(index, 0.0) + (value if h & 0x80000000 else -value)
+
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if not norm:
+        return {}
+    return {i: v / norm for i, v in vector.items() if v}
+
+
+def _replace_name(value, old, new):
+    if isinstance(value, str):
+        return re.sub(re.escape(old), lambda _: new, value, flags=re.IGNORECASE)
+    if isinstance(value, list):
+        return [_replace_name(item, old, new) for item in value]
+    return value
+
+
+def adapt_listing(listing, cached_product_name, product_name, target_keywords=None):
+    """
+    Adapt a stored listing to a near-duplicate request.
+
+    Replaces the stored product name with the requested one in the title,
+    bullets and description and recomputes the SEO, AEO and psychological
+    analyses for the requested keywords with seo_analysis.
+
+    Args:
+        listing (dict): Stored listing (not modified)
+        cached_product_name (str): Product name the listing was generated for
+        product_name (str): Requested product name
+        target_keywords (list, optional): Requested target keywords
+
+    Returns:
+        dict: Adapted copy of the listing
+    """
+    adapted = dict(listing)
+    if cached_product_name and product_name and cached_product_name.strip().lower() != product_name.strip().lower():
+        for field in ("title", "bullets", "description"):
+            if field in adapted:
+                adapted[field] = _replace_name(adapted[field], cached_product_name.strip(), product_name.strip())
+
+    keywords = list(target_keywords or adapted.get("keywords") or [])
+    if target_keywords:
+        keywords += [k for k in adapted.get("keywords") or [] if k not in keywords]
+        adapted["keywords"] = keywords
+    adapted.update(seo_analysis.analyze_listing(
+        product_name,
+        adapted.get("title", ""),
+        adapted.get("bullets", []),
+        adapted.get("description", ""),
+        keywords
+    ))
+    return adapted
+
+
+class _Partition:
+    """Vectors of one category, scored with NumPy when available."""
+
+    def __init__(self, dimensions, use_numpy):
+        self.dimensions = dimensions
+        self.use_numpy = use_numpy
+        self.ids = []
+        self.vectors = []
+        self.matrix = None
+        self.postings = {}
+
+    def add(self, entry_id, vector):
+        self.ids.append(entry_id)
+        self.vectors.append(vector)
+        if self.use_numpy:
+            # Grow by doubling so appends are amortized O(dimensions)
+            if self.matrix is None or len(self.ids) > self.matrix.shape[0]:
+                grown = np.zeros((max(16, len(self.ids) * 2), self.dimensions), dtype=np.float32)
+                if self.matrix is not None:
+                    grown[:len(self.ids) - 1] = self.matrix[:len(self.ids) - 1]
+                self.matrix = grown
+            row = self.matrix[len(self.ids) - 1]
+            row[:] = 0.0
+            for i, v in vector.items():
+                row[i] = v
+        else:
+            for i, v in vector.items():
+                self.postings.setdefault(i, {})[entry_id] = v
+
+    def remove(self, entry_id):
+        position = self.ids.index(entry_id)
+        last = len(self.ids) - 1
+        vector = self.vectors[position]
+        # Move the last entry into the freed slot
+        self.ids[position] = self.ids[last]
+        self.vectors[position] = self.vectors[last]
+        self.ids.pop()
+        self.vectors.pop()
+        if self.use_numpy:
+            self.matrix[position] = self.matrix[last]
+        else:
+            for i in vector:
+                postings = self.postings[i]
+                del postings[entry_id]
+                if not postings:
+                    del self.postings[i]
+
+    def best(self, vector):
+        """Return (entry_id, similarity) of the most similar vector, or None."""
+        if not self.ids or not vector:
+            return None
+        if self.use_numpy:
+            query = np.zeros(self.dimensions, dtype=np.float32)
+            for i, v in vector.items():
+                query[i] = v
+            scores = self.matrix[:len(self.ids)] @ query
+            position = int(np.argmax(scores))
+            return self.ids[position], float(scores[position])
+
+        scores = {}
+        for i, v in vector.items():
+            for entry_id, weight in self.postings.get(i, {}).items():
+                scores[entry_id] = scores.get(entry_id, 0.0) + v * weight
+        if not scores:
+            return None
+        entry_id = max(scores, key=scores.get)
+        return entry_id, scores[entry_id]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class SemanticCache:
+    """
+    Near-duplicate lookup of generated listings by request similarity.
+
+    Args:
+        threshold (float): Minimum cosine similarity for a hit (adapted)
+        exact_threshold (float): Similarity from which hits are served unchanged
+        max_entries (int): Maximum stored listings (least recently used are
+            dropped); 0 disables the cache
+        ttl (float): Seconds an entry stays valid
+        dimensions (int): Embedding dimensions
+        use_numpy (bool, optional): Force the NumPy or pure-Python index;
+            defaults to NumPy when it is installed
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, exact_threshold=DEFAULT_EXACT_THRESHOLD,
+                 max_entries=DEFAULT_MAX_ENTRIES, ttl=24 * 60 * 60, dimensions=DEFAULT_DIMENSIONS,
+                 use_numpy=None):
+        self.threshold = threshold
+        self.exact_threshold = max(exact_threshold, threshold)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dimensions = dimensions
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        self._partitions = {}
+        # entry_id -> (partition key, product_name, listing JSON, expires_at), in LRU order
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {"hits": 0, "exact_hits": 0, "adapted_hits": 0, "misses": 0,
+                       "sets": 0, "evictions": 0, "expirations": 0, "hit_similarity_sum": 0.0}
+
+    @classmethod
+    def from_env(cls, ttl=24 * 60 * 60):
+        """
+        Create a cache configured from environment variables.
+
+        SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_EXACT_THRESHOLD and
+        SEMANTIC_CACHE_SIZE (0 disables the cache).
+        """
+        return cls(
+            threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD)),
+            exact_threshold=float(os.environ.get("SEMANTIC_CACHE_EXACT_THRESHOLD", DEFAULT_EXACT_THRESHOLD)),
+            max_entries=int(os.environ.get("SEMANTIC_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl=ttl
+        )
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def lookup(self, partition_key, product_name, features, target_keywords=None):
+        """
+        Find a stored listing for a near-duplicate request.
+
+        Args:
+            partition_key (str): Only entries stored under this key are compared
+                (category, model, prompt version, temperature)
+            product_name (str): The name of the product
+            features (list): List of key product features
+            target_keywords (list, optional): Target keywords
+
+        Returns:
+            tuple: (listing, similarity) or (None, best similarity or None)
+        """
+        if not self.enabled:
+            return None, None
+        started = time.perf_counter()
+        vector = embed_request(product_name, features, target_keywords, self.dimensions)
+        partition_key = (partition_key, _numbers(_request_fields(product_name, features, target_keywords)))
+        with self._lock:
+            match = None
+            partition = self._partitions.get(partition_key)
+            if partition is not None:
+                # Evict expired entries first so an expired closest match
+                # does not hide a fresh one that is still above the threshold
+                now = time.time()
+                for entry_id in [i for i in partition.ids if self._entries[i][3] <= now]:
+                    self._drop(entry_id)
+                    self._stats["expirations"] += 1
+                if len(partition):
+                    match = partition.best(vector)
+            if match is not None:
+                entry_id, similarity = match
+                _, cached_name, raw, _ = self._entries[entry_id]
+            if match is None or similarity < self.threshold:
+                self._stats["misses"] += 1
+                self._latencies.append(time.perf_counter() - started)
+                return None, (match[1] if match else None)
+            self._entries.move_to_end(entry_id)
+            self._stats["hits"] += 1
+            self._stats["hit_similarity_sum"] += similarity
+
+        listing = json.loads(raw)
+        if similarity >= self.exact_threshold:
+            result = listing
+            kind = "exact_hits"
+        else:
+            result = adapt_listing(listing, cached_name, product_name, target_keywords)
+            kind = "adapted_hits"
+        with self._lock:
+            self._stats[kind] += 1
+            self._latencies.append(time.perf_counter() - started)
+        return result, similarity
+
+    def add(self, partition_key, product_name, features, target_keywords, listing):
+        """Store a generated listing under the embedding of its request."""
+        if not self.enabled:
+            return
+        raw = json.dumps(listing)
+        vector = embed_request(product_name, features, target_keywords, self.dimensions)
+        if not vector:
+            return
+        partition_key = (partition_key, _numbers(_request_fields(product_name, features, target_keywords)))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            partition = self._partitions.get(partition_key)
+            if partition is None:
+                partition = self._partitions[partition_key] = _Partition(self.dimensions, self.use_numpy)
+            partition.add(entry_id, vector)
+            self._entries[entry_id] = (partition_key, product_name, raw, time.time() + self.ttl)
+            self._stats["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._partitions.clear()
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters, hit ratio and lookup latency percentiles."""
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+            stats["entries"] = len(self._entries)
+            stats["partitions"] = len(self._partitions)
+        similarity_sum = stats.pop("hit_similarity_sum")
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["mean_hit_similarity"] = round(similarity_sum / stats["hits"], 4) if stats["hits"] else None
+        stats["lookup_ms_p50"] = round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None
+        stats["lookup_ms_p95"] = (round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3)
+                                  if latencies else None)
+        stats.update(threshold=self.threshold, exact_threshold=self.exact_threshold,
+                     max_entries=self.max_entries, backend="numpy" if self.use_numpy else "python")
+        return stats
+
+    def _drop(self, entry_id):
+        # Caller holds self._lock
+        partition_key = self._entries.pop(entry_id)[0]
+        partition = self._partitions[partition_key]
+        partition.remove(entry_id)
+        if not len(partition):
+            del self._partitions[partition_key]
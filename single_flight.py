@@ -0,0 +1,158 @@
+"""
+Request coalescing ("single flight") for identical in-flight calls.
+
+When several callers ask for the same key while a call for it is running,
+only the first (the leader) calls through; the others wait for it and get
+its result, or its exception. Nothing is remembered once the call is over:
+later callers start a new call (caching is listing_cache's job).
+
+SingleFlight is for threads (the Flask app), AsyncSingleFlight for
+coroutines on one event loop (the FastAPI app). Both return the result
+together with a "shared" flag; the result object itself is shared, so
+callers that may mutate it should copy it when the flag is set.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls across threads.
+
+    Args:
+        name (str): Name used in stats
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Call ``fn(*args, **kwargs)`` unless a call for ``key`` is in flight.
+
+        Args:
+            key (str): Identity of the call, e.g. a normalized cache key
+            fn (callable): Function to run when this caller leads
+
+        Returns:
+            tuple: (result, shared) where shared is True when more than one
+            caller got the result
+
+        Raises:
+            Exception: Whatever the leading call raised
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, call.waiters > 0
+
+    def stats(self):
+        """Return call counters and the number of calls in flight."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["name"] = self.name
+        return stats
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce concurrent identical coroutine calls on one event loop.
+
+    The call runs as a task of its own, so a caller that is cancelled (e.g.
+    the client disconnected) does not cancel it for the others.
+
+    Args:
+        name (str): Name used in stats
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._flights = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """
+        Await ``fn(*args, **kwargs)`` unless a call for ``key`` is in flight.
+
+        Args:
+            key (str): Identity of the call, e.g. a normalized cache key
+            fn (callable): Coroutine function to run when this caller leads
+
+        Returns:
+            tuple: (result, shared) where shared is True when more than one
+            caller got the result
+
+        Raises:
+            Exception: Whatever the call raised
+        """
+        self._stats["calls"] += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn(*args, **kwargs)))
+            flight.task.add_done_callback(lambda task: self._forget(key, flight))
+            self._stats["executed"] += 1
+        else:
+            flight.waiters += 1
+            self._stats["coalesced"] += 1
+        result = await asyncio.shield(flight.task)
+        return result, flight.waiters > 0
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Mark the exception retrieved in case every caller went away
+            flight.task.exception()
+
+    def stats(self):
+        """Return call counters and the number of calls in flight."""
+        stats = dict(self._stats)
+        stats["in_flight"] = len(self._flights)
+        stats["name"] = self.name
+        return stats
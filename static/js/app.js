@@ -90,7 +90,7 @@ document.addEventListener('DOMContentLoaded', function () {
             .filter(url => url.startsWith('http'));
 
         try {
-            const response = await fetch(`${API_BASE}/api/generate-listing`, {
+            const response = await fetch(`${API_BASE}/api/generate-listing/stream`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -102,19 +102,67 @@ document.addEventListener('DOMContentLoaded', function () {
                 })
             });
 
-            const result = await response.json();
+            if (!response.ok || !response.body) {
+                throw new Error(`Request failed with status ${response.status}`);
+            }
 
+            resetListingOutput();
+            await readListingStream(response.body.getReader());
+        } catch (error) {
             loadingOverlay.style.display = 'none';
+            showError('Failed to generate listing. Please try again.');
+        }
+    }
 
-            if (result.error) {
-                showError(result.error);
-                return;
+    // Parse Server-Sent Events from the streaming endpoint and render each
+    // field as soon as it arrives instead of waiting for the whole listing.
+    async function readListingStream(reader) {
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                handleListingEvent(rawEvent);
             }
+        }
+    }
 
-            displayGeneratedListing(result.listing);
-        } catch (error) {
+    function handleListingEvent(rawEvent) {
+        let event = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(line => {
+            if (line.startsWith('event: ')) event = line.slice(7);
+            if (line.startsWith('data: ')) data += line.slice(6);
+        });
+        const payload = data ? JSON.parse(data) : {};
+
+        if (event === 'error') {
             loadingOverlay.style.display = 'none';
-            showError('Failed to generate listing. Please try again.');
+            showError(payload.error);
+            return;
+        }
+
+        // First field received: hide the spinner and show the output panel
+        loadingOverlay.style.display = 'none';
+        outputContainer.style.display = 'block';
+
+        if (event === 'title') {
+            document.getElementById('product-title').textContent = payload.title;
+        } else if (event === 'bullet') {
+            const li = document.createElement('li');
+            li.textContent = payload.text;
+            document.getElementById('bullets-list').appendChild(li);
+        } else if (event === 'description') {
+            document.getElementById('product-description').textContent = payload.description;
+        } else if (event === 'field' && payload.name === 'keywords' && Array.isArray(payload.value)) {
+            document.getElementById('keywords-container').textContent = payload.value.join(', ');
         }
     }
 
@@ -123,7 +171,7 @@ document.addEventListener('DOMContentLoaded', function () {
         errorContainer.style.display = 'block';
     }
 
-    function displayGeneratedListing(listingText) {
+    function resetListingOutput() {
         document.getElementById('product-title').textContent = '';
         document.getElementById('bullets-list').innerHTML = '';
         document.getElementById('product-description').textContent = '';
@@ -133,9 +181,17 @@ document.addEventListener('DOMContentLoaded', function () {
         document.getElementById('keyword-density-table').innerHTML = '';
         document.getElementById('keywords-container').textContent = '';
         document.getElementById('competitor-urls-list').innerHTML = '';
+    }
 
-        document.getElementById('product-title').textContent = listingText;
-        outputContainer.style.display = 'block';
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = String(text);
+        return div.innerHTML;
+    }
+
+    function formatInsight(value) {
+        if (Array.isArray(value)) return value.join(', ');
+        return typeof value === 'object' ? JSON.stringify(value) : value;
     }
 
     async function analyzeCompetitors() {
@@ -150,15 +206,29 @@ document.addEventListener('DOMContentLoaded', function () {
             const response = await fetch(`${API_BASE}/api/analyze-competitors`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ urls })
+                body: JSON.stringify({
+                    urls,
+                    product_name: document.getElementById('product-name').value,
+                    category: document.getElementById('category').value
+                })
             });
 
             const result = await response.json();
 
             competitorAnalysisContent.innerHTML = result.analysis
-                .map(entry => `<p><strong>${entry.url}</strong><br>${entry.insight}</p>`)
+                .map(entry => entry.error
+                    ? `<p><strong>${escapeHtml(entry.url)}</strong><br>Could not read this page: ${escapeHtml(entry.error)}</p>`
+                    : `<p><strong>${escapeHtml(entry.title || entry.url)}</strong><br>${escapeHtml(entry.url)}</p>` +
+                      `<ul>${entry.bullets.map(bullet => `<li>${escapeHtml(bullet)}</li>`).join('')}</ul>`)
                 .join('');
 
+            if (result.insights) {
+                competitorAnalysisContent.innerHTML += Object.entries(result.insights)
+                    .map(([name, value]) => `<p><strong>${escapeHtml(name.replace(/_/g, ' '))}</strong><br>` +
+                        `${escapeHtml(formatInsight(value))}</p>`)
+                    .join('');
+            }
+
             competitorAnalysisSection.style.display = 'block';
         } catch (error) {
             showError('Failed to analyze competitors.');
@@ -0,0 +1,374 @@
+"""
+Structured, sampled logging written off the request thread.
+
+configure() replaces the per-app ``logging.basicConfig(level=logging.DEBUG)``
+setups. It installs one handler on the root logger that only puts records on
+a bounded queue; a listener thread formats them (one JSON object per line,
+or plain text) and does the writing, so a request never waits for stderr or
+the log file and workers no longer serialize on the stream lock. When the
+queue is full, records are dropped and counted instead of blocking.
+
+Log calls use %-style arguments (``logger.debug("Stored %d listings", n)``),
+so nothing is formatted unless the level is enabled. Request payloads are
+logged through payload(), which renders a repr cut to a few hundred
+characters; every message is also cut to LOG_MAX_CHARS.
+
+Each request gets a logging context (route and request id) from
+ASGILoggingMiddleware or start_request()/end_request(). Sampling is decided
+once per request, from LOG_SAMPLE_RATE or the route's rate in
+LOG_ROUTE_SAMPLE_RATES, so a request logs all or none of its DEBUG and INFO
+records; warnings and errors are always written.
+
+Environment variables:
+    LOG_LEVEL (default INFO), LOG_FORMAT (json or text), LOG_FILE (default
+    stderr), LOG_MAX_CHARS, LOG_QUEUE_SIZE, LOG_SAMPLE_RATE (0-1, default 1)
+    and LOG_ROUTE_SAMPLE_RATES, e.g. "/api/generate-listing=0.1,/=0".
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+import metrics
+import tracing
+
+DEFAULT_LEVEL = "INFO"
+DEFAULT_FORMAT = "json"
+DEFAULT_MAX_CHARS = 2000
+DEFAULT_PAYLOAD_CHARS = 500
+DEFAULT_QUEUE_SIZE = 10000
+
+# Loggers that install their own (synchronous) handlers; their records are
+# sent through the root logger's queue instead
+CAPTURED_LOGGERS = ("uvicorn", "uvicorn.access", "uvicorn.error", "werkzeug")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+_SAMPLED_OUT = metrics.LOG_RECORDS_DISCARDED.labels("sampled_out")
+_QUEUE_FULL = metrics.LOG_RECORDS_DISCARDED.labels("queue_full")
+
+_request = contextvars.ContextVar("log_request", default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+# (except uvicorn's ANSI-colored copy of the message)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "route", "color_message"}
+
+_handler = None
+_listener = None
+
+
+class _Payload:
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value, max_chars):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self):
+        # repr() and a cut: reprlib's per-item limits cost ~8x more
+        text = repr(self.value)
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... [{len(text) - self.max_chars} more characters]"
+        return text
+
+    __repr__ = __str__
+
+
+def payload(value, max_chars=DEFAULT_PAYLOAD_CHARS):
+    """
+    Wrap a request payload for logging.
+
+    The wrapper renders the payload's repr, cut to ``max_chars``, and only
+    when the record is actually written.
+
+    Args:
+        value: Any object, typically the parsed request body
+        max_chars (int): Longest rendering kept, in characters
+
+    Returns:
+        object: Pass it as a log argument, e.g. ``logger.debug("Request: %s", payload(data))``
+    """
+    return _Payload(value, max_chars)
+
+
+class Sampler:
+    """
+    Decides which requests log their DEBUG and INFO records.
+
+    Args:
+        default_rate (float): Share of requests sampled, 0 to 1
+        route_rates (dict, optional): Rate per request path, overriding the default
+    """
+
+    def __init__(self, default_rate=1.0, route_rates=None):
+        self.default_rate = default_rate
+        self.route_rates = dict(route_rates or {})
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a sampler configured from environment variables.
+
+        LOG_SAMPLE_RATE and LOG_ROUTE_SAMPLE_RATES ("path=rate,path=rate").
+        """
+        route_rates = {}
+        for entry in os.environ.get("LOG_ROUTE_SAMPLE_RATES", "").split(","):
+            route, _, rate = entry.strip().rpartition("=")
+            if route:
+                route_rates[route] = float(rate)
+        return cls(default_rate=float(os.environ.get("LOG_SAMPLE_RATE", "1")), route_rates=route_rates)
+
+    def sample(self, route):
+        """Return True if a request to this route keeps its DEBUG and INFO records."""
+        rate = self.route_rates.get(route, self.default_rate)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+sampler = Sampler.from_env()
+
+
+class _RequestContext:
+    __slots__ = ("route", "request_id", "sampled")
+
+    def __init__(self, route, request_id, sampled):
+        self.route = route
+        self.request_id = request_id
+        self.sampled = sampled
+
+
+def start_request(route, request_id=None):
+    """
+    Set the logging context of the running request and decide its sampling.
+
+    Args:
+        route (str): Request path, matched against LOG_ROUTE_SAMPLE_RATES
+        request_id (str, optional): The caller's X-Request-ID
+
+    Returns:
+        Token: pass it to end_request()
+    """
+    return _request.set(_RequestContext(route, request_id, sampler.sample(route)))
+
+
+def end_request(token):
+    """Clear the logging context set by start_request()."""
+    try:
+        _request.reset(token)
+    except (ValueError, RuntimeError):
+        # Ended in another context (e.g. after a streamed response)
+        _request.set(None)
+
+
+class SamplingFilter(logging.Filter):
+    """Drops DEBUG and INFO records of requests that were not sampled."""
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        context = _request.get()
+        if context is None or context.sampled:
+            return True
+        _SAMPLED_OUT.inc()
+        return False
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler doing as little as possible on the logging thread.
+
+    prepare() adds the request context, renders and truncates the message and
+    formats any traceback (the arguments may change once the call returns);
+    JSON encoding and the write happen on the listener thread. Records are
+    dropped, not waited for, when the queue is full.
+
+    Args:
+        queue (queue.Queue): Queue read by the listener
+        max_chars (int): Longest message kept, in characters
+    """
+
+    def __init__(self, queue, max_chars=DEFAULT_MAX_CHARS):
+        super().__init__(queue)
+        self.max_chars = max_chars
+        self._exception_formatter = logging.Formatter()
+
+    def handle(self, record):
+        # The queue is thread-safe: skip the handler lock of Handler.handle()
+        if self.filter(record):
+            self.emit(record)
+            return True
+        return False
+
+    def prepare(self, record):
+        # The root handler runs last, after any handler of the record's own
+        # logger, so the record is updated in place instead of copied
+        trace = tracing.current()
+        context = _request.get()
+        if trace is not None:
+            record.request_id = trace.request_id
+        else:
+            record.request_id = context.request_id if context is not None else None
+        record.route = context.route if context is not None else None
+
+        message = record.getMessage()
+        if len(message) > self.max_chars:
+            message = f"{message[:self.max_chars]}... [{len(message) - self.max_chars} more characters]"
+        record.msg = message
+        record.message = message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _QUEUE_FULL.inc()
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line.
+
+    Fields: timestamp, level, logger, message, request_id and route when set,
+    exception, plus anything passed with ``extra=``.
+    """
+
+    def format(self, record):
+        entry = {
+            "timestamp": (time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                          + f".{int(record.msecs):03d}Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "route", None):
+            entry["route"] = record.route
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        return json.dumps(entry, default=str)
+
+
+def configure(level=None, log_format=None, log_file=None, max_chars=None, queue_size=None):
+    """
+    Route all logging through the queue handler; later calls do nothing.
+
+    Arguments left as None are read from LOG_LEVEL, LOG_FORMAT, LOG_FILE,
+    LOG_MAX_CHARS and LOG_QUEUE_SIZE. Existing root handlers (e.g. from a
+    library's basicConfig) and those of CAPTURED_LOGGERS are removed. The
+    listener is stopped, and the queue flushed, at interpreter exit.
+
+    Args:
+        level (str, optional): Root log level name, e.g. "DEBUG"
+        log_format (str, optional): "json" or "text"
+        log_file (str, optional): File to append to instead of stderr
+        max_chars (int, optional): Longest message kept, in characters
+        queue_size (int, optional): Records buffered before new ones are dropped
+    """
+    global _handler, _listener
+    if _listener is not None:
+        return
+
+    level = (level or os.environ.get("LOG_LEVEL") or DEFAULT_LEVEL).upper()
+    log_format = (log_format or os.environ.get("LOG_FORMAT") or DEFAULT_FORMAT).lower()
+    log_file = log_file or os.environ.get("LOG_FILE") or None
+    max_chars = max_chars or int(os.environ.get("LOG_MAX_CHARS", DEFAULT_MAX_CHARS))
+    queue_size = queue_size or int(os.environ.get("LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+
+    if log_file:
+        output = logging.FileHandler(log_file, encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    if log_format == "text":
+        formatter = logging.Formatter(TEXT_FORMAT)
+    else:
+        formatter = JSONFormatter()
+    output.setFormatter(formatter)
+
+    records = queue.Queue(maxsize=queue_size)
+    _handler = QueueHandler(records, max_chars=max_chars)
+    _handler.addFilter(SamplingFilter())
+
+    # Neither formatter prints the caller: skip looking it up for every
+    # record (an optimization the logging HOWTO documents)
+    logging._srcfile = None
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(level)
+    for name in CAPTURED_LOGGERS:
+        captured = logging.getLogger(name)
+        for existing in captured.handlers[:]:
+            captured.removeHandler(existing)
+        captured.propagate = True
+
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def _restart_in_child():
+    # Forked workers (the process pools) inherit the queue but not the
+    # listener thread: give them their own
+    global _listener
+    if _listener is not None:
+        records = queue.Queue(maxsize=_listener.queue.maxsize)
+        _handler.queue = records
+        _listener = logging.handlers.QueueListener(records, *_listener.handlers)
+        _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def shutdown():
+    """Write the queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.handlers[0].close()
+        _listener = None
+
+
+class ASGILoggingMiddleware:
+    """
+    ASGI middleware setting the logging context of each HTTP request.
+
+    Args:
+        app: The wrapped ASGI application
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        token = start_request(scope["path"], request_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_request(token)
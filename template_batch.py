@@ -0,0 +1,237 @@
+"""
+Batch generation of template listings for whole catalogs, without the LLM.
+
+For dry runs that cost nothing, or for when the LLM is down. Each product
+gets the same listing the Flask app's template fallback produces
+(listing_templates plus the seo_analysis analyses). Template rendering and
+analysis are CPU-bound, so the work is spread across a process pool in
+chunks; results are streamed out in input order while at most
+``workers * 2`` chunks are in flight, so memory stays bounded whatever
+the catalog size.
+
+Input is CSV or JSONL, picked by file extension or --format:
+
+- JSONL: one object per line with product_name, category, features (list)
+  and optionally keywords (list or comma-separated), competitor_urls and id.
+- CSV: a header row with product_name, category, features (separated by
+  "|"), and optionally keywords (comma-separated) and id.
+
+Output is JSONL, one listing (or {"id", "error"}) per product. With --store
+the listings are also written to DATABASE_URL in batches of
+--db-batch-size with persistence.store_listings (one transaction per batch).
+
+Command line usage:
+
+    python template_batch.py --input catalog.csv --output listings.jsonl --workers 8 --store
+
+Throughput is reported on stderr; benchmarks/bench_template_batch.py
+measures listings per second for different worker counts.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import listing_templates
+import process_pool
+import seo_analysis
+
+# Products handed to a worker process per task; amortizes pickling overhead
+DEFAULT_CHUNKSIZE = process_pool.DEFAULT_CHUNKSIZE
+DEFAULT_DB_BATCH_SIZE = 500
+
+# Separator of the features column in CSV input
+CSV_FEATURE_SEPARATOR = "|"
+
+
+def _as_list(value, separator=","):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(separator) if item.strip()]
+    return list(value)
+
+
+def generate_listing(product):
+    """
+    Generate the template listing and its analyses for one product.
+
+    Args:
+        product (dict): product_name, category, features and optionally
+            keywords (or target_keywords), competitor_urls and id
+
+    Returns:
+        dict: ``id``, product_name, category, the listing (title, bullets,
+        description, keywords, competitor_urls) and seo_analysis,
+        aeo_analysis and psychological_techniques, or ``id`` and ``error``
+        if the product is incomplete
+    """
+    product_id = product.get("id") if isinstance(product, dict) else None
+    try:
+        product_name = product.get("product_name")
+        category = product.get("category")
+        features = _as_list(product.get("features"), CSV_FEATURE_SEPARATOR)
+        keywords = _as_list(product.get("keywords") or product.get("target_keywords"))
+        listing = listing_templates.generate_template_listing(product_name, category, features,
+                                                              keywords or None)
+        if product.get("competitor_urls"):
+            listing["competitor_urls"] = [c if isinstance(c, dict) else {"url": str(c), "title": ""}
+                                          for c in product["competitor_urls"]]
+        analysis = seo_analysis.analyze_listing(product_name, listing["title"], listing["bullets"],
+                                                listing["description"], listing["keywords"])
+    except Exception as e:
+        return {"id": product_id, "error": str(e)}
+    result = {"id": product_id, "product_name": product_name, "category": category}
+    result.update(listing)
+    result.update(analysis)
+    return result
+
+
+def get_pool(workers=None):
+    """Return the shared generation process pool, creating it on first use."""
+    return process_pool.get_pool("template_batch", workers)
+
+
+def generate_listings(products, workers=None, chunksize=DEFAULT_CHUNKSIZE, executor=None):
+    """
+    Generate template listings for many products, in order, using a process pool.
+
+    Input is consumed lazily: at most ``workers * 2`` chunks are in flight,
+    so arbitrarily large catalogs are processed with bounded memory while
+    the pool stays busy.
+
+    Args:
+        products (iterable): Product dicts
+        workers (int, optional): Worker processes; 1 generates in-process
+        chunksize (int): Products per worker task
+        executor (Executor, optional): Pool to use instead of the shared one
+
+    Yields:
+        dict: One result per product, in input order
+    """
+    return process_pool.map_ordered(generate_listing, products, "template_batch", workers, chunksize,
+                                    executor)
+
+
+def read_products(stream, fmt):
+    """
+    Read products from a CSV or JSONL stream.
+
+    Args:
+        stream (file): Text stream
+        fmt (str): "csv" or "jsonl"
+
+    Yields:
+        dict: One product per row or line
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+class ListingStore:
+    """
+    Writes generated listings to the database in batches.
+
+    Args:
+        database_url (str): SQLAlchemy database URL
+        batch_size (int): Listings per transaction
+    """
+
+    def __init__(self, database_url, batch_size=DEFAULT_DB_BATCH_SIZE):
+        # Imported here so runs without --store do not need the database stack
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+
+        import persistence
+        import search
+        from models import Base, create_indexes
+
+        self.engine = create_engine(database_url)
+        Base.metadata.create_all(self.engine)
+        create_indexes(self.engine)
+        search.ensure_search_index(self.engine)
+        self.session = Session(self.engine)
+        self._persistence = persistence
+        self.batch_size = batch_size
+        self.stored = 0
+        self._records = []
+
+    def add(self, result):
+        if "error" in result:
+            return
+        self._records.append(self._persistence.listing_record(
+            result["product_name"], result["category"], result["title"], result["description"],
+            result["keywords"], result["bullets"], result["competitor_urls"]
+        ))
+        if len(self._records) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._records:
+            self.stored += len(self._persistence.store_listings(self._records, self.session))
+            self._records = []
+
+    def close(self):
+        self.flush()
+        self.session.close()
+        self.engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate template listings for a catalog (CSV/JSONL in, "
+                                                 "JSONL out)")
+    parser.add_argument("--input", "-i", help="CSV or JSONL file of products (default: stdin)")
+    parser.add_argument("--output", "-o", help="JSONL file for listings (default: stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count(),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--store", action="store_true", help="also write the listings to DATABASE_URL")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--db-batch-size", type=int, default=DEFAULT_DB_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if (args.input or "").lower().endswith(".csv") else "jsonl")
+    if args.store and not args.database_url:
+        parser.error("--store needs --database-url or DATABASE_URL")
+
+    source = open(args.input, encoding="utf-8", newline="") if args.input else sys.stdin
+    sink = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    store = ListingStore(args.database_url, args.db_batch_size) if args.store else None
+
+    started = time.perf_counter()
+    count = failed = 0
+    try:
+        with process_pool.cli_executor(args.workers) as executor:
+            for result in generate_listings(read_products(source, fmt), args.workers, args.chunksize,
+                                            executor):
+                sink.write(json.dumps(result) + "\n")
+                count += 1
+                failed += "error" in result
+                if store is not None:
+                    store.add(result)
+    finally:
+        if store is not None:
+            store.close()
+        if args.input:
+            source.close()
+        if args.output:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    stored = f", {store.stored} stored" if store is not None else ""
+    print(f"Generated {count} listings ({failed} failed{stored}) in {elapsed:.2f}s "
+          f"({rate:.0f} listings/s, {args.workers} workers)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
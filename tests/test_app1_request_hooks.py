@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app1.db')}")
+
+import app1  # noqa: E402
+import structured_logging  # noqa: E402
+import tracing  # noqa: E402
+
+
+@app1.app.route("/_test/fail")
+def _fail():
+    raise RuntimeError("view failed")
+
+
+@pytest.fixture
+def client():
+    app1.app.config["PROPAGATE_EXCEPTIONS"] = True
+    return app1.app.test_client()
+
+
+def test_failing_view_still_ends_the_request(client):
+    in_flight = app1._IN_FLIGHT.get()
+    with pytest.raises(RuntimeError):
+        client.get("/_test/fail", headers={tracing.REQUEST_ID_HEADER: "req-1"})
+
+    assert app1._IN_FLIGHT.get() == in_flight
+    assert structured_logging._request.get() is None
+    assert tracing.current() is None
+
+
+def test_successful_request_records_status(client):
+    in_flight = app1._IN_FLIGHT.get()
+    response = client.get("/api/write-behind/stats")
+    assert response.status_code == 200
+    assert app1._IN_FLIGHT.get() == in_flight
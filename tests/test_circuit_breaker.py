@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def _fail():
+    raise TimeoutError("down")
+
+
+def _trip(breaker, times):
+    for _ in range(times):
+        with pytest.raises(TimeoutError):
+            breaker.call(_fail)
+
+
+def test_failures_within_window_open_the_breaker(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=3, window=10, reset_timeout=30)
+    _trip(breaker, 2)
+    assert breaker.state == circuit_breaker.CLOSED
+
+    _trip(breaker, 1)
+    assert breaker.state == circuit_breaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+    assert breaker.stats()["short_circuited"] == 1
+
+
+@pytest.mark.parametrize("error", [StatusError(429), StatusError(503)])
+def test_transient_status_errors_count_as_failures(clock, error):
+    breaker = CircuitBreaker("llm", failure_threshold=2)
+
+    def fail():
+        raise error
+
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            breaker.call(fail)
+    assert breaker.state == circuit_breaker.OPEN
+
+
+@pytest.mark.parametrize("status", [400, 422])
+def test_rejected_requests_do_not_open_the_breaker(clock, status):
+    breaker = CircuitBreaker("llm", failure_threshold=2)
+
+    def reject():
+        raise StatusError(status)
+
+    for _ in range(5):
+        with pytest.raises(StatusError):
+            breaker.call(reject)
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.stats()["failures"] == 0
+
+
+def test_rejected_probe_frees_its_slot(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30)
+    _trip(breaker, 1)
+    clock.now += 30
+
+    def reject():
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        breaker.call(reject)
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+def test_failures_outside_window_do_not_open(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=3, window=10)
+    _trip(breaker, 2)
+    clock.now += 11
+    _trip(breaker, 1)
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30)
+    _trip(breaker, 1)
+    clock.now += 30
+    assert breaker.state == circuit_breaker.HALF_OPEN
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.stats()["closed"] == 1
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30)
+    _trip(breaker, 1)
+    clock.now += 30
+    _trip(breaker, 1)
+    assert breaker.state == circuit_breaker.OPEN
+    assert breaker.stats()["opened"] == 2
+
+
+def test_half_open_allows_limited_probes(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30, half_open_max_calls=1)
+    _trip(breaker, 1)
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_interrupted_probe_frees_its_slot(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30)
+    _trip(breaker, 1)
+    clock.now += 30
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(interrupted)
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+
+
+def test_cancelled_async_probe_frees_its_slot(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=1, reset_timeout=30)
+    _trip(breaker, 1)
+    clock.now += 30
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    async def probe():
+        return "ok"
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(breaker.acall(cancelled))
+    assert asyncio.run(breaker.acall(probe)) == "ok"
+    assert breaker.state == circuit_breaker.CLOSED
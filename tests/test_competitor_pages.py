@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+
+import competitor_pages
+from competitor_pages import BlockedURLError, CompetitorFetcher
+
+PAGE = (b'<html><body><span id="productTitle">AeroPure Purifier</span>'
+        b'<div id="feature-bullets"><ul><li>Quiet</li></ul></div>'
+        b'<div id="productDescription">HEPA filter</div></body></html>')
+
+ADDRESSES = {"shop.example": "93.184.216.34", "internal.example": "10.0.0.5",
+             "mixed.example": ["93.184.216.34", "127.0.0.1"]}
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    async def resolve(host, port):
+        address = ADDRESSES.get(host, host)
+        return address if isinstance(address, list) else [address]
+    monkeypatch.setattr(competitor_pages, "_resolve", resolve)
+
+
+def _fetcher(handler, **kwargs):
+    fetcher = CompetitorFetcher(workers=1, **kwargs)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=False)
+    return fetcher, client
+
+
+def _fetch(fetcher, client, urls):
+    async def run():
+        async with client:
+            return await fetcher.fetch_pages(urls, client)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("address", [
+    "127.0.0.1", "10.1.2.3", "172.16.0.1", "192.168.1.1", "169.254.169.254", "0.0.0.0",
+    "100.64.0.1", "224.0.0.1", "::1", "fe80::1", "fc00::1", "::ffff:127.0.0.1",
+])
+def test_non_public_addresses(address):
+    assert not competitor_pages.is_public_address(address)
+
+
+def test_public_addresses():
+    assert competitor_pages.is_public_address("93.184.216.34")
+    assert competitor_pages.is_public_address("2606:4700::1111")
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/admin", "http://169.254.169.254/latest/meta-data/",
+    "http://internal.example/", "https://mixed.example/", "ftp://shop.example/",
+])
+def test_internal_urls_are_never_requested(url):
+    requested = []
+
+    def handler(request):
+        requested.append(request.url)
+        return httpx.Response(200, content=PAGE)
+
+    fetcher, client = _fetcher(handler)
+    [page] = _fetch(fetcher, client, [url])
+    assert "error" in page
+    assert requested == []
+
+
+def test_redirect_to_internal_host_is_refused():
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/"})
+
+    fetcher, client = _fetcher(handler)
+    [page] = _fetch(fetcher, client, ["https://shop.example/dp/1"])
+    assert "public address" in page["error"]
+    assert requested == ["https://shop.example/dp/1"]
+
+
+def test_public_redirect_is_followed():
+    def handler(request):
+        if request.url.path == "/old":
+            return httpx.Response(301, headers={"Location": "/dp/1"})
+        return httpx.Response(200, content=PAGE)
+
+    fetcher, client = _fetcher(handler)
+    [page] = _fetch(fetcher, client, ["https://shop.example/old"])
+    assert page["title"] == "AeroPure Purifier"
+    assert page["bullets"] == ["Quiet"]
+
+
+def test_oversized_page_is_abandoned_while_streaming():
+    sent = []
+
+    async def body():
+        for _ in range(100):
+            sent.append(1)
+            yield b"x" * 1024
+
+    fetcher, client = _fetcher(lambda request: httpx.Response(200, content=body()), max_page_bytes=4096)
+    [page] = _fetch(fetcher, client, ["https://shop.example/dp/1"])
+    assert "larger than 4096 bytes" in page["error"]
+    assert len(sent) < 10
+
+
+def test_declared_oversized_page_is_not_read():
+    fetcher, client = _fetcher(lambda request: httpx.Response(200, content=b"x" * 5000), max_page_bytes=4096)
+    [page] = _fetch(fetcher, client, ["https://shop.example/dp/1"])
+    assert "larger than 4096 bytes" in page["error"]
+
+
+def test_too_many_urls_are_refused():
+    fetcher, client = _fetcher(lambda request: httpx.Response(200, content=PAGE), max_urls=2)
+    with pytest.raises(ValueError):
+        _fetch(fetcher, client, [f"https://shop.example/dp/{n}" for n in range(3)])
+
+
+def test_sync_callers_share_one_client(monkeypatch):
+    fetcher = CompetitorFetcher(workers=1, ttl=0)
+    clients = []
+
+    def new_client():
+        clients.append(httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=PAGE))))
+        return clients[-1]
+
+    monkeypatch.setattr(fetcher, "_new_client", new_client)
+    for _ in range(3):
+        [page] = fetcher.fetch_pages_sync(["https://shop.example/dp/1"])
+        assert page["title"] == "AeroPure Purifier"
+    assert len(clients) == 1
+    assert fetcher.stats()["fetched"] == 3
+
+
+def test_check_url_rejects_hosts_without_public_address():
+    with pytest.raises(BlockedURLError):
+        asyncio.run(competitor_pages.check_url(httpx.URL("http://internal.example/")))
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import history
+from models import Base
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _add_listing(session, name, created_at=None):
+    if created_at is None:
+        # Server default, stored by SQLite as "YYYY-MM-DD HH:MM:SS"
+        session.execute(text("INSERT INTO listing (product_name, category, title, description) "
+                             "VALUES (:name, 'Home', 'Title', 'Description')"), {"name": name})
+    else:
+        session.execute(text("INSERT INTO listing (product_name, category, title, description, created_at) "
+                             "VALUES (:name, 'Home', 'Title', 'Description', :created_at)"),
+                        {"name": name, "created_at": created_at})
+    session.commit()
+
+
+def test_created_at_bounds_at_the_stored_second(session):
+    _add_listing(session, "before", "2026-01-01 09:59:59")
+    _add_listing(session, "at", "2026-01-01 10:00:00")
+    _add_listing(session, "after", "2026-01-01 10:00:01")
+
+    rows, _ = history.query_listings(session, created_from=datetime(2026, 1, 1, 10, 0, 0))
+    assert [r.product_name for r in rows] == ["after", "at"]
+
+    rows, _ = history.query_listings(session, created_to=datetime(2026, 1, 1, 10, 0, 0))
+    assert [r.product_name for r in rows] == ["before"]
+
+
+def test_server_default_row_matches_its_own_second(session):
+    _add_listing(session, "now")
+    created_at = session.execute(text("SELECT created_at FROM listing")).scalar_one()
+    bound = datetime.fromisoformat(created_at)
+
+    rows, _ = history.query_listings(session, created_from=bound)
+    assert [r.product_name for r in rows] == ["now"]
+
+
+def test_keyset_pages_cover_every_row_once(session):
+    for n in range(5):
+        _add_listing(session, f"p{n}")
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = history.query_listings(session, cursor=cursor, limit=2)
+        seen.extend(r.product_name for r in rows)
+        if cursor is None:
+            break
+    assert seen == ["p4", "p3", "p2", "p1", "p0"]
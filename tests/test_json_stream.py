@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONParser
+
+LISTING = {
+    "title": 'AeroPure "Quiet" HEPA \\ Purifier é',
+    "bullets": ["Covers 500 sq ft", "Ultra-quiet, 25dB", "Filter: H13 {true}"],
+    "description": "Line one\nLine two",
+    "score": 87.5,
+    "tags": {"new": True, "discount": None, "rank": -12},
+}
+DOCUMENT = json.dumps(LISTING)
+
+
+def _events(chunks, **kwargs):
+    parser = IncrementalJSONParser(**kwargs)
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.close())
+    return events
+
+
+def test_events_in_document_order():
+    events = _events([DOCUMENT])
+    assert [path for path, _ in events] == [
+        ("title",), ("bullets", 0), ("bullets", 1), ("bullets", 2), ("bullets",),
+        ("description",), ("score",), ("tags", "new"), ("tags", "discount"), ("tags", "rank"),
+        ("tags",), (),
+    ]
+    assert dict(events)[()] == LISTING
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_chunking_does_not_change_the_events(size):
+    chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+    assert _events(chunks) == _events([DOCUMENT])
+
+
+def test_fields_split_across_chunks():
+    parser = IncrementalJSONParser()
+    # Key, escape sequence and number each split mid-token
+    assert parser.feed('{"ti') == []
+    assert parser.feed('tle": "say \\') == []
+    assert parser.feed('"hi\\u00') == []
+    assert parser.feed('e9\\"", "score": 4') == [(("title",), 'say "hié"')]
+    assert parser.feed('2') == []
+    assert parser.feed('.5}') == [(("score",), 42.5), ((), {"title": 'say "hié"', "score": 42.5})]
+    assert parser.done
+
+
+def test_value_reported_as_soon_as_it_closes():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"title": "AeroPure", "bullets": ["one"') == [
+        (("title",), "AeroPure"), (("bullets", 0), "one")]
+    assert not parser.done
+
+
+def test_max_depth_limits_decoded_values():
+    events = _events([DOCUMENT], max_depth=1)
+    assert ("bullets", 0) not in dict(events)
+    assert dict(events)[("bullets",)] == LISTING["bullets"]
+
+
+def test_top_level_scalar_completes_on_close():
+    parser = IncrementalJSONParser()
+    assert parser.feed("12") == []
+    assert parser.close() == [((), 12)]
+
+
+def test_incomplete_document_raises_on_close():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "Aero')
+    with pytest.raises(ValueError):
+        parser.close()
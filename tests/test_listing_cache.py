@@ -0,0 +1,84 @@
+import pytest
+
+import listing_cache
+from listing_cache import ListingCache, make_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(listing_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_key_ignores_case_whitespace_and_keyword_order():
+    a = make_key("listing", "gpt-4o", "v1", 0.7, product_name="AeroPure  Max",
+                 features=["Quiet", "HEPA"], target_keywords=["air purifier", "hepa"])
+    b = make_key("listing", "gpt-4o", "v1", 0.7, product_name="aeropure max",
+                 features=["quiet", "hepa"], target_keywords="hepa, air purifier")
+    assert a == b
+    # Feature order drives bullet order, so it is part of the key
+    assert a != make_key("listing", "gpt-4o", "v1", 0.7, product_name="AeroPure Max",
+                         features=["HEPA", "Quiet"], target_keywords=["air purifier", "hepa"])
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ListingCache(ttl=60)
+    cache.set("k", {"title": "AeroPure"})
+    clock[0] += 59
+    assert cache.get("k") == {"title": "AeroPure"}
+    clock[0] += 2
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["memory_entries"] == 0
+
+
+def test_values_are_returned_as_copies():
+    cache = ListingCache()
+    cache.set("k", {"bullets": ["Quiet"]})
+    cache.get("k")["bullets"].append("mutated")
+    assert cache.get("k") == {"bullets": ["Quiet"]}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ListingCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_tier_is_shared_and_promotes_hits(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = ListingCache(db_path=path)
+    writer.set("k", {"title": "AeroPure"})
+
+    reader = ListingCache(db_path=path)
+    assert reader.get("k") == {"title": "AeroPure"}
+    assert reader.get("k") == {"title": "AeroPure"}
+    stats = reader.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["disk_entries"] == 1
+
+
+def test_sqlite_tier_drops_expired_and_least_recently_used_rows(tmp_path, clock):
+    cache = ListingCache(max_entries=0, ttl=60, db_path=str(tmp_path / "cache.db"), max_db_entries=2)
+    cache.set("a", 1)
+    clock[0] += 1
+    cache.set("b", 2)
+    clock[0] += 1
+    assert cache.get("a") == 1
+    clock[0] += 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.stats()["disk_entries"] == 2
+
+    clock[0] += 60
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 1
@@ -0,0 +1,40 @@
+import pytest
+
+import listing_templates
+from benchmarks.bench_templates import CATEGORIES, _legacy_template_listing, _products
+
+PRODUCTS = _products(100)
+
+
+@pytest.mark.parametrize("product", PRODUCTS, ids=lambda p: f"{p[1]}-{len(p[2])}-{p[3] is not None}")
+def test_rendered_listing_matches_the_old_formatter(product):
+    old = _legacy_template_listing(*product)
+    new = listing_templates.generate_template_listing(*product)
+    if product[3] is None:
+        # The old code ordered generated keywords by set iteration and kept
+        # an arbitrary 15 of them past the limit
+        old_keywords, new_keywords = set(old.pop("keywords")), set(new.pop("keywords"))
+        assert len(new_keywords) == len(old_keywords)
+        if len(new_keywords) < listing_templates.MAX_KEYWORDS:
+            assert new_keywords == old_keywords
+    assert new == old
+
+
+@pytest.mark.parametrize("category", CATEGORIES)
+def test_every_category_fills_all_placeholders(category):
+    listing = listing_templates.generate_template_listing("AeroPure", category, ["Quiet motor"])
+    text = " ".join([listing["title"], listing["description"], *listing["bullets"]])
+    assert "{" not in text and "[" not in text
+    assert len(listing["bullets"]) == listing_templates.BULLET_COUNT
+
+
+def test_generated_keywords_are_stable_and_unique():
+    first = listing_templates.generate_template_listing("AeroPure Max", "Electronics", ["Smart sensor hub"])
+    second = listing_templates.generate_template_listing("AeroPure Max", "Electronics", ["Smart sensor hub"])
+    assert first["keywords"] == second["keywords"]
+    assert len(first["keywords"]) == len(set(first["keywords"]))
+
+
+def test_missing_input_raises():
+    with pytest.raises(ValueError):
+        listing_templates.generate_template_listing("AeroPure", "Electronics", [])
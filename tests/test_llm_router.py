@@ -0,0 +1,69 @@
+import pytest
+
+from llm_router import Backend, Completion, Router
+from llm_transport import LLMTransport
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeBackend(Backend):
+    def __init__(self, model, error=None):
+        super().__init__("openai", model, transport=None)
+        self.error = error
+        self.calls = 0
+
+    def complete(self, messages, temperature, max_tokens, json_mode, deadline):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return Completion("{}", "stop", None, self.name)
+
+
+@pytest.mark.parametrize("error", [StatusError(429), StatusError(503), TimeoutError("slow"),
+                                   StatusError(401), StatusError(403), StatusError(404)])
+def test_transient_errors_fail_over(error):
+    first, second = FakeBackend("a", error), FakeBackend("b")
+    router = Router([first, second], deadline=10)
+
+    assert router.complete([]).backend == second.name
+    assert router.stats()["failovers"] == 1
+    assert first.failures == 1
+
+
+@pytest.mark.parametrize("status", [400, 422])
+def test_request_errors_are_raised_without_failover(status):
+    first, second = FakeBackend("a", StatusError(status)), FakeBackend("b")
+    router = Router([first, second], deadline=10)
+
+    with pytest.raises(StatusError):
+        router.complete([])
+    assert second.calls == 0
+    assert router.stats()["failovers"] == 0
+    assert first.failures == 0
+    assert first.healthy()
+
+
+def test_missing_api_key_fails_over(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    # The OpenAI client cannot be built without a key
+    first = Backend("openai", "gpt-4o", transport=LLMTransport())
+    second = FakeBackend("b")
+    router = Router([first, second], deadline=10)
+
+    for _ in range(2):
+        assert router.complete([]).backend == second.name
+    assert router.stats()["failures"] == 0
+    assert first.failures == 2
+
+
+def test_revoked_key_fails_over_on_every_request():
+    first, second = FakeBackend("a", StatusError(401)), FakeBackend("b")
+    router = Router([first, second], deadline=10)
+
+    for _ in range(5):
+        assert router.complete([]).backend == second.name
+    assert not first.healthy()
@@ -0,0 +1,113 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from llm_transport import LLMTransport
+
+
+class _Response:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _hedging_transport(**kwargs):
+    transport = LLMTransport(hedge=True, hedge_min_samples=1, **kwargs)
+    transport.latency("chat").add(0.01)
+    return transport
+
+
+def test_hedge_wins_and_losing_response_is_closed():
+    transport = _hedging_transport()
+    responses = []
+    release = threading.Event()
+
+    def create(timeout):
+        response = _Response(f"attempt {len(responses)}")
+        responses.append(response)
+        if len(responses) == 1:
+            release.wait(5)
+        return response
+
+    result = transport.call(create, key="chat")
+    assert result is responses[1]
+    release.set()
+    deadline = time.monotonic() + 5
+    while not responses[0].closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert responses[0].closed
+    assert not result.closed
+    assert transport.stats()["hedge_wins"] == 1
+
+
+def test_busy_hedge_pool_runs_call_on_callers_thread():
+    transport = _hedging_transport(max_connections=1)
+    release = threading.Event()
+    threads = []
+
+    def slow(timeout):
+        release.wait(5)
+        return "slow"
+
+    def fast(timeout):
+        threads.append(threading.current_thread())
+        return "fast"
+
+    background = threading.Thread(target=transport.call, args=(slow,), kwargs={"key": "chat"})
+    background.start()
+    deadline = time.monotonic() + 5
+    while transport._hedge_slots._value and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        assert transport.call(fast, key="chat") == "fast"
+        assert threads == [threading.current_thread()]
+    finally:
+        release.set()
+        background.join()
+
+
+def test_hedged_attempts_see_the_callers_context():
+    transport = _hedging_transport()
+    request_id = contextvars.ContextVar("request_id", default=None)
+    seen = []
+
+    def create(timeout):
+        seen.append(request_id.get())
+        return "ok"
+
+    request_id.set("req-1")
+    assert transport.call(create, key="chat") == "ok"
+    assert seen == ["req-1"]
+
+
+def test_cancelled_caller_cancels_the_primary_attempt():
+    transport = _hedging_transport()
+    transport.latency("chat").add(5.0)
+    started = asyncio.Event()
+    cancelled = []
+
+    async def create(timeout):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        caller = asyncio.create_task(transport.acall(create, key="chat"))
+        await started.wait()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        # Checked before asyncio.run() cancels leftover tasks on shutdown
+        assert cancelled == [True]
+
+    asyncio.run(run())
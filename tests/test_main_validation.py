@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+ROUTES = ["/api/generate-listing", "/api/generate-listing/stream"]
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_malformed_json_is_a_400(path):
+    response = client.post(path, content=b'{"product_name": ', headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Invalid JSON body"}
+
+
+@pytest.mark.parametrize("path", ROUTES)
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"listing"', b"null"])
+def test_non_object_json_is_a_400(path, body):
+    response = client.post(path, content=body, headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Expected a JSON object"}
+
+
+@pytest.mark.parametrize("concurrency", ["fast", None, 0, -2, 1.5, True, [4]])
+def test_invalid_batch_concurrency_is_a_400(concurrency):
+    response = client.post("/api/generate-listings/batch",
+                           json={"items": [{"product_name": "AeroPure"}], "concurrency": concurrency})
+    assert response.status_code == 400
+    assert response.json() == {"error": "concurrency must be a positive integer"}
+
+
+def test_malformed_batch_body_is_a_400():
+    response = client.post("/api/generate-listings/batch", content=b"[{",
+                           headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Invalid JSON body"}
+
+
+@pytest.mark.parametrize("body", [b'["https://example.com/a"]', b'"https://example.com/a"', b"null"])
+def test_non_object_competitor_body_is_a_400(body):
+    response = client.post("/api/analyze-competitors", content=body,
+                           headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Expected a JSON object"}
+
+
+def test_malformed_competitor_body_is_a_400():
+    response = client.post("/api/analyze-competitors", content=b"{",
+                           headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Invalid JSON body"}
@@ -0,0 +1,82 @@
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry():
+    return metrics.Registry()
+
+
+def test_counter_renders_help_type_and_labelled_samples(registry):
+    counter = metrics.Counter("jobs_total", "Jobs run", ["kind", "result"], registry=registry)
+    counter.labels("batch", "ok").inc()
+    counter.labels("batch", "ok").inc(2)
+    counter.labels("single", 'say "hi"\n').inc()
+
+    assert registry.render() == (
+        "# HELP jobs_total Jobs run\n"
+        "# TYPE jobs_total counter\n"
+        'jobs_total{kind="batch",result="ok"} 3\n'
+        'jobs_total{kind="single",result="say \\"hi\\"\\n"} 1\n'
+    )
+
+
+def test_gauge_tracks_inc_dec_set_and_functions(registry):
+    gauge = metrics.Gauge("in_flight", "Requests being served", ["app"], registry=registry)
+    with gauge.labels("main").track_inprogress():
+        gauge.labels("main").inc(3)
+        gauge.labels("main").dec()
+        assert gauge.labels("main").get() == 3
+    gauge.labels("app1").set(1.5)
+    depth = metrics.Gauge("queue_depth", "Queued items", registry=registry)
+    depth.labels().set_function(lambda: 7)
+
+    assert registry.render() == (
+        "# HELP in_flight Requests being served\n"
+        "# TYPE in_flight gauge\n"
+        'in_flight{app="app1"} 1.5\n'
+        'in_flight{app="main"} 2\n'
+        "# HELP queue_depth Queued items\n"
+        "# TYPE queue_depth gauge\n"
+        "queue_depth 7\n"
+    )
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count(registry):
+    histogram = metrics.Histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1.0),
+                                  registry=registry)
+    stage = histogram.labels("parse")
+    for seconds in (0.05, 0.1, 0.5, 2.0):
+        stage.observe(seconds)
+
+    assert registry.render() == (
+        "# HELP stage_seconds Stage time\n"
+        "# TYPE stage_seconds histogram\n"
+        'stage_seconds_bucket{stage="parse",le="0.1"} 2\n'
+        'stage_seconds_bucket{stage="parse",le="1"} 3\n'
+        'stage_seconds_bucket{stage="parse",le="+Inf"} 4\n'
+        'stage_seconds_sum{stage="parse"} 2.65\n'
+        'stage_seconds_count{stage="parse"} 4\n'
+    )
+
+
+def test_values_folded_past_the_threshold_are_not_lost(registry, monkeypatch):
+    monkeypatch.setattr(metrics, "FOLD_THRESHOLD", 4)
+    counter = metrics.Counter("events_total", "Events", registry=registry)
+    for _ in range(10):
+        counter.labels().inc()
+    assert "events_total 10\n" in registry.render()
+
+
+def test_label_values_are_normalized_to_strings(registry):
+    counter = metrics.Counter("responses_total", "Responses", ["status"], registry=registry)
+    assert counter.labels(200) is counter.labels("200")
+    with pytest.raises(ValueError):
+        counter.labels("200", "extra")
+
+
+def test_duplicate_names_are_rejected(registry):
+    metrics.Counter("dup_total", "First", registry=registry)
+    with pytest.raises(ValueError):
+        metrics.Counter("dup_total", "Second", registry=registry)
@@ -0,0 +1,27 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import process_pool
+
+
+def _square(n):
+    return n * n
+
+
+def test_map_ordered_in_process():
+    assert list(process_pool.map_ordered(_square, range(5), "test", workers=1)) == [0, 1, 4, 9, 16]
+
+
+def test_map_ordered_keeps_input_order_across_chunks():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(process_pool.map_ordered(_square, iter(range(100)), "test", workers=2,
+                                                chunksize=7, executor=executor))
+    assert results == [n * n for n in range(100)]
+
+
+def test_pools_are_shared_per_name():
+    try:
+        assert process_pool.get_pool("test-a", 1) is process_pool.get_pool("test-a", 1)
+        assert process_pool.get_pool("test-a", 1) is not process_pool.get_pool("test-b", 1)
+    finally:
+        for name in ("test-a", "test-b"):
+            process_pool._pools.pop(name).shutdown()
@@ -0,0 +1,55 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import prompts
+
+INPUTS = {"product_name": "AeroPure", "category": "Home", "features": ["Quiet", "HEPA filter"],
+          "target_keywords": ["air purifier"]}
+
+
+def test_same_input_renders_byte_identical_messages():
+    first = prompts.registry.render("listing", **INPUTS)
+    second = prompts.registry.render("listing", **dict(INPUTS, features=list(INPUTS["features"])))
+    assert json.dumps(first.messages).encode() == json.dumps(second.messages).encode()
+    assert first.prompt_tokens == second.prompt_tokens
+
+
+def test_system_prefix_does_not_depend_on_the_request():
+    one = prompts.LISTING_PROMPT.render(**INPUTS)
+    other = prompts.LISTING_PROMPT.render(product_name="BreezeMax", category="Garden", features=["Solar"])
+    assert one.messages[0] == other.messages[0]
+    assert one.messages[0]["content"] is prompts.LISTING_SYSTEM_PROMPT
+    assert one.messages[1] != other.messages[1]
+
+
+def test_section_prompts_are_built_once_and_keep_their_prefix():
+    title_only = prompts.listing_prompt("title, keywords")
+    assert prompts.listing_prompt(["keywords", "title"]) is title_only
+    assert prompts.listing_prompt(None) is prompts.LISTING_PROMPT
+    assert '"title"' in title_only.system and '"seo_analysis"' not in title_only.system
+    assert (title_only.render(**INPUTS).messages[0]["content"]
+            == title_only.render(**dict(INPUTS, product_name="Other")).messages[0]["content"])
+
+
+@pytest.mark.parametrize("sections", [["title", "price"], []])
+def test_invalid_sections_raise(sections):
+    with pytest.raises(ValueError):
+        prompts.normalize_sections(sections)
+
+
+def test_record_counts_provider_cached_tokens():
+    registry = prompts.PromptRegistry()
+    template = registry.register(prompts.PromptTemplate("t", "1", "system", "{x}"))
+    rendered = template.render(x="hello")
+    usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=50,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+    registry.record(rendered, usage)
+    registry.record(rendered)
+
+    stats = registry.stats()["t"]
+    assert stats["requests"] == 2
+    assert stats["reported_requests"] == 1
+    assert stats["cache_hit_ratio"] == 1.0
+    assert stats["cached_token_ratio"] == round(1024 / 1200, 4)
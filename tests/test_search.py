@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import persistence
+import search
+from models import Base
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    search.ensure_search_index(engine)
+    with Session(engine) as session:
+        persistence.store_listings([
+            persistence.listing_record("AeroPure", "Home", "AeroPure HEPA Air Purifier",
+                                       "Quiet purifier for the bedroom", ["air purifier", "hepa"],
+                                       ["Covers 500 sq ft", "Ultra-quiet NOT noisy"]),
+            persistence.listing_record("BrewMaster", "Kitchen", "BrewMaster Coffee Maker",
+                                       "Brews a pot of coffee", ["coffee maker"], ["Programmable timer"]),
+        ], session)
+        yield session
+
+
+def test_fts5_query_quotes_every_term():
+    assert search._fts5_query(["air", "NOT", 'say"s']) == '"air" "NOT" "say""s"'
+
+
+@pytest.mark.parametrize("query, expected", [
+    # A bullet contains the word "NOT"
+    ("NOT quiet", ["AeroPure"]),
+    # As operators these would match both listings; as words they match neither
+    ("quiet OR coffee", []),
+    ('quiet" OR "coffee', []),
+    ("quiet AND NEAR(coffee)", []),
+    ("title:coffee", []),
+    ("quiet*", ["AeroPure"]),
+    ("(quiet", ["AeroPure"]),
+])
+def test_fts5_syntax_is_matched_as_plain_words(session, query, expected):
+    results = search.search_listings(session, query)
+    assert [listing.product_name for listing, _ in results] == expected
+
+
+def test_every_word_must_match(session):
+    results = search.search_listings(session, "quiet purifier")
+    assert [listing.product_name for listing, _ in results] == ["AeroPure"]
+    assert search.search_listings(session, "quiet coffee") == []
+
+
+def test_query_without_words_is_rejected(session):
+    with pytest.raises(ValueError):
+        search.search_listings(session, '"*()')
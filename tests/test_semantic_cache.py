@@ -0,0 +1,81 @@
+import pytest
+
+import semantic_cache
+from semantic_cache import SemanticCache
+
+FEATURES = ["25 dB whisper quiet", "HEPA H13 filter", "covers 500 sq ft"]
+
+
+def _listing(title):
+    return {"title": title, "bullets": ["Quiet"], "description": "An air purifier.", "keywords": ["air purifier"]}
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def cache(request):
+    if request.param and semantic_cache.np is None:
+        pytest.skip("NumPy is not installed")
+    return SemanticCache(threshold=0.5, exact_threshold=0.99, ttl=60, use_numpy=request.param)
+
+
+def test_expired_closest_match_falls_back_to_next_fresh_entry(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: now[0])
+    cache.add("purifiers", "AeroPure", FEATURES, None, _listing("closest"))
+    now[0] += 30
+    cache.add("purifiers", "AeroPure Max", FEATURES + ["washable pre-filter"], None, _listing("fresh"))
+    now[0] += 40
+
+    listing, similarity = cache.lookup("purifiers", "AeroPure", FEATURES)
+    assert listing["title"] == "fresh"
+    assert similarity >= cache.threshold
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 1
+
+
+def test_expired_entries_are_evicted_on_lookup(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: now[0])
+    cache.add("purifiers", "AeroPure", FEATURES, None, _listing("old"))
+    now[0] += 61
+
+    assert cache.lookup("purifiers", "AeroPure", FEATURES) == (None, None)
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert stats["partitions"] == 0
+
+
+def test_near_duplicate_wording_is_a_hit_and_adapted(cache):
+    cache.add("purifiers", "AeroPure", FEATURES, None, _listing("AeroPure Air Purifier"))
+    reworded = ["whisper quiet 25dB", "H13 HEPA filter", "covers 500 sq ft"]
+
+    listing, similarity = cache.lookup("purifiers", "BreezeMax", reworded)
+    assert cache.threshold <= similarity < cache.exact_threshold
+    assert listing["title"] == "BreezeMax Air Purifier"
+    assert cache.stats()["adapted_hits"] == 1
+
+
+def test_identical_request_is_served_unchanged(cache):
+    cache.add("purifiers", "AeroPure", FEATURES, None, _listing("AeroPure Air Purifier"))
+    listing, similarity = cache.lookup("purifiers", "AeroPure", FEATURES)
+    assert similarity >= cache.exact_threshold
+    assert listing == _listing("AeroPure Air Purifier")
+
+
+def test_dissimilar_request_is_a_miss_below_threshold(cache):
+    cache.add("purifiers", "AeroPure", FEATURES, None, _listing("AeroPure"))
+    listing, similarity = cache.lookup("purifiers", "Trail running shoes",
+                                       ["lightweight mesh upper", "grippy lugs 25"])
+    assert listing is None
+    assert similarity is None or similarity < cache.threshold
+
+
+def test_entries_are_partitioned_by_key_and_numbers(cache):
+    # The partition key carries category, model, prompt version and temperature
+    cache.add("purifiers|gpt-4o", "AeroPure", FEATURES, None, _listing("AeroPure"))
+    assert cache.lookup("purifiers|gpt-4o-mini", "AeroPure", FEATURES) == (None, None)
+    assert cache.lookup("heaters|gpt-4o", "AeroPure", FEATURES) == (None, None)
+
+    louder = ["45 dB whisper quiet", "HEPA H13 filter", "covers 500 sq ft"]
+    assert cache.lookup("purifiers|gpt-4o", "AeroPure", louder) == (None, None)
+    assert cache.lookup("purifiers|gpt-4o", "AeroPure", FEATURES)[0] is not None
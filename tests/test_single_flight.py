@@ -0,0 +1,123 @@
+import asyncio
+import threading
+
+import pytest
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+def _run_followers(flight, key, fn, count):
+    """Start ``count`` callers of an in-flight call; return (threads, outcomes)."""
+    outcomes = []
+
+    def follow():
+        try:
+            outcomes.append(flight.do(key, fn))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=follow) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_followers(flight, count):
+    while flight.stats()["coalesced"] < count:
+        threading.Event().wait(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("listing")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"title": "AeroPure"}
+
+    leader, leader_outcome = _run_followers(flight, "key", generate, 1)
+    started.wait(5)
+    followers, outcomes = _run_followers(flight, "key", generate, 3)
+    _wait_for_followers(flight, 3)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert leader_outcome == [({"title": "AeroPure"}, True)]
+    assert outcomes == [({"title": "AeroPure"}, True)] * 3
+    assert flight.stats() == {"calls": 4, "executed": 1, "coalesced": 3, "in_flight": 0, "name": "listing"}
+
+
+def test_leader_error_reaches_every_caller_and_is_not_remembered():
+    flight = SingleFlight("listing")
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    leader, leader_outcome = _run_followers(flight, "key", fail, 1)
+    started.wait(5)
+    followers, outcomes = _run_followers(flight, "key", fail, 2)
+    _wait_for_followers(flight, 2)
+    release.set()
+    for thread in leader + followers:
+        thread.join(5)
+
+    assert all(isinstance(o, RuntimeError) for o in leader_outcome + outcomes)
+    assert flight.do("key", lambda: "retried") == ("retried", False)
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight("listing")
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()["executed"] == 2
+
+
+def test_async_callers_share_one_call_and_its_error():
+    flight = AsyncSingleFlight("listing")
+    calls = []
+
+    async def generate(fail):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if fail:
+            raise RuntimeError("provider down")
+        return "listing"
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("ok", generate, False) for _ in range(3)))
+        errors = await asyncio.gather(*(flight.do("bad", generate, True) for _ in range(3)),
+                                      return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(main())
+    assert results == [("listing", True)] * 3
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert len(calls) == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_async_caller_does_not_cancel_the_call():
+    flight = AsyncSingleFlight("listing")
+
+    async def generate():
+        await asyncio.sleep(0.02)
+        return "listing"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", generate))
+        second = asyncio.ensure_future(flight.do("key", generate))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == ("listing", True)
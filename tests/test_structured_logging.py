@@ -0,0 +1,130 @@
+import json
+import logging
+import queue
+
+import pytest
+
+import structured_logging
+from structured_logging import JSONFormatter, QueueHandler, Sampler, SamplingFilter
+
+
+class Counted:
+    """Log argument counting how often it is rendered."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return "rendered"
+
+
+@pytest.fixture
+def records():
+    records = queue.Queue(maxsize=10)
+    handler = QueueHandler(records, max_chars=40)
+    handler.addFilter(SamplingFilter())
+    # Not registered with the logging manager, so no other handler (pytest's
+    # log capture included) renders the records
+    logger = logging.Logger("test_structured_logging", logging.INFO)
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger, records
+
+
+def _drain(records):
+    drained = []
+    while not records.empty():
+        drained.append(records.get_nowait())
+    return drained
+
+
+def test_sampler_uses_route_rates_over_the_default():
+    sampler = Sampler(default_rate=0.0, route_rates={"/api/generate-listing": 1.0})
+    assert sampler.sample("/api/generate-listing")
+    assert not sampler.sample("/")
+
+
+def test_sampler_reads_route_rates_from_env(monkeypatch):
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "0.5")
+    monkeypatch.setenv("LOG_ROUTE_SAMPLE_RATES", "/api/generate-listing=0.1, /=0")
+    sampler = Sampler.from_env()
+    assert sampler.default_rate == 0.5
+    assert sampler.route_rates == {"/api/generate-listing": 0.1, "/": 0.0}
+
+
+def test_unsampled_request_keeps_only_warnings(records, monkeypatch):
+    logger, queued = records
+    monkeypatch.setattr(structured_logging, "sampler", Sampler(default_rate=0.0))
+    argument = Counted()
+    token = structured_logging.start_request("/api/generate-listing", "req-1")
+    try:
+        logger.info("Generated listing for %s", argument)
+        logger.warning("Slow provider")
+    finally:
+        structured_logging.end_request(token)
+    logger.info("Outside any request")
+
+    assert [r.getMessage() for r in _drain(queued)] == ["Slow provider", "Outside any request"]
+    # The dropped record's arguments were never rendered
+    assert argument.renders == 0
+
+
+def test_sampled_request_records_carry_the_request_context(records, monkeypatch):
+    logger, queued = records
+    monkeypatch.setattr(structured_logging, "sampler", Sampler(default_rate=1.0))
+    token = structured_logging.start_request("/api/generate-listing", "req-1")
+    try:
+        logger.info("Generated")
+    finally:
+        structured_logging.end_request(token)
+
+    (record,) = _drain(queued)
+    assert (record.request_id, record.route) == ("req-1", "/api/generate-listing")
+    assert structured_logging._request.get() is None
+
+
+def test_arguments_are_formatted_only_for_enabled_levels(records):
+    logger, queued = records
+    argument = Counted()
+    logger.debug("Prompt: %s", argument)
+    assert argument.renders == 0
+
+    logger.info("Prompt: %s", argument)
+    (record,) = _drain(queued)
+    assert argument.renders == 1
+    assert record.getMessage() == "Prompt: rendered"
+    assert record.args is None
+
+
+def test_long_messages_are_cut(records):
+    logger, queued = records
+    logger.info("%s", "y" * 100)
+    (record,) = _drain(queued)
+    assert record.getMessage() == "y" * 40 + "... [60 more characters]"
+
+
+def test_payloads_render_a_cut_repr_when_written():
+    value = {"features": ["x" * 100]}
+    rendered = str(structured_logging.payload(value, max_chars=20))
+    assert rendered == repr(value)[:20] + f"... [{len(repr(value)) - 20} more characters]"
+    assert str(structured_logging.payload({"a": 1})) == "{'a': 1}"
+
+
+def test_full_queue_drops_records_instead_of_blocking(records):
+    logger, queued = records
+    for i in range(15):
+        logger.info("record %d", i)
+    assert queued.qsize() == 10
+
+
+def test_json_formatter_writes_extra_fields():
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "Stored %d listings", (3,), None)
+    record.request_id = "req-1"
+    record.route = None
+    record.batch = "b-7"
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "Stored 3 listings"
+    assert entry["request_id"] == "req-1"
+    assert entry["batch"] == "b-7"
+    assert "route" not in entry
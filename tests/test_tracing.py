@@ -0,0 +1,66 @@
+import re
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import tracing
+
+
+def test_server_timing_lists_spans_in_end_order_then_total():
+    trace = tracing.Trace("req-1", "/api/generate-listing")
+    start = trace.started
+    trace.add_span("prompt_build", start, start + 0.0012)
+    trace.add_span("llm_wait", start + 0.002, start + 1.5, desc='gpt-4o "mini"')
+
+    entries = trace.server_timing().split(", ")
+    assert entries[:2] == ["prompt_build;dur=1.2", "llm_wait;dur=1498.0;desc=\"gpt-4o 'mini'\""]
+    assert re.fullmatch(r"total;dur=\d+\.\d", entries[2])
+    assert len(entries) == 3
+
+
+def test_server_timing_of_a_trace_without_spans_is_the_total():
+    assert re.fullmatch(r"total;dur=\d+\.\d", tracing.Trace("req-1", "/").server_timing())
+
+
+def test_spans_record_on_the_current_trace_only():
+    with tracing.span("validation"):
+        pass
+    trace, token = tracing.tracer.start("/api/generate-listing")
+    try:
+        with tracing.span("validation"):
+            pass
+    finally:
+        tracing.tracer.finish(trace, token, 200)
+    assert [s[0] for s in trace.spans] == ["validation"]
+    assert tracing.current() is None
+
+
+def _client():
+    async def listing(request):
+        with tracing.span("template"):
+            pass
+        return JSONResponse({"ok": True})
+
+    app = Starlette(routes=[Route("/traced", listing), Route("/other", listing)])
+    return TestClient(tracing.ASGITracingMiddleware(app, ("/traced",), tracer=tracing.Tracer()))
+
+
+def test_traced_request_returns_server_timing_and_request_id():
+    response = _client().get("/traced", headers={"X-Trace": "1", "X-Request-ID": "abc-123"})
+    assert response.headers["X-Request-ID"] == "abc-123"
+    timing = response.headers["Server-Timing"].split(", ")
+    assert timing[0].startswith("template;dur=")
+    assert timing[-1].startswith("total;dur=")
+
+
+def test_unusable_request_id_is_replaced():
+    response = _client().get("/traced", headers={"X-Trace": "1", "X-Request-ID": "bad id!"})
+    assert re.fullmatch(r"[0-9a-f]{32}", response.headers["X-Request-ID"])
+
+
+def test_untraced_requests_get_no_timing_headers():
+    client = _client()
+    assert "Server-Timing" not in client.get("/traced").headers
+    assert "Server-Timing" not in client.get("/other", headers={"X-Trace": "1"}).headers
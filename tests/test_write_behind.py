@@ -0,0 +1,38 @@
+import threading
+
+from write_behind import WriteBehindQueue
+
+
+def test_close_flushes_pending_records():
+    written = []
+    writer = WriteBehindQueue(written.extend, batch_size=10, flush_interval=60)
+    for n in range(25):
+        assert writer.put(n)
+    writer.close()
+
+    assert written == list(range(25))
+    assert writer.stats()["written"] == 25
+    assert not writer.put(25)
+
+
+def test_failed_batch_drops_only_the_bad_record():
+    written = []
+    release = threading.Event()
+
+    def sink(batch):
+        release.wait(5)
+        if "bad" in batch:
+            raise ValueError("bad record")
+        written.extend(batch)
+
+    writer = WriteBehindQueue(sink, batch_size=8, flush_interval=60)
+    records = ["a", "b", "c", "bad", "d", "e", "f", "g"]
+    for record in records:
+        writer.put(record)
+    release.set()
+    writer.close()
+
+    assert written == [r for r in records if r != "bad"]
+    stats = writer.stats()
+    assert stats["written"] == 7
+    assert stats["failed"] == 1
@@ -0,0 +1,73 @@
+"""
+Output token budgets for listing generation calls.
+
+Generation calls used to run without ``max_tokens``, so a listing could take
+as long as the model liked. The budget is now sized from the sections the
+model is asked for: each section has a typical output size (derived from the
+length instructions in the prompt: a title under 200 characters, five
+bullets, a 4-5 paragraph description, ...), the SEO analysis grows with the
+number of keywords it reports densities for, and a safety margin keeps
+normal responses from being cut off. A response that still hits the limit
+(``finish_reason == "length"``) is incomplete JSON and is treated as a
+failed generation by the callers.
+"""
+import math
+
+# Typical output tokens per section, JSON syntax included
+SECTION_TOKENS = {
+    "title": 60,
+    "bullets": 300,
+    "description": 550,
+    "keywords": 60,
+    "seo_analysis": 260,
+    "aeo_analysis": 150,
+    "psychological_techniques": 220,
+}
+
+# Extra seo_analysis tokens per keyword (density entry and placement lists)
+KEYWORD_TOKENS = 20
+
+# Keywords assumed when the request has no target keywords
+DEFAULT_KEYWORD_COUNT = 10
+
+# Braces and whitespace around the JSON object
+OBJECT_OVERHEAD_TOKENS = 10
+
+SAFETY_MARGIN = 1.4
+MIN_MAX_TOKENS = 128
+MAX_MAX_TOKENS = 4096
+
+
+def estimate_output_tokens(sections, keyword_count=None):
+    """
+    Estimate the output tokens of a listing made of ``sections``.
+
+    Args:
+        sections (iterable): Section names (see prompts.LISTING_SECTIONS)
+        keyword_count (int, optional): Target keywords in the request
+
+    Returns:
+        int: Expected output tokens
+    """
+    if not keyword_count:
+        keyword_count = DEFAULT_KEYWORD_COUNT
+    tokens = OBJECT_OVERHEAD_TOKENS + sum(SECTION_TOKENS[s] for s in sections)
+    if "seo_analysis" in sections:
+        tokens += KEYWORD_TOKENS * keyword_count
+    return tokens
+
+
+def max_tokens_for(sections, keyword_count=None, margin=SAFETY_MARGIN):
+    """
+    Size ``max_tokens`` for a generation call asking for ``sections``.
+
+    Args:
+        sections (iterable): Section names
+        keyword_count (int, optional): Target keywords in the request
+        margin (float): Headroom over the expected size
+
+    Returns:
+        int: max_tokens to send, between MIN_MAX_TOKENS and MAX_MAX_TOKENS
+    """
+    expected = estimate_output_tokens(sections, keyword_count)
+    return max(MIN_MAX_TOKENS, min(MAX_MAX_TOKENS, math.ceil(expected * margin)))
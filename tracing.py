@@ -0,0 +1,381 @@
+"""
+Opt-in request tracing with a per-request timing breakdown.
+
+A traced request gets a request id (the caller's X-Request-ID when it sends
+a usable one) and records a span for every stage it goes through:
+validation, prompt_build, llm_wait (the upstream call, retries included),
+provider (the provider's own processing time per attempt, from OpenAI's
+openai-processing-ms header), json_parse, seo_analysis, template,
+persistence and serialization. The spans are returned in a Server-Timing
+header, which browser dev tools show under Timing, with the id in
+X-Request-ID, and each finished trace can be appended as one JSON line to
+TRACE_FILE.
+
+Tracing is off unless asked for: per request with an ``X-Trace: 1`` header,
+or for every request of the traced routes with TRACE_REQUESTS=1. The
+current trace lives in a context variable, so code anywhere below the route
+(openai_utils, the transport) adds spans without passing it around, and an
+untraced request pays one context variable lookup per stage. The stage
+timers of metrics record their spans here, so each stage is timed once.
+
+Trace files are converted for chrome://tracing or https://ui.perfetto.dev
+with:
+
+    python tracing.py traces.jsonl > trace.json
+"""
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace"
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Caller-supplied request ids are used when they look like ids
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+_current = contextvars.ContextVar("trace", default=None)
+
+
+def current():
+    """Return the trace of the running request, or None when it is not traced."""
+    return _current.get()
+
+
+class Trace:
+    """
+    Spans of one traced request.
+
+    Args:
+        request_id (str): Id returned to the caller and written to the trace file
+        route (str): Route being served
+    """
+
+    def __init__(self, request_id, route):
+        self.request_id = request_id
+        self.route = route
+        self.started_at = datetime.now(timezone.utc)
+        self.started = perf_counter()
+        self.status = None
+        self.duration = None
+        self.spans = []
+        self.attributes = {}
+
+    def add_span(self, name, started, ended, **attributes):
+        """
+        Record a span; ``started`` and ``ended`` are perf_counter() readings.
+
+        Safe from any thread (list.append is atomic under the GIL).
+        """
+        self.spans.append((name, started, ended, attributes))
+
+    def span(self, name, **attributes):
+        """Context manager recording a span around its block."""
+        return _Span(self, name, attributes)
+
+    def annotate(self, **attributes):
+        """Add request-level attributes (model, cache hit, ...)."""
+        self.attributes.update(attributes)
+
+    def finish(self, status):
+        self.status = status
+        self.duration = perf_counter() - self.started
+
+    def server_timing(self):
+        """
+        Return the spans as a Server-Timing header value.
+
+        Durations are in milliseconds, in the order the spans ended, with a
+        final ``total`` up to now.
+        """
+        entries = []
+        for name, started, ended, attributes in self.spans:
+            entry = f"{name};dur={(ended - started) * 1000:.1f}"
+            desc = attributes.get("desc")
+            if desc:
+                entry += ';desc="' + str(desc).replace('"', "'") + '"'
+            entries.append(entry)
+        entries.append(f"total;dur={(perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self):
+        """Return the trace as a JSON-serializable dict (one trace file line)."""
+        return {
+            "request_id": self.request_id,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+            "spans": [dict({"name": name,
+                            "start_ms": round((started - self.started) * 1000, 3),
+                            "duration_ms": round((ended - started) * 1000, 3)}, **attributes)
+                      for name, started, ended, attributes in self.spans]
+        }
+
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_attributes", "_started")
+
+    def __init__(self, trace, name, attributes):
+        self._trace = trace
+        self._name = name
+        self._attributes = attributes
+
+    def __enter__(self):
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self._attributes["error"] = exc_type.__name__
+        self._trace.add_span(self._name, self._started, perf_counter(), **self._attributes)
+
+
+class _NoSpan:
+    """Span of an untraced request: does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, **attributes):
+    """
+    Context manager recording a span on the current trace, if any.
+
+    Args:
+        name (str): Span name (a Server-Timing metric name: no spaces)
+        attributes: Extra fields for the trace file; ``desc`` also goes
+            into Server-Timing
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name, attributes)
+
+
+def annotate(**attributes):
+    """Add request-level attributes to the current trace, if any."""
+    trace = _current.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def record_provider_response(response):
+    """
+    httpx response hook: record the provider's processing time of an attempt.
+
+    Installed on the llm_transport clients; every attempt of a traced call
+    (retries and hedges included) adds a "provider" span ending now and as
+    long as the provider says it worked on the request, with the HTTP status
+    and the provider's request id.
+    """
+    trace = _current.get()
+    if trace is None:
+        return
+    headers = response.headers
+    ended = perf_counter()
+    try:
+        processing = float(headers.get("openai-processing-ms")) / 1000
+    except (TypeError, ValueError):
+        processing = None
+    attributes = {"status": response.status_code, "host": response.request.url.host}
+    provider_request_id = headers.get("x-request-id") or headers.get("request-id")
+    if provider_request_id:
+        attributes["provider_request_id"] = provider_request_id
+    if processing is None:
+        # Providers without a processing-time header: a zero-length marker
+        trace.add_span("provider_response", ended, ended, **attributes)
+    else:
+        trace.add_span("provider", ended - processing, ended, **attributes)
+
+
+async def arecord_provider_response(response):
+    """Async variant of record_provider_response for httpx.AsyncClient hooks."""
+    record_provider_response(response)
+
+
+class Tracer:
+    """
+    Starts and finishes request traces and writes the trace file.
+
+    Args:
+        trace_all (bool): Trace every request of the traced routes, not only
+            those sent with an X-Trace header
+        trace_file (str, optional): JSONL file finished traces are appended to
+    """
+
+    def __init__(self, trace_all=False, trace_file=None):
+        self.trace_all = trace_all
+        self.trace_file = trace_file
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Create a tracer configured from environment variables.
+
+        TRACE_REQUESTS (1 traces every request) and TRACE_FILE.
+        """
+        return cls(
+            trace_all=os.environ.get("TRACE_REQUESTS", "").lower() in ("1", "true", "yes"),
+            trace_file=os.environ.get("TRACE_FILE") or None,
+        )
+
+    def wanted(self, trace_header):
+        """Return True if a request with this X-Trace header value is traced."""
+        if self.trace_all:
+            return True
+        return trace_header is not None and trace_header.lower() in ("1", "true", "yes")
+
+    def start(self, route, request_id=None):
+        """
+        Start tracing the running request.
+
+        Args:
+            route (str): Route being served
+            request_id (str, optional): The caller's X-Request-ID
+
+        Returns:
+            tuple: (trace, token); pass the token to finish()
+        """
+        if not request_id or not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        trace = Trace(request_id, route)
+        return trace, _current.set(trace)
+
+    def finish(self, trace, token, status):
+        """Stop tracing the running request and write the trace file line."""
+        trace.finish(status)
+        try:
+            _current.reset(token)
+        except (ValueError, RuntimeError):
+            # Finished in another context (e.g. after a streamed response)
+            _current.set(None)
+        if self.trace_file:
+            self._write(trace)
+
+    def _write(self, trace):
+        line = json.dumps(trace.to_dict(), default=str) + "\n"
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.trace_file, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+        except OSError as e:
+            logger.error("Could not write trace %s: %s", trace.request_id, e)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+tracer = Tracer.from_env()
+
+
+class ASGITracingMiddleware:
+    """
+    ASGI middleware tracing requests to the given paths.
+
+    Adds the Server-Timing and X-Request-ID headers to traced responses;
+    the spans are those recorded before the response starts.
+
+    Args:
+        app: The wrapped ASGI application
+        paths (tuple): Request paths to trace, e.g. ("/api/generate-listing",)
+        tracer (Tracer, optional): Defaults to the module tracer
+    """
+
+    def __init__(self, app, paths, tracer=None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        active = self.tracer or tracer
+        headers = {}
+        for name, value in scope.get("headers", ()):
+            if name in (b"x-trace", b"x-request-id"):
+                headers[name] = value.decode("latin-1")
+        if not active.wanted(headers.get(b"x-trace")):
+            await self.app(scope, receive, send)
+            return
+
+        trace, token = active.start(scope["path"], headers.get(b"x-request-id"))
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"server-timing", trace.server_timing().encode("latin-1")),
+                    (b"x-request-id", trace.request_id.encode("latin-1")),
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            active.finish(trace, token, status)
+
+
+def to_chrome_trace(lines):
+    """
+    Convert trace file lines to the Chrome trace event format.
+
+    Each request becomes one row ("thread") named after its request id,
+    with the request and its spans as complete ("X") events.
+
+    Args:
+        lines (iterable): Lines of a TRACE_FILE
+
+    Returns:
+        dict: {"traceEvents": [...]}, loadable in chrome://tracing or Perfetto
+    """
+    events = []
+    for tid, line in enumerate((line for line in lines if line.strip()), start=1):
+        trace = json.loads(line)
+        start_us = datetime.fromisoformat(trace["started_at"]).timestamp() * 1e6
+        events.append({"ph": "M", "name": "thread_name", "pid": 1, "tid": tid,
+                       "args": {"name": trace["request_id"]}})
+        events.append({"ph": "X", "name": trace["route"], "pid": 1, "tid": tid, "ts": start_us,
+                       "dur": (trace["duration_ms"] or 0) * 1000,
+                       "args": dict(trace.get("attributes") or {}, status=trace["status"],
+                                    request_id=trace["request_id"])})
+        for span in trace["spans"]:
+            args = {k: v for k, v in span.items() if k not in ("name", "start_ms", "duration_ms")}
+            events.append({"ph": "X", "name": span["name"], "pid": 1, "tid": tid,
+                           "ts": start_us + span["start_ms"] * 1000, "dur": span["duration_ms"] * 1000,
+                           "args": args})
+    return {"traceEvents": events}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python tracing.py TRACE_FILE > trace.json")
+    with open(sys.argv[1], encoding="utf-8") as f:
+        json.dump(to_chrome_trace(f), sys.stdout)
@@ -0,0 +1,146 @@
+"""
+In-process write-behind queue for storing generated listings.
+
+Request handlers hand records to a bounded queue and return immediately; a
+background thread drains it in batches into a sink function (normally
+persistence.store_listings inside an app context). When the queue is full,
+producers block for up to ``put_timeout`` seconds (backpressure) before the
+record is dropped and counted. When the sink fails on a batch, the batch is
+split in halves and retried, so only the records the sink rejects on their
+own are dropped. Pending records are flushed on close() and at interpreter
+exit.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue drained in batches by a background worker thread.
+
+    Args:
+        sink (callable): Called with a list of records; must persist them all
+            or none (raise, rolling back, on failure)
+        max_size (int): Maximum number of queued records
+        batch_size (int): Maximum records handed to ``sink`` at once
+        flush_interval (float): Seconds to wait for a batch to fill up
+        put_timeout (float): Seconds a producer blocks on a full queue
+        name (str): Worker thread name
+    """
+
+    def __init__(self, sink, max_size=1000, batch_size=100, flush_interval=0.5,
+                 put_timeout=1.0, name="write-behind"):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._stats = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0,
+                       "last_batch_size": 0, "last_batch_seconds": 0.0, "max_depth": 0}
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def put(self, record):
+        """
+        Queue a record for storage.
+
+        Returns:
+            bool: False if the queue stayed full for put_timeout and the
+            record was dropped, or the queue is closed
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            logger.warning("Write-behind queue full, dropping record")
+            return False
+        with self._lock:
+            self._stats["enqueued"] += 1
+            depth = self._queue.qsize()
+            if depth > self._stats["max_depth"]:
+                self._stats["max_depth"] = depth
+        return True
+
+    def depth(self):
+        """Number of records waiting to be written."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Return queue depth and throughput counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["depth"] = self._queue.qsize()
+        stats["capacity"] = self._queue.maxsize
+        return stats
+
+    def close(self, timeout=10.0):
+        """Stop accepting records, flush everything queued and stop the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        # Waits for room if the queue is full; the worker keeps draining
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            logger.warning("Write-behind worker did not finish within %ss, %d records not written",
+                           timeout, self._queue.qsize())
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get()
+            except Exception:  # pragma: no cover - interpreter shutdown
+                return
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            self.sink(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error("Write-behind record failed, dropping it: %s", e)
+                with self._lock:
+                    self._stats["failed"] += 1
+                return
+            # Bisect so one bad record does not take the whole batch with it
+            logger.warning("Write-behind batch of %d records failed, retrying in halves: %s", len(batch), e)
+            middle = len(batch) // 2
+            self._write(batch[:middle])
+            self._write(batch[middle:])
+            return
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["last_batch_seconds"] = round(elapsed, 6)